@@ -4,6 +4,10 @@ Main Streamlit entry point.
 """
 
 import os
+import time
+
+_T0 = time.perf_counter()
+
 import streamlit as st
 
 st.set_page_config(
@@ -164,6 +168,14 @@ st.markdown(
 # ── Resolve base dir (lokasi app.py ini berada) ───────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# TV_STARTUP_TIMING=1 → tampilkan waktu render & warm-up import di sidebar
+STARTUP_TIMING = os.environ.get("TV_STARTUP_TIMING") == "1"
+_marks: list[tuple[str, float]] = []
+
+
+def _mark(label: str) -> None:
+    _marks.append((label, time.perf_counter()))
+
 # ── Sidebar ───────────────────────────────────────────────────────────────────
 with st.sidebar:
     st.markdown(
@@ -197,6 +209,12 @@ with st.sidebar:
         value="models/best.onnx",
         help="Path relatif ke file best.onnx hasil training",
     )
+    backend = st.selectbox(
+        "Backend Inferensi",
+        ["ultralytics", "onnxruntime"],
+        help="onnxruntime: sesi ONNX langsung tanpa ultralytics/torch "
+             "(startup & latensi per frame lebih rendah)",
+    )
 
     conf_thresh = st.slider("Confidence Threshold", 0.1, 0.9, 0.4, 0.05)
     iou_thresh  = st.slider("IoU Threshold", 0.1, 0.9, 0.5, 0.05)
@@ -216,10 +234,15 @@ else:
     model_path = os.path.join(BASE_DIR, model_path_input)
 
 # ── Model loader (cached) ─────────────────────────────────────────────────────
-@st.cache_resource(show_spinner="Memuat model YOLOv12n...")
-def get_model(path: str):
-    from utils.analyzer import load_model
-    return load_model(path)
+# Satu pool per (model, backend) untuk semua sesi browser. Ukuran pool & thread
+# adalah pengaturan proses (env TRAFFIC_VISION_POOL_SIZE / _INTRA_OP_THREADS /
+# _INTER_OP_THREADS), bukan widget: pilihan satu pengguna tidak boleh memuat
+# ulang pool pengguna lain. max_entries: paling banyak satu pool per backend.
+@st.cache_resource(show_spinner="Memuat & memanaskan model YOLOv12n...", max_entries=2)
+def get_model(path: str, backend: str):
+    from utils.session_pool import SessionPool
+    # Warm-up di sini: dibayar sekali per proses, bukan oleh hasil pertama user
+    return SessionPool(path, backend, warmup_runs=1)
 
 
 def try_load_model():
@@ -237,23 +260,70 @@ def try_load_model():
             else:
                 st.code("Folder models/ tidak ditemukan!")
         return None
-    return get_model(model_path)
+    model = get_model(model_path, backend)
+    info = getattr(model, "load_info", None)
+    if info:
+        graph = " · graph teroptimasi dari cache" if info["optimized_cache_hit"] else ""
+        st.sidebar.caption(
+            f"⏱ Model dimuat {info['load_sec']:.2f}s · warm-up {info['warmup_sec']:.2f}s{graph}"
+        )
+    pool = model.stats()
+    st.sidebar.caption(
+        f"🧵 {pool['sessions']} sesi × {pool['intra_op_threads']}/{pool['inter_op_threads']} "
+        f"thread (intra/inter) · "
+        f"dipakai {pool['in_use']} · antre {pool['waiting']} · "
+        f"tunggu rata-rata {pool['mean_wait_ms']:.0f} ms (p95 {pool['p95_wait_ms']:.0f} ms)"
+    )
+    return model
 
 
 # ── Page routing ──────────────────────────────────────────────────────────────
+_mark("sidebar")
 if page == "🏠 Dashboard":
     from pages.home import render
+    _mark("import halaman")
     render()
 elif page == "🖼 Deteksi Gambar":
     from pages.image_detection import render
+    _mark("import halaman")
     model = try_load_model()
+    _mark("muat model")
     if model:
-        render(model, conf_thresh, iou_thresh)
+        render(model, conf_thresh, iou_thresh, model_path)
 elif page == "📹 Analisis Video":
     from pages.video_analysis import render
+    _mark("import halaman")
     model = try_load_model()
+    _mark("muat model")
     if model:
-        render(model, conf_thresh, iou_thresh)
+        render(model, conf_thresh, iou_thresh, model_path)
 elif page == "📊 Tentang Model":
     from pages.about import render
-    render(model_path)
\ No newline at end of file
+    _mark("import halaman")
+    render(model_path)
+_mark("render")
+
+# ── Warm-up ───────────────────────────────────────────────────────────────────
+# Halaman sudah tampil; impor stack inferensi (cv2, numpy, plotly, backend)
+# di thread latar agar halaman deteksi tidak menunggu import saat dibuka.
+from utils import warmup
+
+warmup.start(backend)
+
+if STARTUP_TIMING:
+    with st.sidebar.expander("⏱ Waktu Startup", expanded=True):
+        prev = _T0
+        lines = []
+        for label, t in _marks:
+            lines.append(f"{label:<16}{(t - prev) * 1000:8.0f} ms")
+            prev = t
+        lines.append(f"{'total script':<16}{(prev - _T0) * 1000:8.0f} ms")
+        st.code("\n".join(lines))
+        status = "selesai" if warmup.done(backend) else "berjalan"
+        timings, errors = warmup.snapshot()   # thread warm-up mungkin masih menulis
+        st.caption(f"Warm-up import ({status})")
+        st.code("\n".join(
+            f"{name:<22}{sec * 1000:8.0f} ms" for name, sec in timings.items()
+        ) or "-")
+        for name, err in errors.items():
+            st.caption(f"⚠️ {name}: {err}")
@@ -0,0 +1,291 @@
+"""
+🚦 Traffic Vision — headless batch runner.
+Analyze a folder (or manifest) of images and videos without Streamlit.
+
+    python batch.py data/cctv --out results/ --workers 4
+    python batch.py manifest.txt --format parquet --sample-every 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+VIDEO_EXTS = {".mp4", ".avi", ".mov", ".mkv"}
+
+# Model & opsi per proses worker — dimuat sekali oleh initializer
+_model = None
+_opts: dict = {}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    files = discover(args.input, args.recursive)
+    if not files:
+        print(f"Tidak ada gambar/video di {args.input}", file=sys.stderr)
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+
+    from utils.analyzer import VideoOptions
+
+    zones = None
+    if args.zones:
+        from utils.zones import ZoneLayout
+        zones = ZoneLayout.from_json(args.zones)
+    opts = {
+        "video": VideoOptions(
+            conf=args.conf, iou=args.iou, sample_every=args.sample_every,
+            max_frames=args.max_frames, batch_size=args.batch_size, pipelined=True,
+            roi=args.roi, infer_size=args.infer_size, zones=zones,
+        ),
+        "write_video": args.write_video, "out": args.out, "format": args.format,
+    }
+    root = args.input if os.path.isdir(args.input) else os.path.dirname(os.path.abspath(args.input))
+    stems = output_stems(files, root)
+    threads = args.threads
+    if threads is None and args.workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // args.workers)   # hindari oversubscription
+    init_args = (args.model, args.backend, threads, opts)
+
+    from utils.profiling import StageProfiler
+
+    t0 = time.perf_counter()
+    profiler = StageProfiler()   # gabungan semua file; wall = durasi batch
+    summary: list[dict] = []
+    if args.workers <= 1:
+        _init_worker(*init_args)
+        for path, stem in zip(files, stems):
+            summary.append(_report(_analyze_file(path, stem), len(summary) + 1, len(files)))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=mp.get_context("spawn"),   # fork + thread pool OpenCV/ORT tidak aman
+            initializer=_init_worker,
+            initargs=init_args,
+        ) as pool:
+            futures = [pool.submit(_analyze_file, path, stem) for path, stem in zip(files, stems)]
+            for future in as_completed(futures):
+                summary.append(_report(future.result(), len(summary) + 1, len(files)))
+
+    summary.sort(key=lambda row: row["file"])
+    _write_summary(summary, args.out, time.perf_counter() - t0)
+    if args.metrics_file:
+        profiler.stop()
+        for row in summary:
+            profiler.merge(row["profile"])
+        profiler.write_prometheus(args.metrics_file)
+    failed = sum(1 for row in summary if row["status"] != "ok")
+    return 1 if failed else 0
+
+
+def discover(source: str, recursive: bool = False) -> list[str]:
+    """Media files in a directory, or the paths listed in a manifest file."""
+    if os.path.isdir(source):
+        if recursive:
+            paths = [os.path.join(d, f) for d, _, names in os.walk(source) for f in names]
+        else:
+            paths = [os.path.join(source, f) for f in os.listdir(source)]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as f:
+            paths = [
+                line if os.path.isabs(line) else os.path.join(base, line)
+                for line in (raw.strip() for raw in f)
+                if line and not line.startswith("#")
+            ]
+    return sorted(p for p in paths if _kind(p) is not None)
+
+
+def _kind(path: str) -> str | None:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTS:
+        return "image"
+    if ext in VIDEO_EXTS:
+        return "video"
+    return None
+
+
+def _init_worker(model_path: str, backend: str, threads: int | None, opts: dict) -> None:
+    global _model, _opts
+    from utils.analyzer import load_model
+    _model = load_model(model_path, backend, threads=threads)
+    _opts = opts
+
+
+def output_stems(files: list[str], root: str) -> list[str]:
+    """
+    Output name per input: its path relative to ``root`` (the input folder
+    or the manifest's folder) with the extension kept, so ``cam1.jpg`` and
+    ``cam1.mp4`` write ``cam1.jpg.csv`` and ``cam1.mp4.csv``. Names that
+    still collide get a ``~N`` suffix.
+    """
+    stems: list[str] = []
+    used: set[str] = set()
+    for path in files:
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+        if rel.startswith(os.pardir):   # di luar folder manifest → path absolut
+            rel = os.path.splitdrive(os.path.abspath(path))[1].lstrip(os.sep)
+        stem = base = rel.replace(os.sep, "__")
+        n = 1
+        while stem.lower() in used:   # juga aman di filesystem case-insensitive
+            n += 1
+            stem = f"{base}~{n}"
+        used.add(stem.lower())
+        stems.append(stem)
+    return stems
+
+
+def _analyze_file(path: str, stem: str) -> dict:
+    import cv2
+    from utils.analyzer import analyze_frame, process_video_file
+
+    from utils.profiling import StageProfiler
+
+    o, v = _opts, _opts["video"]
+    t0 = time.perf_counter()
+    profiler = StageProfiler()
+    row = {"file": path, "type": _kind(path), "status": "ok", "error": ""}
+    try:
+        if row["type"] == "image":
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError("gambar tidak bisa dibaca")
+            result = analyze_frame(
+                _model, image, v.conf, v.iou, annotate=False,
+                roi=v.roi, infer_size=v.infer_size, zones=v.zones, profiler=profiler,
+            )
+            stat = {
+                "frame": 0, "time_sec": 0.0,
+                **result["vehicle_counts"],
+                "congestion_index": result["congestion"]["index"],
+                "congestion_level": result["congestion"]["level"],
+                "density_score":    result["density"]["score"],
+            }
+            for name, z in result.get("zones", {}).items():
+                stat[f"zone_{name}_total"] = z["vehicle_counts"]["total"]
+                stat[f"zone_{name}_congestion"] = z["congestion"]["index"]
+            frame_stats = [stat]
+            video_out = None
+        else:
+            video_out, frame_stats = process_video_file(
+                _model, path, v, o["write_video"], profiler=profiler,
+            )
+        row["stats_file"] = _write_stats(frame_stats, os.path.join(o["out"], stem), o["format"])
+        if video_out is not None:
+            row["video_file"] = os.path.join(o["out"], stem + "_annotated.mp4")
+            shutil.move(video_out, row["video_file"])
+        row.update(_summarize(frame_stats))
+    except Exception as exc:   # satu file gagal tidak menghentikan batch
+        row.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    row["seconds"] = round(time.perf_counter() - t0, 2)
+    profiler.stop()
+    row["profile"] = profiler.report()
+    return row
+
+
+def _write_stats(frame_stats: list[dict], stem: str, fmt: str) -> str:
+    if fmt == "parquet":
+        import pandas as pd
+        path = stem + ".parquet"
+        pd.DataFrame(frame_stats).to_parquet(path, index=False)
+        return path
+    path = stem + ".csv"
+    columns = list(frame_stats[0]) if frame_stats else []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(frame_stats)
+    return path
+
+
+def _summarize(frame_stats: list[dict]) -> dict:
+    if not frame_stats:
+        return {"samples": 0}
+    totals = [row["total"] for row in frame_stats]
+    cong = [row["congestion_index"] for row in frame_stats]
+    levels = Counter(row["congestion_level"] for row in frame_stats)
+    return {
+        "samples":        len(frame_stats),
+        "avg_total":      round(sum(totals) / len(totals), 2),
+        "max_total":      max(totals),
+        "avg_congestion": round(sum(cong) / len(cong), 1),
+        "max_congestion": max(cong),
+        "dominant_level": levels.most_common(1)[0][0],
+    }
+
+
+def _report(row: dict, done: int, total: int) -> dict:
+    status = "✓" if row["status"] == "ok" else f"✗ {row['error']}"
+    print(f"[{done}/{total}] {row['file']} ({row['seconds']}s) {status}", flush=True)
+    return row
+
+
+def _write_summary(summary: list[dict], out_dir: str, elapsed: float) -> None:
+    columns = [
+        "file", "type", "status", "samples", "avg_total", "max_total",
+        "avg_congestion", "max_congestion", "dominant_level", "seconds",
+        "stats_file", "video_file", "error",
+    ]
+    with open(os.path.join(out_dir, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(summary)
+    ok = sum(1 for row in summary if row["status"] == "ok")
+    meta = {"files": len(summary), "ok": ok, "failed": len(summary) - ok,
+            "elapsed_sec": round(elapsed, 2)}
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "results": summary}, f, indent=2)
+    print(f"Selesai: {ok}/{len(summary)} file dalam {elapsed:.1f}s → {out_dir}")
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Analisis batch gambar & video lalu lintas tanpa Streamlit.",
+    )
+    p.add_argument("input", help="Folder media atau file manifest (satu path per baris)")
+    p.add_argument("--out", default="results", help="Folder output (default: results)")
+    p.add_argument("--model", default=os.path.join(BASE_DIR, "models", "best.onnx"))
+    p.add_argument("--backend", choices=["ultralytics", "onnxruntime"], default="onnxruntime")
+    p.add_argument("--workers", type=int, default=1, help="Jumlah proses worker")
+    p.add_argument("--threads", type=int, default=None, help="Thread inferensi per worker")
+    p.add_argument("--conf", type=float, default=0.4)
+    p.add_argument("--iou", type=float, default=0.5)
+    p.add_argument("--sample-every", type=int, default=5)
+    p.add_argument("--max-frames", type=int, default=None)
+    p.add_argument("--batch-size", type=int, default=1)
+    p.add_argument("--infer-size", type=int, default=None,
+                   help="Perkecil frame (sisi terpanjang, px) sebelum inferensi")
+    p.add_argument("--roi", type=_parse_roi, default=None, metavar="X1,Y1,X2,Y2",
+                   help="Analisis hanya area ini (piksel)")
+    p.add_argument("--zones", default=None, metavar="ZONES.json",
+                   help='Zona/lajur: [{"name": ..., "polygon": [[x, y], ...]}] koordinat 0–1')
+    p.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    p.add_argument("--write-video", action="store_true", help="Simpan juga video anotasi")
+    p.add_argument("--recursive", "-r", action="store_true", help="Telusuri subfolder")
+    p.add_argument("--metrics-file", default=None, metavar="PATH.prom",
+                   help="Tulis waktu per tahap & counter gabungan (format Prometheus)")
+    return p.parse_args(argv)
+
+
+def _parse_roi(value: str) -> tuple[int, int, int, int]:
+    try:
+        x1, y1, x2, y2 = (int(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("format ROI: X1,Y1,X2,Y2") from None
+    return x1, y1, x2, y2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
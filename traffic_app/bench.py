@@ -0,0 +1,456 @@
+"""
+🚦 Traffic Vision — benchmark suite.
+Reproducible timings of the analyzer hot paths on synthetic frames, generated
+test videos and a stand-in ONNX model, saved as JSON for run-to-run comparison.
+
+    python bench.py --out bench-baseline.json
+    python bench.py --quick --compare bench-baseline.json --tolerance 0.15
+    python bench.py --model models/best.onnx --only analyze,video
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import cv2
+import numpy as np
+
+from utils.analyzer import (
+    CLASS_NAMES,
+    Detections,
+    VideoOptions,
+    _compute_analytics,
+    _draw_boxes,
+    _overlay_video_stats,
+    analyze_frame,
+    build_result,
+    process_video_file,
+)
+
+# ─────────────────────────────────────────────
+RESOLUTIONS = {"360p": (640, 360), "720p": (1280, 720), "1080p": (1920, 1080)}
+DETECTION_COUNTS = (0, 10, 50, 150)
+VIDEO_DETECTION_COUNTS = (10, 100)
+SAMPLE_EVERY = (1, 3, 5)
+STANDIN_IMGSZ = 640
+STANDIN_ANCHORS = 8400        # jumlah kandidat output YOLO 640 (80² + 40² + 20²)
+SUITES = ("analyze", "analytics", "draw", "overlay", "video")
+SEED = 0
+# ─────────────────────────────────────────────
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    cfg = {
+        "repeat":       10 if args.quick else 50,
+        "warmup":       2 if args.quick else 5,
+        "video_frames": 30 if args.quick else 120,
+        "resolutions":  ["360p", "720p"] if args.quick else list(RESOLUTIONS),
+    }
+    suites = SUITES if not args.only else tuple(s.strip() for s in args.only.split(","))
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f"Suite tidak dikenal: {', '.join(sorted(unknown))} (pilihan: {', '.join(SUITES)})",
+              file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix="tv-bench-") as tmp:
+        models = ModelFactory(tmp, args.model, args.backend, args.threads)
+        results: list[dict] = []
+        for suite in suites:
+            for row in BENCHES[suite](models, cfg, tmp):
+                print(_format_row(row), flush=True)
+                results.append(row)
+        report = {"meta": _meta(args, cfg, models), "results": results}
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil benchmark → {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+
+# ── Synthetic inputs ───────────────────────────────────────────
+def make_frame(w: int, h: int, seed: int = SEED) -> np.ndarray:
+    """Road-like BGR frame: vertical gradient, lane stripes and sensor noise."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(60, 140, h, dtype=np.float32)[:, None, None]
+    frame = np.broadcast_to(ramp, (h, w, 3)).copy()
+    for x in np.linspace(w * 0.2, w * 0.8, 4).astype(int):
+        frame[:, max(0, x - 3):x + 3] = 200
+    frame += rng.normal(0, 8, frame.shape).astype(np.float32)
+    return frame.clip(0, 255).astype(np.uint8)
+
+
+def grid_boxes(n: int, w: float, h: float) -> tuple[np.ndarray, np.ndarray]:
+    """``n`` non-overlapping ``xyxy`` boxes on a grid over w×h plus cycling class ids."""
+    if n == 0:
+        return np.empty((0, 4), np.float32), np.empty(0, np.int64)
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    cw, ch = w / cols, h / rows
+    i = np.arange(n)
+    cx, cy = (i % cols + 0.5) * cw, (i // cols + 0.5) * ch
+    bw, bh = cw * 0.6, ch * 0.6
+    boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+    return boxes.astype(np.float32), (i % len(CLASS_NAMES)).astype(np.int64)
+
+
+def make_detections(n: int, w: int, h: int) -> Detections:
+    boxes, class_ids = grid_boxes(n, w, h)
+    return Detections.from_arrays(boxes, np.full(n, 0.9), class_ids)
+
+
+def make_video(path: str, w: int, h: int, frames: int, fps: int = 30) -> str:
+    """mp4 with a moving block so consecutive frames differ for the decoder."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    if not writer.isOpened():
+        raise IOError(f"VideoWriter tidak bisa membuka {path}")
+    base = make_frame(w, h)
+    block = max(8, w // 10)
+    try:
+        for i in range(frames):
+            frame = base.copy()
+            x = (i * 7) % max(1, w - block)
+            frame[h // 2:h // 2 + block, x:x + block] = (40, 40, 220)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+# ── Stand-in models ────────────────────────────────────────────
+def build_standin_onnx(path: str, n_detections: int, imgsz: int = STANDIN_IMGSZ) -> str:
+    """
+    Write a tiny ONNX graph with the YOLO I/O contract: ``images`` (N, 3,
+    imgsz, imgsz) → (N, 4 + nc, 8400), of which ``n_detections`` candidates
+    score above any usual ``conf`` and the rest are background. The output
+    depends on the input (mean × 0) so ONNX Runtime cannot fold it away.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    nc = len(CLASS_NAMES)
+    pred = np.zeros((1, 4 + nc, STANDIN_ANCHORS), np.float32)
+    rng = np.random.default_rng(SEED)
+    pred[0, 0:2] = rng.uniform(0, imgsz, (2, STANDIN_ANCHORS))
+    pred[0, 2:4] = rng.uniform(4, 32, (2, STANDIN_ANCHORS))
+    pred[0, 4:] = rng.uniform(0.0, 0.05, (nc, STANDIN_ANCHORS))
+    boxes, class_ids = grid_boxes(n_detections, imgsz, imgsz)
+    if n_detections:
+        pred[0, 0, :n_detections] = (boxes[:, 0] + boxes[:, 2]) / 2
+        pred[0, 1, :n_detections] = (boxes[:, 1] + boxes[:, 3]) / 2
+        pred[0, 2, :n_detections] = boxes[:, 2] - boxes[:, 0]
+        pred[0, 3, :n_detections] = boxes[:, 3] - boxes[:, 1]
+        pred[0, 4 + class_ids, np.arange(n_detections)] = 0.9
+
+    nodes = [
+        helper.make_node("ReduceMean", ["images"], ["mean"], axes=[1, 2, 3], keepdims=1),
+        helper.make_node("Reshape", ["mean", "shape3"], ["mean3"]),
+        helper.make_node("Mul", ["mean3", "zero"], ["bias"]),
+        helper.make_node("Add", ["bias", "pred"], ["output0"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "tv_bench_standin",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, imgsz, imgsz])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", 4 + nc, STANDIN_ANCHORS])],
+        initializer=[
+            numpy_helper.from_array(pred, "pred"),
+            numpy_helper.from_array(np.array([-1, 1, 1], np.int64), "shape3"),
+            numpy_helper.from_array(np.zeros(1, np.float32), "zero"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    helper.set_model_props(model, {"imgsz": f"[{imgsz}, {imgsz}]", "stride": "32"})
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+    return path
+
+
+class GridDetector:
+    """
+    NumPy-only stand-in used when ``onnx`` / ``onnxruntime`` are missing:
+    the ``OnnxDetector.detect`` contract with a fixed detection grid and no
+    inference cost.
+    """
+
+    def __init__(self, n_detections: int):
+        self.n_detections = n_detections
+
+    def detect(self, images, conf=0.4, iou=0.5, profiler=None):
+        out = []
+        for img in images:
+            boxes, class_ids = grid_boxes(self.n_detections, img.shape[1], img.shape[0])
+            out.append((boxes, np.full(len(boxes), 0.9, np.float32), class_ids))
+        return out
+
+
+class ModelFactory:
+    """
+    Models per detection count, built once. With ``model_path`` every count
+    maps to the real model (detections then depend on the synthetic frame).
+    """
+
+    def __init__(self, tmp: str, model_path: str | None, backend: str, threads: int | None):
+        self.tmp = tmp
+        self.model_path = model_path
+        self.backend = backend
+        self.threads = threads
+        self.kind = "model" if model_path else "onnx-standin"
+        self._cache: dict[int | None, object] = {}
+
+    def counts(self, counts: tuple[int, ...]) -> tuple[int | None, ...]:
+        return (None,) if self.model_path else counts
+
+    def get(self, n: int | None):
+        if n not in self._cache:
+            self._cache[n] = self._load(n)
+        return self._cache[n]
+
+    def _load(self, n: int | None):
+        from utils.analyzer import load_model
+        if self.model_path:
+            return load_model(self.model_path, self.backend, threads=self.threads)
+        if self.kind == "onnx-standin":
+            try:
+                path = build_standin_onnx(os.path.join(self.tmp, f"standin_{n}.onnx"), n)
+                return load_model(path, "onnxruntime", threads=self.threads)
+            except ImportError as exc:
+                print(f"Stand-in ONNX tidak tersedia ({exc}); memakai GridDetector", file=sys.stderr)
+                self.kind = "numpy-grid"
+        return GridDetector(n)
+
+
+# ── Timing ─────────────────────────────────────────────────────
+def time_calls(fn, repeat: int, warmup: int, setup=None) -> list[float]:
+    """Milliseconds per call of ``fn(*setup())``; ``setup`` runs outside the timer."""
+    samples = []
+    for i in range(warmup + repeat):
+        args = setup() if setup is not None else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        dt = (time.perf_counter() - t0) * 1000
+        if i >= warmup:
+            samples.append(dt)
+    return samples
+
+
+def latency_stats(samples_ms: list[float]) -> dict:
+    a = np.asarray(samples_ms)
+    p50, p90, p99 = np.percentile(a, [50, 90, 99])
+    return {
+        "n":       len(a),
+        "mean_ms": round(float(a.mean()), 4),
+        "p50_ms":  round(float(p50), 4),
+        "p90_ms":  round(float(p90), 4),
+        "p99_ms":  round(float(p99), 4),
+        "min_ms":  round(float(a.min()), 4),
+    }
+
+
+def _row(name: str, params: dict, stats: dict, metric: str = "p50_ms",
+         higher_is_better: bool = False) -> dict:
+    return {
+        "name": name, "params": params, "stats": stats,
+        "metric": metric, "higher_is_better": higher_is_better,
+    }
+
+
+# ── Benchmarks ─────────────────────────────────────────────────
+def bench_analyze(models: ModelFactory, cfg: dict, tmp: str):
+    """End-to-end ``analyze_frame`` latency with and without annotation."""
+    for res in cfg["resolutions"]:
+        frame = make_frame(*RESOLUTIONS[res])
+        for n in models.counts(DETECTION_COUNTS):
+            model = models.get(n)
+            for annotate in (False, True):
+                samples = time_calls(
+                    lambda: analyze_frame(model, frame, 0.4, 0.5, annotate=annotate),
+                    cfg["repeat"], cfg["warmup"],
+                )
+                yield _row("analyze_frame",
+                           {"resolution": res, "detections": n, "annotate": annotate},
+                           latency_stats(samples))
+
+
+def bench_analytics(models: ModelFactory, cfg: dict, tmp: str):
+    """``_compute_analytics`` alone; it only depends on the class counts."""
+    w, h = RESOLUTIONS["720p"]
+    for n in DETECTION_COUNTS:
+        counts = make_detections(n, w, h).counts()
+        # Panggilan terlalu cepat untuk diukur satu per satu → ukur per 1000
+        samples = time_calls(
+            lambda: [_compute_analytics(counts, w * h) for _ in range(1000)],
+            cfg["repeat"], cfg["warmup"],
+        )
+        yield _row("compute_analytics_x1000", {"detections": n}, latency_stats(samples))
+
+
+def bench_draw(models: ModelFactory, cfg: dict, tmp: str):
+    """``_draw_boxes`` on a fresh copy per call (copy not timed)."""
+    for res in cfg["resolutions"]:
+        w, h = RESOLUTIONS[res]
+        frame = make_frame(w, h)
+        for n in DETECTION_COUNTS:
+            dets = make_detections(n, w, h)
+            samples = time_calls(
+                lambda img: _draw_boxes(img, dets), cfg["repeat"], cfg["warmup"],
+                setup=lambda: (frame.copy(),),
+            )
+            yield _row("draw_boxes", {"resolution": res, "detections": n},
+                       latency_stats(samples))
+
+
+def bench_overlay(models: ModelFactory, cfg: dict, tmp: str):
+    """``_overlay_video_stats`` (boxes + blended panel) as used per output frame."""
+    for res in cfg["resolutions"]:
+        w, h = RESOLUTIONS[res]
+        frame = make_frame(w, h)
+        for n in DETECTION_COUNTS:
+            result = build_result(make_detections(n, w, h), frame, annotate=False)
+            samples = time_calls(
+                lambda img: _overlay_video_stats(img, result), cfg["repeat"], cfg["warmup"],
+                setup=lambda: (frame.copy(),),
+            )
+            yield _row("overlay_video_stats", {"resolution": res, "detections": n},
+                       latency_stats(samples))
+
+
+def bench_video(models: ModelFactory, cfg: dict, tmp: str):
+    """``process_video_file`` throughput over a generated clip."""
+    for res in cfg["resolutions"]:
+        w, h = RESOLUTIONS[res]
+        path = make_video(os.path.join(tmp, f"clip_{res}.mp4"), w, h, cfg["video_frames"])
+        for n in models.counts(VIDEO_DETECTION_COUNTS):
+            model = models.get(n)
+            for sample_every in SAMPLE_EVERY:
+                t0 = time.perf_counter()
+                out_path, frame_stats = process_video_file(
+                    model, path, VideoOptions(sample_every=sample_every, pipelined=True),
+                )
+                elapsed = time.perf_counter() - t0
+                if out_path and os.path.exists(out_path):
+                    os.remove(out_path)
+                stats = {
+                    "frames":       cfg["video_frames"],
+                    "analyzed":     len(frame_stats),
+                    "seconds":      round(elapsed, 4),
+                    "fps":          round(cfg["video_frames"] / elapsed, 2),
+                    "analyzed_fps": round(len(frame_stats) / elapsed, 2),
+                }
+                yield _row("process_video_file",
+                           {"resolution": res, "detections": n, "sample_every": sample_every},
+                           stats, metric="fps", higher_is_better=True)
+
+
+BENCHES = {
+    "analyze":   bench_analyze,
+    "analytics": bench_analytics,
+    "draw":      bench_draw,
+    "overlay":   bench_overlay,
+    "video":     bench_video,
+}
+
+
+# ── Reporting ──────────────────────────────────────────────────
+def _meta(args: argparse.Namespace, cfg: dict, models: ModelFactory) -> dict:
+    try:
+        import onnxruntime
+        ort_version = onnxruntime.__version__
+    except ImportError:
+        ort_version = None
+    return {
+        "created":     time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python":      platform.python_version(),
+        "platform":    platform.platform(),
+        "cpu_count":   os.cpu_count(),
+        "numpy":       np.__version__,
+        "opencv":      cv2.__version__,
+        "onnxruntime": ort_version,
+        "model":       args.model,
+        "backend":     args.backend if args.model else "onnxruntime",
+        "model_kind":  models.kind,
+        "threads":     args.threads,
+        "quick":       args.quick,
+        **cfg,
+    }
+
+
+def _key(row: dict) -> str:
+    params = ",".join(f"{k}={row['params'][k]}" for k in sorted(row["params"]))
+    return f"{row['name']}[{params}]"
+
+
+def _format_row(row: dict) -> str:
+    value = row["stats"][row["metric"]]
+    return f"{_key(row):<70} {row['metric']}={value}"
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.15) -> list[str]:
+    """
+    Print the change of every shared benchmark's primary metric and return
+    the keys that got slower by more than ``tolerance`` (0.15 = 15 %).
+    """
+    base = {_key(row): row for row in baseline["results"]}
+    regressions = []
+    print(f"\n{'benchmark':<70} {'baseline':>10} {'sekarang':>10} {'perubahan':>10}")
+    for row in current["results"]:
+        key = _key(row)
+        old = base.get(key)
+        if old is None or old["metric"] != row["metric"]:
+            continue
+        a, b = old["stats"][row["metric"]], row["stats"][row["metric"]]
+        if not a or not b:
+            continue
+        # Perlambatan relatif: >0 berarti lebih lambat, apa pun arah metriknya
+        slowdown = (a / b - 1) if row["higher_is_better"] else (b / a - 1)
+        flag = ""
+        if slowdown > tolerance:
+            regressions.append(key)
+            flag = "  ✗ REGRESI"
+        print(f"{key:<70} {a:>10} {b:>10} {slowdown:>+9.1%}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark lebih lambat > {tolerance:.0%} dari baseline")
+    else:
+        print(f"\nTidak ada regresi > {tolerance:.0%}")
+    return regressions
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Benchmark jalur panas analyzer Traffic Vision (frame & video sintetis).",
+    )
+    p.add_argument("--out", default=f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json",
+                   help="File JSON hasil")
+    p.add_argument("--model", default=None,
+                   help="Model sungguhan (default: stand-in ONNX sintetis)")
+    p.add_argument("--backend", choices=["ultralytics", "onnxruntime"], default="onnxruntime")
+    p.add_argument("--threads", type=int, default=None, help="Thread inferensi")
+    p.add_argument("--only", default=None, metavar="SUITE,...",
+                   help=f"Subset suite: {','.join(SUITES)}")
+    p.add_argument("--quick", action="store_true", help="Repetisi & resolusi lebih sedikit")
+    p.add_argument("--compare", default=None, metavar="BASELINE.json",
+                   help="Bandingkan dengan hasil sebelumnya; exit 1 bila ada regresi")
+    p.add_argument("--tolerance", type=float, default=0.15,
+                   help="Batas perlambatan relatif sebelum dianggap regresi (default 0.15)")
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,14 @@ Image Detection page.
 
 from __future__ import annotations
 
-import io
 import time
 
 import cv2
 import numpy as np
 import streamlit as st
-from PIL import Image
 
-from utils.analyzer import analyze_frame
+from utils.analyzer import Detections, analyze_frame, backend_name, build_result
+from utils.cache import bytes_hash, file_hash, get_default_cache, make_key
 from utils.charts import (
     congestion_gauge,
     large_vs_small_gauge,
@@ -21,7 +20,7 @@ from utils.charts import (
 )
 
 
-def render(model, conf: float, iou: float):
+def render(model, conf: float, iou: float, model_path: str | None = None):
     st.markdown(
         """
         <div class="tv-header">
@@ -52,14 +51,35 @@ def render(model, conf: float, iou: float):
         )
         return
 
-    # Load image
-    pil_img = Image.open(uploaded).convert("RGB")
-    img_bgr = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+    # Load image: decode langsung ke BGR (tanpa PIL & konversi RGB→BGR)
+    img_bgr = cv2.imdecode(np.frombuffer(uploaded.getvalue(), np.uint8), cv2.IMREAD_COLOR)
+    if img_bgr is None:
+        st.error("❌ Gambar tidak bisa dibaca. Pastikan file JPG / PNG / WEBP valid.")
+        return
+
+    # Cache hasil per (isi gambar, model, parameter)
+    cache = get_default_cache()
+    cache_key = make_key(
+        bytes_hash(uploaded.getvalue()),
+        file_hash(model_path) if model_path else "",
+        kind="image", backend=backend_name(model), conf=conf, iou=iou,
+    )
 
     # Run detection
     with st.spinner("🔍 Menganalisis gambar..."):
         t0 = time.perf_counter()
-        result = analyze_frame(model, img_bgr, conf, iou)
+        cached = cache.get_arrays(cache_key)
+        if cached is not None:
+            result = build_result(
+                Detections.from_arrays(cached["boxes"], cached["scores"], cached["class_ids"]),
+                img_bgr,
+            )
+        else:
+            result = analyze_frame(model, img_bgr, conf, iou)
+            dets = result["detections"]
+            cache.put_arrays(
+                cache_key, boxes=dets.boxes, scores=dets.scores, class_ids=dets.class_ids
+            )
         elapsed = time.perf_counter() - t0
 
     # ── Layout ─────────────────────────────────────────────────
@@ -68,15 +88,15 @@ def render(model, conf: float, iou: float):
     with img_col:
         st.markdown("#### Hasil Deteksi")
         annotated = result["annotated"]
-        st.image(annotated, use_container_width=True)
-        st.caption(f"⏱ Inferensi: {elapsed*1000:.0f} ms · {len(result['detections'])} objek terdeteksi")
+        st.image(annotated, channels="BGR", use_container_width=True)
+        source = "cache" if cached is not None else "Inferensi"
+        st.caption(f"⏱ {source}: {elapsed*1000:.0f} ms · {len(result['detections'])} objek terdeteksi")
 
         # Download annotated image
-        buf = io.BytesIO()
-        Image.fromarray(annotated).save(buf, format="JPEG", quality=92)
+        _, jpeg = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 92])
         st.download_button(
             "⬇ Download Hasil",
-            data=buf.getvalue(),
+            data=jpeg.tobytes(),
             file_name="traffic_annotated.jpg",
             mime="image/jpeg",
         )
@@ -182,7 +202,7 @@ def render(model, conf: float, iou: float):
     with st.expander("🔎 Detail Deteksi", expanded=False):
         import pandas as pd
         rows = []
-        for i, det in enumerate(result["detections"], 1):
+        for i, det in enumerate(result["detections"].to_dicts(), 1):
             x1, y1, x2, y2 = [int(v) for v in det["bbox"]]
             rows.append({
                 "#": i,
@@ -4,19 +4,56 @@ Video Analysis page.
 
 from __future__ import annotations
 
+import os
 import tempfile
 import time
+from collections import deque
 
 import cv2
-import numpy as np
 import pandas as pd
 import streamlit as st
 
-from utils.analyzer import analyze_frame, process_video_file
+from utils.analyzer import VideoOptions, backend_name, iter_video_file, render_video_preview
+from utils.cache import (
+    bytes_hash,
+    file_hash,
+    frame_stats_from_columns,
+    frame_stats_to_columns,
+    get_default_cache,
+    make_key,
+)
 from utils.charts import congestion_timeline, vehicle_timeline
+from utils.counting import LineCounter, parse_lines
+from utils.motion import MotionEstimator, parse_calibration
+from utils.parallel import process_video_parallel
+from utils.profiling import StageProfiler
+from utils.sampling import SceneChangeSampler
+from utils.scheduler import POLICIES, MultiCameraScheduler, parse_camera_list
+from utils.stats import CongestionStats
+from utils.stream import iter_stream
+from utils.tracker import VehicleTracker
+from utils.zones import ZoneLayout
 
+LIVE_REFRESH_SEC = 1.0   # interval update preview & grafik saat proses berjalan
+LIVE_MAX_ROWS = 600      # sampel terakhir di grafik live & hasil stream (memori tetap)
+INFER_SIZES = [None, 1280, 960, 640]   # pilihan resolusi inferensi (None = asli)
+STAGE_LABELS = {
+    "decode":      "Decode",
+    "sampling":    "Sampling",
+    "decode_wait": "Tunggu decode",
+    "queue_wait":  "Antre sesi model",
+    "preprocess":  "Pra-proses",
+    "inference":   "Inferensi",
+    "postprocess": "Pasca-proses",
+    "tracking":    "Tracking & statistik",
+    "encode_wait": "Tunggu encode",
+    "overlay":     "Overlay",
+    "encode":      "Encode",
+    "concat":      "Gabung segmen",
+}
 
-def render(model, conf: float, iou: float):
+
+def render(model, conf: float, iou: float, model_path: str | None = None):
     st.markdown(
         """
         <div class="tv-header">
@@ -27,6 +64,17 @@ def render(model, conf: float, iou: float):
         unsafe_allow_html=True,
     )
 
+    mode = st.radio(
+        "Sumber video", ["📁 Upload file", "📡 Stream langsung", "🎛️ Multi-kamera"],
+        horizontal=True, label_visibility="collapsed",
+    )
+    if mode == "📡 Stream langsung":
+        _render_stream(model, conf, iou)
+        return
+    if mode == "🎛️ Multi-kamera":
+        _render_multicam(model, conf, iou)
+        return
+
     uploaded = st.file_uploader(
         "Upload video (MP4 / AVI / MOV)",
         type=["mp4", "avi", "mov", "mkv"],
@@ -62,6 +110,154 @@ def render(model, conf: float, iou: float):
                 min_value=0, max_value=10000, value=0, step=100,
             )
             max_frames = None if max_frames == 0 else int(max_frames)
+        adaptive = st.checkbox(
+            "Sampling adaptif (berdasarkan perubahan scene)",
+            value=False,
+            help="Inferensi hanya dijalankan saat scene berubah; "
+                 "menggantikan pengaturan 'setiap N frame'",
+        )
+        max_gap, change_thresh = None, None
+        if adaptive:
+            col5, col6 = st.columns(2)
+            with col5:
+                max_gap = st.slider(
+                    "Jeda maksimum antar analisis (frame)",
+                    min_value=5, max_value=120, value=30,
+                )
+            with col6:
+                change_thresh = st.slider(
+                    "Ambang perubahan scene",
+                    min_value=1.0, max_value=20.0, value=6.0, step=0.5,
+                    help="Semakin kecil = lebih sensitif terhadap perubahan",
+                )
+        batch_size = st.slider(
+            "Batch inferensi (frame per panggilan model)",
+            min_value=1, max_value=16, value=1,
+            help="Frame sampel dikumpulkan lalu diproses model sekaligus. "
+                 "Batch > 1 butuh model ONNX dengan batch dinamis",
+        )
+        col3, col4 = st.columns(2)
+        with col3:
+            track = st.checkbox(
+                "Hitung kendaraan unik (tracking)",
+                value=True,
+                help="Kendaraan yang sama di beberapa frame hanya dihitung sekali",
+            )
+        with col4:
+            window_sec = st.selectbox(
+                "Jendela waktu hitungan unik (detik)", [10, 30, 60, 300], index=2,
+                disabled=not track,
+            )
+        fast_mode = st.checkbox(
+            "Mode cepat: hanya data (tanpa video anotasi)",
+            value=False,
+            help="Lewati decode frame yang tidak dianalisis dan encoding video; "
+                 "hasil hanya timeline & CSV",
+        )
+        col9, col10 = st.columns(2)
+        with col9:
+            infer_size = st.selectbox(
+                "Resolusi inferensi (sisi terpanjang)", INFER_SIZES,
+                format_func=lambda v: "Asli" if v is None else f"{v} px",
+                help="Frame diperkecil sekali sebelum masuk model; anotasi tetap resolusi asli",
+            )
+        with col10:
+            roi_x = st.slider("Area analisis horizontal (%)", 0, 100, (0, 100))
+            roi_y = st.slider("Area analisis vertikal (%)", 0, 100, (0, 100))
+        roi_pct = None if (roi_x, roi_y) == ((0, 100), (0, 100)) else (*roi_x, *roi_y)
+        zones_text = st.text_area(
+            "Zona / lajur (opsional, satu per baris: `nama: x,y x,y x,y ...` dalam %)",
+            placeholder="Lajur Kiri: 0,45 50,45 50,100 0,100\nLajur Kanan: 50,45 100,45 100,100 50,100",
+            help="Hanya kendaraan di dalam zona yang dihitung; kepadatan dihitung per "
+                 "luas zona dan inferensi hanya pada area yang mencakup semua zona. "
+                 "Menggantikan area analisis di atas",
+        )
+        zones = None
+        if zones_text.strip():
+            try:
+                zones = ZoneLayout.from_text(zones_text)
+            except ValueError as exc:
+                st.error(f"Format zona tidak valid: {exc}")
+                return
+        pipelined = st.checkbox(
+            "Mode pipeline (decode · inferensi · encode paralel)",
+            value=True,
+            help="Decode dan encode video berjalan di thread terpisah "
+                 "sehingga tumpang tindih dengan inferensi model",
+        )
+        col7, col8 = st.columns(2)
+        with col7:
+            parallel = st.checkbox(
+                "Proses paralel (multi-proses per segmen video)",
+                value=False,
+                disabled=model_path is None,
+                help="Video dibagi per segmen waktu, tiap proses memuat model sendiri. "
+                     "Tracking, sampling adaptif & preview live tidak dipakai",
+            )
+        with col8:
+            workers = st.number_input(
+                "Jumlah proses", min_value=1, max_value=os.cpu_count() or 1,
+                value=os.cpu_count() or 1, disabled=not parallel,
+            )
+        col11, col12 = st.columns([3, 1])
+        with col11:
+            lines_text = st.text_area(
+                "Garis hitung arus (opsional, satu per baris: `nama: x1,y1 x2,y2` dalam %)",
+                placeholder="Stop Line Utara: 10,60 90,60",
+                disabled=not track,
+                help="Kendaraan yang melintasi garis dihitung per arah; "
+                     "'forward' = melintas ke sisi kanan arah garis (x1,y1 → x2,y2). "
+                     "Butuh tracking",
+            )
+        with col12:
+            interval_min = st.selectbox(
+                "Interval arus (menit)", [1, 5, 15], disabled=not track,
+            )
+        lines = []
+        if track and lines_text.strip():
+            try:
+                lines = parse_lines(lines_text)
+            except ValueError as exc:
+                st.error(f"Format garis tidak valid: {exc}")
+                return
+        calib_text = st.text_area(
+            "Kalibrasi kecepatan (opsional, ≥4 titik per baris: `x,y -> X,Y` — posisi % → meter)",
+            placeholder="30,55 -> 0,0\n70,55 -> 7,0\n90,95 -> 7,30\n10,95 -> 0,30",
+            disabled=not track,
+            help="Titik acuan di permukaan jalan (mis. sudut marka) beserta posisinya "
+                 "dalam meter. Dipakai untuk kecepatan, panjang antrean dan indeks "
+                 "kemacetan gabungan (kepadatan + kecepatan). Butuh tracking",
+        )
+        motion = None
+        if track and calib_text.strip():
+            try:
+                motion = MotionEstimator(*parse_calibration(calib_text))
+            except ValueError as exc:
+                st.error(f"Kalibrasi tidak valid: {exc}")
+                return
+        if parallel:
+            track, adaptive, lines, motion = False, False, [], None
+
+    # Cache hasil per (isi video, model, parameter analisis)
+    cache = get_default_cache()
+    cache_key = make_key(
+        _upload_hash(uploaded),
+        file_hash(model_path) if model_path else "",
+        kind="video", backend=backend_name(model), conf=conf, iou=iou,
+        sample_every=sample_every, max_frames=max_frames,
+        adaptive=adaptive, max_gap=max_gap, change_thresh=change_thresh,
+        track=track, window_sec=window_sec if track else None, fast_mode=fast_mode,
+        parallel=parallel, infer_size=infer_size, roi_pct=roi_pct,
+        zones=zones_text.strip() or None,
+        lines=lines_text.strip() if lines else None,
+        interval_min=interval_min if lines else None,
+        calibration=calib_text.strip() if motion else None,
+    )
+    cached = cache.get_json(cache_key)
+    if cached is not None:
+        st.caption("⚡ Hasil dimuat dari cache — ubah pengaturan untuk analisis ulang")
+        _render_results(cached, cache.get_file(cache_key, ".mp4"))
+        return
 
     if not st.button("🚀 Mulai Analisis Video"):
         return
@@ -81,7 +277,13 @@ def render(model, conf: float, iou: float):
     cap = cv2.VideoCapture(tmp_path)
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25
+    vid_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    vid_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     cap.release()
+    roi = None
+    if roi_pct is not None:
+        x1, x2, y1, y2 = roi_pct
+        roi = (vid_w * x1 // 100, vid_h * y1 // 100, vid_w * x2 // 100, vid_h * y2 // 100)
 
     status_box.markdown(
         f"<p style='color:#64748b;font-size:0.82rem'>"
@@ -89,50 +291,422 @@ def render(model, conf: float, iou: float):
         unsafe_allow_html=True,
     )
 
-    with st.spinner("🔍 Memproses video..."):
-        out_path, frame_stats = process_video_file(
-            model, tmp_path, conf, iou, sample_every, max_frames
+    options = VideoOptions(
+        conf=conf, iou=iou, sample_every=sample_every, max_frames=max_frames,
+        batch_size=batch_size, pipelined=pipelined, roi=roi, infer_size=infer_size,
+        zones=zones,
+    )
+    tracker = VehicleTracker(window_sec=float(window_sec)) if track else None
+    counter = LineCounter(lines, interval_sec=interval_min * 60.0) if lines else None
+    stats = CongestionStats()
+    profiler = StageProfiler()
+    sampler = (
+        SceneChangeSampler(threshold=change_thresh, max_gap=max_gap) if adaptive else None
+    )
+
+    if parallel:
+        def on_progress(done: int, total: int):
+            progress_bar.progress(
+                done / total, text=f"🔍 Segmen selesai {done}/{total}..."
+            )
+
+        with st.spinner(f"🔍 Memproses video dengan {workers} proses..."):
+            out_path, frame_stats = process_video_parallel(
+                model_path, tmp_path, options,
+                workers=int(workers),
+                backend=backend_name(model),
+                write_video=not fast_mode,
+                on_progress=on_progress, profiler=profiler, model=model,
+            )
+        for row in frame_stats:   # segmen paralel: smoothing setelah digabung urut
+            row.update(stats.update(row))
+    else:
+        out_path, frame_stats = _run_streaming(
+            model, tmp_path, options, progress_bar, fast_mode=fast_mode,
+            tracker=tracker, sampler=sampler, counter=counter, motion=motion,
+            stats=stats, profiler=profiler,
         )
 
     elapsed = time.perf_counter() - t0
+    profiler.stop()
     progress_bar.progress(1.0, text="✅ Selesai!")
 
     if not frame_stats:
         st.error("Tidak ada frame yang berhasil diproses.")
         return
 
-    df = pd.DataFrame(frame_stats)
-    elapsed_str = f"{elapsed:.1f}s"
+    run = {
+        "frame_stats":      frame_stats_to_columns(frame_stats),
+        "elapsed":          elapsed,
+        "total_frames":     total_frames,
+        "fps":              fps,
+        "expected_samples": total_frames if adaptive else total_frames // sample_every,
+        "unique": {
+            "counts":     tracker.unique_counts,
+            "windows":    tracker.windows(),
+            "window_sec": window_sec,
+        } if tracker else None,
+        "crossings": {
+            "totals":       counter.totals,
+            "rows":         counter.rows(),
+            "interval_min": interval_min,
+        } if counter else None,
+        "summary": stats.summary(),
+        "profile": profiler.report(),
+    }
+    cache.put_json(cache_key, run)
+    if out_path is not None:
+        cache.put_file(cache_key, out_path, ".mp4")
+    _render_results(run, out_path)
+
+
+def _run_streaming(model, video_path, options, progress_bar, fast_mode, **state):
+    """Run ``iter_video_file`` with live progress, preview and charts."""
+    out_path = None if fast_mode else tempfile.mktemp(suffix=".mp4")
+    frame_stats: list[dict] = []   # hasil akhir file (panjangnya terbatas durasi video)
+    live_rows: deque[dict] = deque(maxlen=LIVE_MAX_ROWS)
+
+    live_box = st.empty()
+    with live_box.container():
+        preview_slot = st.empty()
+        vehicle_slot = st.empty()
+        congestion_slot = st.empty()
+
+    last_refresh = 0.0
+    for update in iter_video_file(model, video_path, options, out_path=out_path, **state):
+        frame_stats.append(update["stat"])
+        live_rows.append(update["stat"])
+        done, total = update["frame_index"] + 1, update["total_frames"]
+        if total > 0:
+            progress_bar.progress(
+                min(done / total, 1.0), text=f"🔍 Memproses frame {done}/{total}..."
+            )
+
+        now = time.perf_counter()
+        if now - last_refresh < LIVE_REFRESH_SEC:
+            continue
+        last_refresh = now
+        preview_slot.image(
+            render_video_preview(update["frame"], update["result"]),
+            caption=f"Frame {update['frame_index']} · {update['stat']['time_sec']}s",
+            channels="BGR", use_container_width=True,
+        )
+        live_df = pd.DataFrame(live_rows)
+        vehicle_slot.plotly_chart(
+            vehicle_timeline(live_df), use_container_width=True,
+            key=f"live_vehicle_{len(frame_stats)}",
+        )
+        congestion_slot.plotly_chart(
+            congestion_timeline(live_df), use_container_width=True,
+            key=f"live_congestion_{len(frame_stats)}",
+        )
+
+    live_box.empty()
+    return out_path, frame_stats
+
+
+def _render_stream(model, conf: float, iou: float):
+    """Continuous analysis of a camera / RTSP / HTTP source, newest frame first."""
+    source = st.text_input(
+        "URL stream atau indeks kamera",
+        placeholder="rtsp://192.168.1.10:554/stream1 · http://.../video.mjpg · 0",
+        help="Sumber apa pun yang bisa dibuka OpenCV. Path file lokal diputar "
+             "sesuai fps aslinya seperti kamera",
+    )
+    with st.expander("⚙️ Pengaturan Stream", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            duration = st.number_input(
+                "Durasi analisis (detik)", min_value=10, max_value=3600, value=60, step=10,
+            )
+        with col2:
+            window_sec = st.selectbox(
+                "Jendela metrik bergulir (detik)", [10, 30, 60, 300], index=2,
+            )
+        col3, col4 = st.columns(2)
+        with col3:
+            track = st.checkbox("Hitung kendaraan unik (tracking)", value=True)
+        with col4:
+            loop = st.checkbox(
+                "Ulangi file saat selesai", value=True,
+                help="Hanya untuk sumber berupa file lokal (uji tanpa kamera)",
+            )
+
+    if not source or not st.button("📡 Mulai Analisis Stream"):
+        return
+
+    tracker = VehicleTracker(window_sec=float(window_sec)) if track else None
+    stats = CongestionStats(window_sec=float(window_sec))   # ringkasan seluruh stream, O(1)
+    frame_stats: deque[dict] = deque(maxlen=LIVE_MAX_ROWS)   # hanya untuk grafik
+    status_box = st.empty()
+    live_box = st.empty()
+    with live_box.container():
+        preview_slot = st.empty()
+        vehicle_slot = st.empty()
+        congestion_slot = st.empty()
+
+    t0 = time.perf_counter()
+    last_refresh = 0.0
+    try:
+        for update in iter_stream(
+            model, source.strip(), conf, iou, window_sec=float(window_sec),
+            max_seconds=float(duration), loop=loop, tracker=tracker, stats=stats,
+        ):
+            frame_stats.append(update["stat"])
+            now = time.perf_counter()
+            if now - last_refresh < LIVE_REFRESH_SEC:
+                continue
+            last_refresh = now
+
+            r = update["rolling"]
+            status_box.markdown(
+                f"<p style='color:#64748b;font-size:0.82rem'>"
+                f"📡 {update['stat']['time_sec']:.0f}/{duration}s · "
+                f"{r['window_sec']:.0f}s terakhir: rata-rata {r['avg_total']} kendaraan · "
+                f"kemacetan {r['avg_congestion']:.0f}/100 ({r['dominant_level']}) · "
+                f"{r['analyzed_fps']} fps dianalisis · latensi {update['latency_ms']:.0f} ms · "
+                f"{update['dropped']} frame dilewati</p>",
+                unsafe_allow_html=True,
+            )
+            preview_slot.image(
+                render_video_preview(update["frame"], update["result"]),
+                caption=f"Frame {update['frame_index']}",
+                channels="BGR", use_container_width=True,
+            )
+            live_df = pd.DataFrame(frame_stats)
+            vehicle_slot.plotly_chart(
+                vehicle_timeline(live_df), use_container_width=True,
+                key=f"stream_vehicle_{stats.samples}",
+            )
+            congestion_slot.plotly_chart(
+                congestion_timeline(live_df), use_container_width=True,
+                key=f"stream_congestion_{stats.samples}",
+            )
+    except IOError as exc:
+        st.error(f"Stream gagal: {exc}")
+    live_box.empty()
+
+    if not frame_stats:
+        st.error("Tidak ada frame yang berhasil diproses.")
+        return
+    elapsed = time.perf_counter() - t0
+    _render_results({
+        "frame_stats":      frame_stats_to_columns(list(frame_stats)),
+        "elapsed":          elapsed,
+        "total_frames":     int(elapsed),   # stream: durasi = detik wall-clock
+        "fps":              1,
+        "expected_samples": stats.samples,
+        "unique": {
+            "counts":     tracker.unique_counts,
+            "windows":    tracker.windows(),
+            "window_sec": window_sec,
+        } if tracker else None,
+        "summary": stats.summary(),
+    }, None)
+
+
+def _render_multicam(model, conf: float, iou: float):
+    """Several live sources sharing this session's model through one scheduler."""
+    text = st.text_area(
+        "Daftar kamera (satu per baris: `nama | sumber | prioritas`)",
+        placeholder="Simpang A | rtsp://192.168.1.10/stream1 | 2\n"
+                    "Simpang B | rtsp://192.168.1.11/stream1 | 1",
+        height=120,
+    )
+    with st.expander("⚙️ Pengaturan Multi-kamera", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            duration = st.number_input(
+                "Durasi analisis (detik)", min_value=10, max_value=3600, value=60, step=10,
+            )
+        with col2:
+            policy = st.selectbox(
+                "Kebijakan jadwal", POLICIES,
+                help="fair: slot dibagi sebanding prioritas · "
+                     "priority: prioritas tertinggi selalu didahulukan",
+            )
+        with col3:
+            slots = st.slider(
+                "Frame per panggilan model", min_value=1, max_value=8, value=1,
+                help="> 1 butuh model ONNX dengan batch dinamis",
+            )
+        col4, col5 = st.columns(2)
+        with col4:
+            track = st.checkbox("Hitung kendaraan unik per kamera", value=True)
+        with col5:
+            loop = st.checkbox("Ulangi file lokal saat selesai", value=True)
+
+    try:
+        cameras = parse_camera_list(text or "", loop=loop)
+    except ValueError:
+        st.error("Prioritas harus berupa angka.")
+        return
+    if not cameras or not st.button("🎛️ Mulai Analisis Multi-kamera"):
+        return
+    for cam in cameras:
+        cam.tracker = VehicleTracker() if track else None
+
+    scheduler = MultiCameraScheduler(
+        model, cameras, conf, iou, slots=slots, policy=policy,
+    )
+    cols = st.columns(min(len(cameras), 3))
+    slots_ui = [cols[i % len(cols)].empty() for i in range(len(cameras))]
+    last_refresh = 0.0
+    for _ in scheduler.run(max_seconds=float(duration)):
+        now = time.perf_counter()
+        if now - last_refresh < LIVE_REFRESH_SEC:
+            continue
+        last_refresh = now
+        for cam, slot in zip(cameras, slots_ui):
+            if cam.last_result is None:
+                continue
+            r = cam.rolling.summary()
+            slot.image(
+                render_video_preview(cam.last_frame, cam.last_result),
+                caption=f"{cam.name} · {r['avg_congestion']:.0f}/100 "
+                        f"({r['dominant_level']}) · {r['analyzed_fps']} fps",
+                channels="BGR", use_container_width=True,
+            )
+
+    st.markdown("#### 📊 Ringkasan per Kamera")
+    summary = []
+    for cam in cameras:
+        r = cam.rolling.summary() if cam.rolling else {"samples": 0}
+        summary.append({
+            "kamera": cam.name, "prioritas": cam.priority, "frame_dianalisis": cam.served,
+            "rata_kendaraan": r.get("avg_total"), "rata_kemacetan": r.get("avg_congestion"),
+            "kondisi": r.get("dominant_level"), "fps": r.get("analyzed_fps"),
+            "kendaraan_unik": cam.tracker.unique_total if cam.tracker else None,
+            "error": cam.error or "",
+        })
+    st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+
+    active = [cam for cam in cameras if cam.frame_stats]
+    if not active:
+        st.error("Tidak ada frame yang berhasil diproses.")
+        return
+    for i, (tab, cam) in enumerate(zip(st.tabs([cam.name for cam in active]), active)):
+        with tab:
+            df = pd.DataFrame(cam.frame_stats)
+            st.plotly_chart(
+                vehicle_timeline(df), use_container_width=True, key=f"cam_vehicle_{i}",
+            )
+            st.plotly_chart(
+                congestion_timeline(df), use_container_width=True,
+                key=f"cam_congestion_{i}",
+            )
+            st.download_button(
+                "📄 Download Data CSV", data=df.to_csv(index=False).encode(),
+                file_name=f"traffic_stats_{cam.name}.csv", mime="text/csv",
+                key=f"cam_csv_{i}",
+            )
+
+
+def _upload_hash(uploaded) -> str:
+    """Content hash of an upload, computed once per uploaded file."""
+    hashes = st.session_state.setdefault("_upload_hashes", {})
+    if uploaded.file_id not in hashes:
+        hashes[uploaded.file_id] = bytes_hash(uploaded.getvalue())
+    return hashes[uploaded.file_id]
+
+
+def _stage_breakdown(profile: dict | None, top: int = 3) -> str:
+    """Short "Inferensi 62% · Decode 18%" line of the slowest stages."""
+    if not profile or not profile["stages"]:
+        return ""
+    stages = sorted(profile["stages"].items(), key=lambda kv: -kv[1]["total_ms"])[:top]
+    return " · ".join(f"{STAGE_LABELS.get(name, name)} {s['share']:.0%}" for name, s in stages)
+
+
+def _render_profile(profile: dict):
+    """Per-stage time table and pipeline counters."""
+    with st.expander("⏱️ Rincian Waktu per Tahap", expanded=False):
+        rows = [
+            {
+                "Tahap":       STAGE_LABELS.get(name, name),
+                "Panggilan":   s["calls"],
+                "Total (ms)":  s["total_ms"],
+                "Rata-rata (ms)": s["mean_ms"],
+                "Maks (ms)":   s["max_ms"],
+                "Porsi":       f"{s['share']:.0%}",
+            }
+            for name, s in profile["stages"].items()
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        counters = profile["counters"]
+        gauges = profile["gauges"]
+        parts = [
+            f"{counters.get('frames_decoded', 0)} frame didekode",
+            f"{counters.get('frames_skipped', 0)} dilewati",
+            f"{counters.get('frames_inferred', 0)} diinferensi "
+            f"({counters.get('batches', 0)} batch)",
+        ]
+        if counters.get("bytes_written"):
+            parts.append(f"{counters['bytes_written'] / 1e6:.1f} MB ditulis")
+        for name, label in (("decode_queue", "antrean decode"), ("encode_queue", "antrean encode")):
+            if name in gauges:
+                parts.append(f"puncak {label} {gauges[name]['max']:.0f}")
+        st.caption(" · ".join(parts) + ". Pada mode pipeline tahap berjalan paralel, "
+                   "sehingga total porsi bisa melebihi 100%.")
+
+
+def _render_results(run: dict, out_path: str | None):
+    df = pd.DataFrame(frame_stats_from_columns(run["frame_stats"]))
+    elapsed_str = f"{run['elapsed']:.1f}s"
+    total_frames, fps = run["total_frames"], run["fps"]
+    unique = run["unique"]
 
     # ── Summary metrics ─────────────────────────────────────────
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("#### 📊 Ringkasan Analisis")
 
-    avg_total = df["total"].mean()
-    max_total = df["total"].max()
-    avg_cong  = df["congestion_index"].mean()
-    max_cong  = df["congestion_index"].max()
-    dominant_level = df["congestion_level"].mode().iloc[0] if not df.empty else "-"
+    summary = run.get("summary")
+    if summary and summary["samples"]:
+        avg_total, max_total = summary["avg_total"], summary["max_total"]
+        avg_cong, max_cong = summary["avg_congestion"], summary["max_congestion"]
+        dominant_level = summary["dominant_level"]
+    else:   # hasil cache lama tanpa ringkasan inkremental
+        avg_total = df["total"].mean()
+        max_total = df["total"].max()
+        avg_cong  = df["congestion_index"].mean()
+        max_cong  = df["congestion_index"].max()
+        dominant_level = df["congestion_level"].mode().iloc[0] if not df.empty else "-"
+
+    percentile_row = ""
+    if summary and summary.get("p90_congestion") is not None:
+        percentile_row = (
+            '<div class="row"><span class="key">Kemacetan P50 · P90 · P95</span>'
+            f'<span class="val">{summary["p50_congestion"]:.0f} · '
+            f'{summary["p90_congestion"]:.0f} · {summary["p95_congestion"]:.0f}</span></div>'
+        )
 
     c1, c2, c3, c4, c5 = st.columns(5)
+    peak_metric = (
+        ("Kendaraan Unik", str(sum(unique["counts"].values())), "#f97316") if unique
+        else ("Puncak Kendaraan", str(max_total), "#f97316")
+    )
     metrics = [
         ("Rata-rata Kendaraan", f"{avg_total:.1f}", "#e2e8f0"),
-        ("Puncak Kendaraan", str(max_total), "#f97316"),
+        peak_metric,
         ("Rata-rata Kemacetan", f"{avg_cong:.0f}/100", "#fbbf24"),
         ("Puncak Kemacetan", f"{max_cong:.0f}/100", "#ef4444"),
-        ("Waktu Proses", elapsed_str, "#34d399"),
+        ("Waktu Proses", elapsed_str, "#34d399", _stage_breakdown(run.get("profile"))),
     ]
-    for col, (label, val, color) in zip([c1,c2,c3,c4,c5], metrics):
+    for col, (label, val, color, *sub) in zip([c1,c2,c3,c4,c5], metrics):
+        sub_html = f'<div class="metric-sub">{sub[0]}</div>' if sub and sub[0] else ""
         with col:
             st.markdown(
                 f"""
                 <div class="metric-card">
                     <div class="metric-label">{label}</div>
                     <div class="metric-value" style="color:{color};font-size:1.6rem">{val}</div>
+                    {sub_html}
                 </div>
                 """,
                 unsafe_allow_html=True,
             )
+    if run.get("profile"):
+        _render_profile(run["profile"])
 
     st.markdown(
         f"""
@@ -141,9 +715,10 @@ def render(model, conf: float, iou: float):
                 <span class="key">Kondisi dominan</span>
                 <span class="val">{dominant_level}</span>
             </div>
+            {percentile_row}
             <div class="row">
                 <span class="key">Frame dianalisis</span>
-                <span class="val">{len(df)} dari ~{total_frames // sample_every}</span>
+                <span class="val">{summary["samples"] if summary else len(df)} dari ~{run['expected_samples']}</span>
             </div>
             <div class="row">
                 <span class="key">Durasi video</span>
@@ -154,6 +729,91 @@ def render(model, conf: float, iou: float):
         unsafe_allow_html=True,
     )
 
+    if unique:
+        u = unique["counts"]
+        st.markdown(
+            f"""
+            <div class="info-panel" style="margin-top:1rem">
+                <div class="row">
+                    <span class="key">Kendaraan unik (Bus · Car · Van)</span>
+                    <span class="val">{u['bus']} · {u['car']} · {u['van']}</span>
+                </div>
+                <div class="row">
+                    <span class="key">Puncak kendaraan per frame</span>
+                    <span class="val">{max_total}</span>
+                </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        with st.expander(f"🚗 Kendaraan Unik per {unique['window_sec']} detik", expanded=False):
+            st.dataframe(
+                pd.DataFrame(unique["windows"]), use_container_width=True, hide_index=True
+            )
+
+    if "speed_kmh" in df.columns:
+        st.markdown(
+            f"""
+            <div class="info-panel" style="margin-top:1rem">
+                <div class="row">
+                    <span class="key">Kecepatan rata-rata</span>
+                    <span class="val">{df['speed_kmh'].mean():.1f} km/jam</span>
+                </div>
+                <div class="row">
+                    <span class="key">Antrean terpanjang</span>
+                    <span class="val">{df['queue_m'].max():.0f} m · {df['queue_vehicles'].max():.0f} kendaraan</span>
+                </div>
+                <div class="row">
+                    <span class="key">Kemacetan (kepadatan saja → gabungan)</span>
+                    <span class="val">{df['density_congestion'].mean():.0f} → {avg_cong:.0f}/100</span>
+                </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        st.line_chart(df.set_index("time_sec")[["speed_kmh", "queue_m"]])
+
+    crossings = run.get("crossings")
+    if crossings:
+        st.markdown(f"#### 🚦 Arus Melintasi Garis (per {crossings['interval_min']} menit)")
+        st.dataframe(
+            pd.DataFrame([
+                {"garis": line, "arah": direction, **per_cls, "total": sum(per_cls.values())}
+                for line, per_dir in crossings["totals"].items()
+                for direction, per_cls in per_dir.items()
+            ]),
+            use_container_width=True, hide_index=True,
+        )
+        flow_df = pd.DataFrame(crossings["rows"])
+        with st.expander("📋 Arus per Interval", expanded=False):
+            st.dataframe(flow_df, use_container_width=True, hide_index=True)
+        st.download_button(
+            "📄 Download Arus per Interval (CSV)",
+            data=flow_df.to_csv(index=False).encode(),
+            file_name="traffic_flow.csv",
+            mime="text/csv",
+        )
+
+    zone_names = [
+        c[len("zone_"):-len("_total")] for c in df.columns
+        if c.startswith("zone_") and c.endswith("_total")
+    ]
+    if zone_names:
+        st.markdown("#### 🛣️ Per Zona")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "zona":                name,
+                    "rata_kendaraan":      round(df[f"zone_{name}_total"].mean(), 2),
+                    "puncak_kendaraan":    int(df[f"zone_{name}_total"].max()),
+                    "rata_kemacetan":      round(df[f"zone_{name}_congestion"].mean(), 1),
+                    "puncak_kemacetan":    df[f"zone_{name}_congestion"].max(),
+                }
+                for name in zone_names
+            ]),
+            use_container_width=True, hide_index=True,
+        )
+
     st.divider()
 
     # ── Timeline charts ─────────────────────────────────────────
@@ -168,14 +828,17 @@ def render(model, conf: float, iou: float):
     dl1, dl2 = st.columns(2)
 
     with dl1:
-        with open(out_path, "rb") as f:
-            st.download_button(
-                "🎬 Download Video Anotasi",
-                data=f.read(),
-                file_name="traffic_annotated.mp4",
-                mime="video/mp4",
-                use_container_width=True,
-            )
+        if out_path is not None:
+            with open(out_path, "rb") as f:
+                st.download_button(
+                    "🎬 Download Video Anotasi",
+                    data=f.read(),
+                    file_name="traffic_annotated.mp4",
+                    mime="video/mp4",
+                    use_container_width=True,
+                )
+        else:
+            st.caption("Video anotasi tidak tersedia (mode cepat atau sudah keluar dari cache).")
 
     with dl2:
         csv_data = df.to_csv(index=False).encode()
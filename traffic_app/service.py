@@ -0,0 +1,172 @@
+"""
+🚦 Traffic Vision — local HTTP inference service.
+Stdlib HTTP server exposing ``analyze_frame`` over JSON, with concurrent
+requests merged into one model call by a micro-batcher.
+
+    python service.py --port 8500 --max-batch 8 --max-wait-ms 10
+    curl --data-binary @jalan.jpg "http://127.0.0.1:8500/analyze?conf=0.4"
+    curl http://127.0.0.1:8500/metrics      # Prometheus
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+MAX_BODY_BYTES = 25 * 1024 * 1024
+
+
+def result_to_json(result: dict, include_detections: bool = False) -> dict:
+    """JSON-safe view of an ``analyze_frame`` result (without the image)."""
+    ratio = dict(result["ratio"])
+    if isinstance(ratio["ratio"], float) and math.isinf(ratio["ratio"]):
+        ratio["ratio"] = None   # JSON tidak punya Infinity
+    out = {
+        "vehicle_counts": result["vehicle_counts"],
+        "density":        result["density"],
+        "ratio":          ratio,
+        "congestion":     result["congestion"],
+    }
+    if include_detections:
+        out["detections"] = [
+            {"class": d["class"], "conf": round(d["conf"], 4),
+             "bbox": [round(float(v), 1) for v in d["bbox"]]}
+            for d in result["detections"].to_dicts()
+        ]
+    return out
+
+
+def batch_limit(model, requested: int) -> int:
+    """
+    Largest batch the loaded model accepts: ultralytics models run one image
+    per call, static-batch ONNX exports are capped at their fixed batch size.
+    """
+    if not hasattr(model, "detect"):
+        return 1
+    fixed = getattr(model, "max_batch", None)
+    return max(1, min(requested, fixed) if fixed else requested)
+
+
+def make_handler(batcher):
+    import cv2
+    import numpy as np
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/health":
+                self._send(200, {
+                    "status": "ok", "batches": batcher.batches, "requests": batcher.requests,
+                })
+            elif path == "/metrics" and batcher.profiler.enabled:
+                self._send_text(200, batcher.profiler.to_prometheus(),
+                                "text/plain; version=0.0.4")
+            elif path == "/metrics.json" and batcher.profiler.enabled:
+                self._send(200, batcher.profiler.report())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/analyze":
+                self._send(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if not 0 < length <= MAX_BODY_BYTES:
+                self._send(413 if length else 400, {"error": "body gambar kosong / terlalu besar"})
+                return
+            body = self.rfile.read(length)
+            image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                self._send(400, {"error": "gambar tidak bisa didekode"})
+                return
+
+            query = parse_qs(url.query)
+            try:
+                conf = float(query.get("conf", ["0.4"])[0])
+                iou = float(query.get("iou", ["0.5"])[0])
+            except ValueError:
+                self._send(400, {"error": "conf/iou harus angka"})
+                return
+            include = query.get("detections", ["0"])[0] in ("1", "true")
+            try:
+                result = batcher.analyze(image, conf, iou)
+            except Exception as exc:
+                self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+                return
+            self._send(200, result_to_json(result, include))
+
+        def _send(self, status: int, payload: dict):
+            self._send_text(status, json.dumps(payload), "application/json")
+
+        def _send_text(self, status: int, text: str, content_type: str):
+            data = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):   # senyapkan log per request
+            pass
+
+    return Handler
+
+
+def serve(batcher, host: str = "127.0.0.1", port: int = 8500) -> ThreadingHTTPServer:
+    """Create the server (not started); call ``serve_forever()`` on it."""
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Layanan HTTP lokal Traffic Vision.")
+    p.add_argument("--model", default=os.path.join(BASE_DIR, "models", "best.onnx"))
+    p.add_argument("--backend", choices=["ultralytics", "onnxruntime"], default="onnxruntime")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8500)
+    p.add_argument("--threads", type=int, default=None, help="Thread inferensi")
+    p.add_argument("--max-batch", type=int, default=8)
+    p.add_argument("--max-wait-ms", type=float, default=10.0)
+    p.add_argument("--no-metrics", action="store_true",
+                   help="Matikan profiler per tahap (GET /metrics)")
+    args = p.parse_args(argv)
+
+    from utils.analyzer import load_model
+    from utils.batching import MicroBatcher
+    from utils.profiling import StageProfiler
+
+    model = load_model(args.model, args.backend, threads=args.threads, warmup_runs=1)
+    info = model.load_info
+    print(f"Model dimuat {info['load_sec']:.2f}s, warm-up {info['warmup_sec']:.2f}s"
+          + (" (graph teroptimasi dari cache)" if info["optimized_cache_hit"] else ""))
+    max_batch = batch_limit(model, args.max_batch)
+    if max_batch != args.max_batch:
+        print(f"--max-batch {args.max_batch} → {max_batch} (batas model)")
+    profiler = None if args.no_metrics else StageProfiler()
+    batcher = MicroBatcher(model, max_batch, args.max_wait_ms, profiler=profiler)
+    server = serve(batcher, args.host, args.port)
+    print(f"Traffic Vision service di http://{args.host}:{args.port} (POST /analyze)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Shared fixtures. The app imports its modules as ``utils.*`` relative to
+``traffic_app/``, so that directory goes on ``sys.path`` first.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeDetector:
+    """
+    Minimal model with the ``OnnxDetector.detect`` interface: one car box
+    per image, an optional per-call delay, and a record of batch sizes.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[int] = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def detect(self, images, conf=0.4, iou=0.5, profiler=None):
+        with self._lock:
+            self.calls.append(len(images))
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            return [
+                (np.array([[10, 10, 50, 40]], np.float32), np.array([0.9], np.float32),
+                 np.array([1], np.int64))
+                for _ in images
+            ]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def fake_detector():
+    return FakeDetector()
+
+
+@pytest.fixture
+def frame():
+    return np.full((120, 160, 3), 114, np.uint8)
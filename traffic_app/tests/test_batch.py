@@ -0,0 +1,47 @@
+import json
+import os
+
+import cv2
+import pytest
+
+import batch
+from bench import build_standin_onnx, make_frame, make_video
+
+pytest.importorskip("onnx")
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRAFFIC_VISION_GRAPH_DIR", str(tmp_path / "graphs"))
+    return build_standin_onnx(str(tmp_path / "best.onnx"), n_detections=2, imgsz=320)
+
+
+def _run(argv) -> dict:
+    assert batch.main(argv) == 0
+    with open(os.path.join(argv[argv.index("--out") + 1], "summary.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_same_name_image_and_video_get_separate_outputs(tmp_path, model_path, workers):
+    media = tmp_path / "media"
+    media.mkdir()
+    cv2.imwrite(str(media / "cam1.jpg"), make_frame(160, 120))
+    make_video(str(media / "cam1.mp4"), 160, 120, 12)
+    out = tmp_path / "out"
+
+    summary = _run([str(media), "--out", str(out), "--model", model_path,
+                    "--sample-every", "3", "--workers", workers])
+    rows = {os.path.basename(r["file"]): r for r in summary["results"]}
+    assert rows["cam1.jpg"]["stats_file"] != rows["cam1.mp4"]["stats_file"]
+    assert rows["cam1.jpg"]["samples"] == 1 and rows["cam1.mp4"]["samples"] == 4
+    assert sorted(os.listdir(out)) == ["cam1.jpg.csv", "cam1.mp4.csv", "summary.csv", "summary.json"]
+
+
+def test_manifest_keeps_folders_apart(tmp_path):
+    files = [str(tmp_path / "a" / "cam.jpg"), str(tmp_path / "b" / "cam.jpg"),
+             str(tmp_path / "a__cam.jpg")]
+    assert batch.output_stems(files, str(tmp_path)) == ["a__cam.jpg", "b__cam.jpg", "a__cam.jpg~2"]
+    outside = batch.output_stems([os.path.abspath(os.sep + os.path.join("x", "cam.jpg"))],
+                                 str(tmp_path))
+    assert outside == ["x__cam.jpg"]
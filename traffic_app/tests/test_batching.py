@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import FakeDetector
+from utils.batching import MicroBatcher
+
+
+def test_concurrent_submits_in_one_window_all_resolve(fake_detector, frame):
+    batcher = MicroBatcher(fake_detector, max_batch=8, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(frame) for _ in range(4)]
+        results = [f.result(timeout=5) for f in futures]
+    finally:
+        batcher.close()
+    assert all(f.done() for f in futures)
+    assert [r["vehicle_counts"]["car"] for r in results] == [1, 1, 1, 1]
+    assert fake_detector.calls == [4]
+    assert batcher.batches == 1 and batcher.requests == 4
+
+
+def test_parallel_analyze_callers_do_not_block(fake_detector, frame):
+    batcher = MicroBatcher(fake_detector, max_batch=4, max_wait_ms=20)
+    try:
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(lambda _: batcher.analyze(frame), range(16)))
+    finally:
+        batcher.close()
+    assert len(results) == 16
+    assert sum(fake_detector.calls) == 16
+    assert max(fake_detector.calls) <= 4
+
+
+def test_cancelled_future_is_skipped(fake_detector, frame):
+    batcher = MicroBatcher(fake_detector, max_batch=8, max_wait_ms=200)
+    try:
+        cancelled = batcher.submit(frame)
+        kept = batcher.submit(frame)
+        assert cancelled.cancel()
+        assert kept.result(timeout=5)["vehicle_counts"]["car"] == 1
+    finally:
+        batcher.close()
+    assert fake_detector.calls == [1]
+    assert batcher.requests == 1
+
+
+def test_groups_by_thresholds(fake_detector, frame):
+    batcher = MicroBatcher(fake_detector, max_batch=8, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(frame, conf=c) for c in (0.3, 0.5, 0.3, 0.5)]
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        batcher.close()
+    assert sorted(fake_detector.calls) == [2, 2]
+
+
+def test_model_error_is_propagated(frame):
+    class Broken:
+        def detect(self, images, conf=0.4, iou=0.5, profiler=None):
+            raise RuntimeError("boom")
+
+    batcher = MicroBatcher(Broken(), max_batch=8, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(frame) for _ in range(3)]
+        for f in futures:
+            assert isinstance(f.exception(timeout=5), RuntimeError)
+    finally:
+        batcher.close()
+
+
+def test_close_fails_queued_requests(frame):
+    slow = FakeDetector(delay=0.3)
+    batcher = MicroBatcher(slow, max_batch=1, max_wait_ms=0)
+    running = batcher.submit(frame)
+    while not slow.calls:            # tunggu sampai permintaan pertama diproses
+        time.sleep(0.01)
+    queued = [batcher.submit(frame) for _ in range(3)]
+    batcher.close()
+    assert running.result(timeout=0)["vehicle_counts"]["car"] == 1
+    for f in queued:
+        exc = f.exception(timeout=0)
+        assert isinstance(exc, RuntimeError) and "closed" in str(exc)
+    with pytest.raises(RuntimeError):
+        batcher.submit(frame)
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from utils.cache import (
+    ResultCache,
+    file_hash,
+    frame_stats_from_columns,
+    frame_stats_to_columns,
+    make_key,
+)
+
+
+def test_arrays_json_and_file_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path / "c"))
+    boxes = np.arange(8, dtype=np.float32).reshape(2, 4)
+    cache.put_arrays("a", boxes=boxes, class_ids=np.array([1, 2]))
+    got = cache.get_arrays("a")
+    np.testing.assert_array_equal(got["boxes"], boxes)
+    assert got["class_ids"].tolist() == [1, 2]
+
+    cache.put_json("j", {"total": np.int64(3), "ratio": np.float32(0.5), "ids": np.array([4])})
+    assert cache.get_json("j") == {"total": 3, "ratio": 0.5, "ids": [4]}
+
+    src = tmp_path / "out.mp4"
+    src.write_bytes(b"video")
+    path = cache.put_file("v", str(src), ".mp4")
+    assert cache.get_file("v", ".mp4") == path
+    assert open(path, "rb").read() == b"video"
+
+
+def test_misses_return_none(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get_arrays("x") is None
+    assert cache.get_json("x") is None
+    assert cache.get_file("x", ".mp4") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10**9)
+    blob = os.urandom(4000)   # tidak terkompresi: ukuran file tetap ~4 kB
+    for i, key in enumerate(["old", "mid", "new"]):
+        src = tmp_path / f"{key}.bin"
+        src.write_bytes(blob)
+        path = cache.put_file(key, str(src), ".bin")
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get_file("old", ".bin")            # dibaca → paling baru dipakai
+    cache.max_bytes = 9000
+    cache.evict()
+    assert cache.get_file("mid", ".bin") is None
+    assert cache.get_file("old", ".bin") is not None
+    assert cache.get_file("new", ".bin") is not None
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+
+def test_keys_depend_on_every_parameter():
+    base = make_key("content", "model", conf=0.4, iou=0.5)
+    assert base == make_key("content", "model", iou=0.5, conf=0.4)
+    assert base != make_key("content", "model", conf=0.45, iou=0.5)
+    assert base != make_key("content", "other", conf=0.4, iou=0.5)
+
+
+def test_file_hash_follows_content(tmp_path):
+    path = tmp_path / "m.onnx"
+    path.write_bytes(b"a")
+    first = file_hash(str(path))
+    path.write_bytes(b"bb")
+    assert file_hash(str(path)) != first
+
+
+def test_frame_stats_columns_round_trip():
+    rows = [{"frame": 0, "total": 2}, {"frame": 3, "total": 1}]
+    assert frame_stats_from_columns(frame_stats_to_columns(rows)) == rows
+    assert frame_stats_from_columns(frame_stats_to_columns([])) == []
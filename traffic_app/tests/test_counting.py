@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from utils.analyzer import Detections
+from utils.counting import CountLine, LineCounter, parse_lines
+
+W = H = 1000
+LINE = CountLine("A", (0.0, 0.5), (1.0, 0.5))   # horizontal, digambar kiri → kanan
+
+
+def car_at(y: float, x: float = 300.0, cls: int = 1) -> Detections:
+    return Detections.from_arrays(np.array([[x - 20, y - 10, x + 20, y + 10]]), [0.9], [cls])
+
+
+def run(counter: LineCounter, ys, track_id: int = 7, dt: float = 0.5) -> list[dict]:
+    events = []
+    for k, y in enumerate(ys):
+        events += counter.update(car_at(y), np.array([track_id]), k * dt, W, H)
+    return events
+
+
+@pytest.mark.parametrize("offset", [0.0, 0.5])
+def test_centroid_exactly_on_line_is_counted_once(offset):
+    counter = LineCounter([LINE])
+    events = run(counter, [490 + offset, 500 + offset, 510 + offset])
+    assert len(events) == 1
+    assert events[0]["direction"] == "forward"      # bergerak ke bawah layar
+    assert counter.totals["A"]["forward"]["car"] == 1
+
+
+def test_direction_and_class():
+    counter = LineCounter([LINE])
+    events = run(counter, [520, 480])
+    assert [(e["direction"], e["class"]) for e in events] == [("backward", "car")]
+    assert counter.total == 1
+
+
+def test_touching_line_and_returning_is_not_counted():
+    counter = LineCounter([LINE])
+    assert run(counter, [480, 490, 485]) == []
+    assert run(counter, [520, 500, 520], track_id=8) == []
+
+
+def test_new_track_and_miss_beyond_segment_are_not_counted():
+    counter = LineCounter([CountLine("short", (0.0, 0.5), (0.2, 0.5))])
+    assert run(counter, [480, 520]) == []           # x=300 di luar segmen 0–200
+    counter = LineCounter([LINE])
+    assert counter.update(car_at(520), np.array([3]), 0.0, W, H) == []
+
+
+def test_untracked_detections_are_ignored():
+    counter = LineCounter([LINE])
+    for k, y in enumerate([480, 520]):
+        counter.update(car_at(y), np.array([-1]), k * 0.5, W, H)
+    assert counter.total == 0
+
+
+def test_intervals_and_stale_tracks():
+    counter = LineCounter([LINE], interval_sec=10.0, max_age_sec=2.0)
+    run(counter, [480, 520], dt=1.0)                            # t = 0, 1
+    counter.update(car_at(520, x=600), np.array([9]), 25.0, W, H)
+    assert 7 not in counter._prev                               # kedaluwarsa
+    rows = [r for r in counter.rows() if r["direction"] == "forward"]
+    assert [(r["interval_start"], r["total"]) for r in rows] == [(0.0, 1), (10.0, 0), (20.0, 0)]
+
+
+def test_parse_lines():
+    lines = parse_lines("# komentar\nStop A: 10,60 90,60\n: 0,0 100,100")
+    assert lines[0] == CountLine("Stop A", (0.1, 0.6), (0.9, 0.6))
+    assert lines[1].name == "Garis 2"
+    with pytest.raises(ValueError):
+        parse_lines("X: 10,10")
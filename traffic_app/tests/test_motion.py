@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from utils.motion import MotionEstimator, parse_calibration
+
+W = H = 1000
+# Bidang jalan 20 m × 40 m memenuhi seluruh frame: 1 px = 0,02 m (x) / 0,04 m (y)
+CALIBRATION = """
+# gambar (%) -> jalan (m)
+0,0 -> 0,0
+100,0 -> 20,0
+100,100 -> 20,40
+0,100 -> 0,40
+"""
+
+
+def tracks(feet_y, vel_y, x: float = 500.0) -> dict[str, np.ndarray]:
+    """Tracks whose bottom-centre sits at ``(x, y)`` moving down at ``vel_y`` px/s."""
+    feet_y = np.asarray(feet_y, dtype=np.float64)
+    n = len(feet_y)
+    boxes = np.stack([np.full(n, x - 20), feet_y - 30, np.full(n, x + 20), feet_y], axis=1)
+    velocity = np.zeros((n, 4))
+    velocity[:, 1] = vel_y
+    return {"ids": np.arange(n), "boxes": boxes, "velocity": velocity}
+
+
+@pytest.fixture
+def estimator():
+    return MotionEstimator(*parse_calibration(CALIBRATION))
+
+
+def test_parse_calibration_reads_percent_and_metres():
+    image_pts, world_pts = parse_calibration(CALIBRATION)
+    assert image_pts == [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+    assert world_pts == [(0, 0), (20, 0), (20, 40), (0, 40)]
+    with pytest.raises(ValueError):
+        parse_calibration("10,10 0,0")
+
+
+def test_homography_speed_from_known_displacement(estimator):
+    # 250 px/s ke bawah = 10 m/s di bidang jalan = 36 km/h
+    motion = estimator.update(tracks([400.0], vel_y=250.0), W, H, density_index=0.0)
+    assert motion["speeds_kmh"][0] == pytest.approx(36.0)
+    assert motion["mean_speed_kmh"] == 36.0
+    assert motion["stopped"] == 0
+    assert motion["queue_vehicles"] == 0
+
+
+def test_queue_chain_joins_stopped_vehicles_within_gap(estimator):
+    # Berhenti di 0, 6 dan 12 m (rantai, jarak ≤ 10 m) dan 30 m (sendiri);
+    # kendaraan di 18 m bergerak sehingga tidak menyambung rantai.
+    metres = np.array([0.0, 6.0, 12.0, 30.0, 18.0])
+    vel_y = np.array([0.0, 0.0, 0.0, 0.0, 250.0])
+    motion = estimator.update(tracks(metres * 25, vel_y=vel_y), W, H, density_index=50.0)
+    assert motion["stopped"] == 4
+    assert motion["queue_vehicles"] == 3
+    assert motion["queue_length_m"] == pytest.approx(12.0)
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from bench import build_standin_onnx  # noqa: E402
+from utils import onnx_backend  # noqa: E402
+from utils.onnx_backend import OnnxDetector  # noqa: E402
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(onnx_backend, "GRAPH_CACHE_DIR", str(tmp_path / "graphs"))
+    return build_standin_onnx(str(tmp_path / "best.onnx"), n_detections=3, imgsz=320)
+
+
+def test_optimized_graph_is_cached_next_to_model(model_path, frame):
+    first = OnnxDetector(model_path)
+    assert not first.optimized_cache_hit
+    assert os.path.dirname(first.optimized_path) == os.path.dirname(model_path)
+    assert os.path.exists(first.optimized_path)
+
+    second = OnnxDetector(model_path)
+    assert second.optimized_cache_hit
+    assert second.optimized_path == first.optimized_path
+    a, b = first.detect([frame])[0], second.detect([frame])[0]
+    np.testing.assert_allclose(a[0], b[0])
+    assert len(a[2]) == 3
+
+
+def test_read_only_model_dir_falls_back_to_graph_cache_dir(model_path, monkeypatch):
+    model_dir = os.path.dirname(model_path)
+    real_access = os.access
+    monkeypatch.setattr(
+        onnx_backend.os, "access",
+        lambda path, mode: False if path == model_dir else real_access(path, mode),
+    )
+    det = OnnxDetector(model_path)
+    assert det.optimized_path.startswith(onnx_backend.GRAPH_CACHE_DIR)
+    assert os.path.exists(det.optimized_path)
+    assert OnnxDetector(model_path).optimized_cache_hit
+
+
+def test_corrupt_cached_graph_is_rebuilt(model_path):
+    path = OnnxDetector(model_path).optimized_path
+    with open(path, "wb") as f:
+        f.write(b"not a model")
+    det = OnnxDetector(model_path)
+    assert not det.optimized_cache_hit
+    assert det.session is not None
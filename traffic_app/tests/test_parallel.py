@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import cv2
+import pytest
+
+from bench import make_video
+from utils import parallel
+from utils.analyzer import VideoOptions
+from utils.parallel import process_video_parallel, reliable_frame_count, split_segments
+
+
+class FakeCapture:
+    """``CAP_PROP_FRAME_COUNT`` of ``reported`` over a stream of ``actual`` frames."""
+
+    def __init__(self, reported: int, actual: int):
+        self.reported, self.actual, self.pos = reported, actual, 0
+
+    def get(self, prop):
+        return self.reported
+
+    def set(self, prop, value):
+        self.pos = int(value)
+
+    def grab(self):
+        self.pos += 1
+        return self.pos <= self.actual
+
+
+@pytest.mark.parametrize("reported, actual, expected", [
+    (90, 90, 90),
+    (0, 90, None),        # container tanpa jumlah frame
+    (120, 90, None),      # estimasi terlalu besar
+    (60, 90, None),       # estimasi terlalu kecil → ekor video hilang
+])
+def test_reliable_frame_count(reported, actual, expected):
+    assert reliable_frame_count(FakeCapture(reported, actual)) == expected
+
+
+def test_reliable_frame_count_on_real_video(tmp_path):
+    path = make_video(str(tmp_path / "v.mp4"), 160, 120, 30)
+    cap = cv2.VideoCapture(path)
+    try:
+        assert reliable_frame_count(cap) == 30
+    finally:
+        cap.release()
+
+
+def test_split_segments_are_aligned():
+    assert split_segments(100, 3, 3) == [(0, 36), (36, 72), (72, 100)]
+    assert split_segments(0, 4) == []
+
+
+def test_unreliable_count_falls_back_to_sequential(tmp_path, monkeypatch, fake_detector):
+    path = make_video(str(tmp_path / "v.mp4"), 160, 120, 30)
+    monkeypatch.setattr(parallel, "reliable_frame_count", lambda cap: None)
+    progress = []
+    out_path, frame_stats = process_video_parallel(
+        "unused.onnx", path, VideoOptions(sample_every=3), workers=4, write_video=False,
+        on_progress=lambda done, total: progress.append((done, total)), model=fake_detector,
+    )
+    assert out_path is None
+    assert [row["frame"] for row in frame_stats] == list(range(0, 30, 3))
+    assert progress == [(1, 1)]
+
+
+def test_parallel_run_removes_segment_files(tmp_path, monkeypatch):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from bench import build_standin_onnx
+
+    monkeypatch.setenv("TMPDIR", str(tmp_path / "tmp"))
+    monkeypatch.setenv("TRAFFIC_VISION_GRAPH_DIR", str(tmp_path / "graphs"))
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    os.makedirs(tmp_path / "tmp")
+    model_path = build_standin_onnx(str(tmp_path / "best.onnx"), n_detections=2, imgsz=320)
+    video = make_video(str(tmp_path / "v.mp4"), 160, 120, 24)
+
+    out_path, frame_stats = process_video_parallel(
+        model_path, video, VideoOptions(sample_every=2), workers=2, backend="onnxruntime",
+        threads_per_worker=1,
+    )
+    assert [row["frame"] for row in frame_stats] == list(range(0, 24, 2))
+    videos = [name for name in os.listdir(tmp_path / "tmp") if name.endswith(".mp4")]
+    assert videos == [os.path.basename(out_path)]
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from utils.profiling import NULL_PROFILER, StageProfiler, to_prometheus
+
+
+def filled() -> StageProfiler:
+    prof = StageProfiler()
+    prof.add_time("custom", 0.010)
+    prof.add_time("inference", 0.030)
+    prof.add_time("inference", 0.010)
+    prof.add_time("decode", 0.004, calls=4)
+    prof.incr("frames_decoded", 4)
+    prof.gauge("decode_queue", 3)
+    prof.gauge("decode_queue", 1)
+    return prof
+
+
+def test_report_orders_stages_and_aggregates():
+    report = filled().report()
+    assert list(report["stages"]) == ["decode", "inference", "custom"]   # urutan pipeline, lalu lainnya
+    inf = report["stages"]["inference"]
+    assert inf["calls"] == 2
+    assert inf["total_ms"] == pytest.approx(40.0)
+    assert inf["mean_ms"] == pytest.approx(20.0)
+    assert inf["max_ms"] == pytest.approx(30.0)
+    assert report["stages"]["decode"]["max_ms"] == pytest.approx(1.0)    # per panggilan
+    assert report["counters"] == {"frames_decoded": 4}
+    assert report["gauges"] == {"decode_queue": {"last": 1, "max": 3}}
+
+
+def test_stage_context_and_stop_freeze_wall():
+    prof = StageProfiler()
+    with prof.stage("overlay"):
+        time.sleep(0.01)
+    prof.stop()
+    first = prof.report()
+    time.sleep(0.01)
+    assert prof.report()["wall_sec"] == first["wall_sec"]
+    assert first["stages"]["overlay"]["total_ms"] >= 10
+
+
+def test_merge_adds_worker_reports():
+    total = filled()
+    worker = StageProfiler()
+    worker.add_time("inference", 0.050)
+    worker.incr("frames_decoded", 6)
+    worker.gauge("decode_queue", 5)
+    total.merge(worker.report())
+    report = total.report()
+    inf = report["stages"]["inference"]
+    assert inf["calls"] == 3
+    assert inf["total_ms"] == pytest.approx(90.0)
+    assert inf["max_ms"] == pytest.approx(50.0)
+    assert report["counters"]["frames_decoded"] == 10
+    assert report["gauges"]["decode_queue"] == {"last": 5, "max": 5}
+
+
+def test_prometheus_exposition(tmp_path):
+    prof = filled()
+    text = prof.to_prometheus(prefix="tv")
+    assert 'tv_stage_seconds_total{stage="inference"} 0.040000' in text
+    assert 'tv_stage_calls_total{stage="decode"} 4' in text
+    assert "# TYPE tv_frames_decoded_total counter\ntv_frames_decoded_total 4" in text
+    assert "tv_decode_queue 1\n" in text and "tv_decode_queue_max 3\n" in text
+    assert text.endswith("\n")
+    assert to_prometheus(prof.report(), "tv").split("tv_uptime")[0] == text.split("tv_uptime")[0]
+
+    path = tmp_path / "metrics.prom"
+    prof.write_prometheus(str(path))
+    assert path.read_text().startswith("# HELP traffic_vision_stage_seconds_total")
+    assert [p.name for p in tmp_path.iterdir()] == ["metrics.prom"]
+
+
+def test_null_profiler_records_nothing():
+    with NULL_PROFILER.stage("decode"):
+        pass
+    NULL_PROFILER.incr("frames_decoded")
+    NULL_PROFILER.gauge("decode_queue", 1)
+    assert not NULL_PROFILER.enabled
@@ -0,0 +1,44 @@
+import numpy as np
+
+from utils.sampling import FixedSampler, SceneChangeSampler
+
+
+def run(sampler, frames) -> list[int]:
+    """Frame indices the sampler picks, skipping pixels like the decode loop does."""
+    picked = []
+    for fc, frame in enumerate(frames):
+        if sampler.needs_pixels(fc) and sampler.should_sample(fc, frame):
+            picked.append(fc)
+    return picked
+
+
+def static(n: int) -> list[np.ndarray]:
+    return [np.full((120, 160, 3), 100, np.uint8)] * n
+
+
+def changing(n: int) -> list[np.ndarray]:
+    # Kecerahan naik 20 per frame — tiap pasangan frame berbeda jauh
+    return [np.full((120, 160, 3), 20 * k % 256, np.uint8) for k in range(n)]
+
+
+def test_fixed_sampler_stride():
+    assert run(FixedSampler(3), static(10)) == [0, 3, 6, 9]
+
+
+def test_static_scene_is_forced_every_max_gap():
+    sampler = SceneChangeSampler(min_gap=1, max_gap=10)
+    assert run(sampler, static(35)) == [0, 10, 20, 30]
+    assert sampler.frames_sampled == 4
+
+
+def test_changing_scene_respects_min_gap():
+    sampler = SceneChangeSampler(min_gap=4, max_gap=30)
+    picked = run(sampler, changing(20))
+    assert picked == [0, 4, 8, 12, 16]
+    assert not sampler.needs_pixels(17)
+
+
+def test_change_after_quiet_period_is_sampled_immediately():
+    frames = static(6) + [np.full((120, 160, 3), 220, np.uint8)] * 6
+    sampler = SceneChangeSampler(min_gap=2, max_gap=30)
+    assert run(sampler, frames) == [0, 6]
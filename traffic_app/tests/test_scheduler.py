@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils import scheduler
+from utils.scheduler import Camera, MultiCameraScheduler, parse_camera_list
+
+
+class EndlessReader:
+    """Camera that always has a fresh frame, optionally only ``frames`` of them."""
+
+    def __init__(self, source, loop=False, frames=None):
+        self.source, self.index, self.frames = source, -1, frames
+        self.ended, self.error = False, None
+
+    def read(self, timeout=None):
+        if self.frames is not None and self.index + 1 >= self.frames:
+            self.ended = True
+            return None
+        self.index += 1
+        return self.index, np.full((120, 160, 3), 114, np.uint8), time.perf_counter()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def endless(monkeypatch):
+    monkeypatch.setattr(scheduler, "LatestFrameReader", EndlessReader)
+
+
+def _run_rounds(sched: MultiCameraScheduler, rounds: int) -> None:
+    sched._open()
+    t0 = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            sched.step(t0)
+    finally:
+        sched.close()
+
+
+def test_fair_share_follows_priority_ratio(endless, fake_detector):
+    cams = [Camera("A", "a", priority=2.0), Camera("B", "b", priority=1.0)]
+    _run_rounds(MultiCameraScheduler(fake_detector, cams, slots=1, policy="fair"), 300)
+    assert cams[0].served + cams[1].served == 300
+    assert cams[0].served / cams[1].served == pytest.approx(2.0, rel=0.05)
+
+
+def test_strict_priority_always_serves_highest(endless, fake_detector):
+    cams = [Camera("low", "a", priority=1.0), Camera("high", "b", priority=5.0),
+            Camera("mid", "c", priority=2.0)]
+    _run_rounds(MultiCameraScheduler(fake_detector, cams, slots=2, policy="priority"), 50)
+    assert [c.served for c in cams] == [0, 50, 50]
+
+
+def test_timelines_are_kept_per_camera(endless, fake_detector):
+    cams = [Camera("A", "a"), Camera("B", "b")]
+    _run_rounds(MultiCameraScheduler(fake_detector, cams, slots=2), 10)
+    for cam in cams:
+        assert [row["frame"] for row in cam.frame_stats] == list(range(10))
+        assert cam.rolling.summary()["samples"] == 10
+    assert fake_detector.calls == [2] * 10
+
+
+def test_unopenable_camera_finishes_with_error(monkeypatch, fake_detector):
+    real_reader = scheduler.LatestFrameReader
+
+    def reader(source, loop=False):
+        if source == "ok":
+            return EndlessReader(source, frames=5)
+        return real_reader(source, loop=loop)
+
+    monkeypatch.setattr(scheduler, "LatestFrameReader", reader)
+    cams = [Camera("rusak", "/tidak/ada.mp4"), Camera("ok", "ok")]
+    t0 = time.perf_counter()
+    rounds = list(MultiCameraScheduler(fake_detector, cams).run(max_seconds=10))
+    assert time.perf_counter() - t0 < 5               # selesai sendiri, tidak menunggu
+    assert cams[0].finished and "tidak bisa dibuka" in cams[0].error
+    assert cams[1].finished and cams[1].served == 5
+    assert len(rounds) == 5
+
+
+def test_parse_camera_list():
+    cams = parse_camera_list("# x\nrtsp://a\nSimpang B | rtsp://b | 2\n", loop=True)
+    assert [(c.name, c.source, c.priority, c.loop) for c in cams] == [
+        ("Kamera 1", "rtsp://a", 1.0, True), ("Simpang B", "rtsp://b", 2.0, True),
+    ]
+    with pytest.raises(ValueError):
+        MultiCameraScheduler(None, cams, policy="random")
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from utils import session_pool
+from utils.analyzer import analyze_frame
+from utils.profiling import StageProfiler
+from utils.session_pool import SessionPool
+
+from conftest import FakeDetector
+
+
+class _Calls(list):
+    load = None
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Replace ``load_model`` with fake detectors and record the load calls."""
+    calls = _Calls()
+
+    def fake_load(model_path, backend, threads=None, inter_op_threads=None, warmup_runs=0):
+        calls.append({"backend": backend, "threads": threads, "inter": inter_op_threads})
+        model = FakeDetector(delay=0.05)
+        model.load_info = {"backend": backend, "load_sec": 0.1, "warmup_sec": 0.2,
+                           "optimized_cache_hit": False}
+        return model
+
+    monkeypatch.setattr(session_pool, "load_model", fake_load)
+    calls.load = fake_load
+    return calls
+
+
+def test_sessions_get_explicit_thread_budget(loaded, monkeypatch):
+    monkeypatch.setattr(session_pool.os, "cpu_count", lambda: 8)
+    pool = SessionPool("m.onnx", "onnxruntime", size=4, inter_op_threads=1)
+    assert [c["threads"] for c in loaded] == [2, 2, 2, 2]
+    assert all(c["inter"] == 1 for c in loaded)
+    assert pool.load_info["sessions"] == 4
+    assert pool.load_info["load_sec"] == pytest.approx(0.4)
+
+
+def test_concurrency_is_bounded_and_waits_are_measured(loaded, frame):
+    pool = SessionPool("m.onnx", "onnxruntime", size=2)
+    profiler = StageProfiler()
+    threads = [
+        threading.Thread(target=analyze_frame, args=(pool, frame),
+                         kwargs={"annotate": False, "profiler": profiler})
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(m.peak_active for m in pool._models) == 1
+    assert sum(len(m.calls) for m in pool._models) == 6
+    stats = pool.stats()
+    assert stats["calls"] == 6 and stats["in_use"] == 0 and stats["waiting"] == 0
+    assert stats["peak_waiting"] >= 3
+    assert stats["max_wait_ms"] >= 40            # menunggu ≥ satu panggilan 50 ms
+    report = profiler.report()
+    assert report["stages"]["queue_wait"]["calls"] == 6
+
+
+def test_acquire_timeout(loaded):
+    pool = SessionPool("m.onnx", "onnxruntime", size=1, timeout=0.05)
+    with pool.session():
+        with pytest.raises(TimeoutError):
+            with pool.session():
+                pass
+    with pool.session():   # sesi dikembalikan setelah timeout
+        assert pool.in_use == 1
+    assert pool.in_use == 0
+
+
+def test_ultralytics_uses_one_model(loaded):
+    pool = SessionPool("m.pt", "ultralytics", size=3)
+    assert pool.size == 1
+    assert len(loaded) == 1
+    assert pool.backend == "ultralytics"
+
+
+def test_onnx_pool_end_to_end(tmp_path, monkeypatch, frame):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from bench import build_standin_onnx
+    from utils import onnx_backend
+
+    monkeypatch.setattr(onnx_backend, "GRAPH_CACHE_DIR", str(tmp_path / "graphs"))
+    path = build_standin_onnx(str(tmp_path / "best.onnx"), n_detections=2, imgsz=320)
+    pool = SessionPool(path, "onnxruntime", size=2, intra_op_threads=1, warmup_runs=0)
+    result = analyze_frame(pool, frame, annotate=False)
+    assert result["vehicle_counts"]["total"] == 2
+    assert pool.stats()["intra_op_threads"] == 1
+
+
+def test_pool_settings_come_from_environment(loaded, monkeypatch):
+    import importlib
+
+    monkeypatch.setenv("TRAFFIC_VISION_POOL_SIZE", "3")
+    monkeypatch.setenv("TRAFFIC_VISION_INTRA_OP_THREADS", "2")
+    monkeypatch.setenv("TRAFFIC_VISION_INTER_OP_THREADS", "1")
+    try:
+        importlib.reload(session_pool)
+        monkeypatch.setattr(session_pool, "load_model", loaded.load)
+        pool = session_pool.SessionPool("m.onnx", "onnxruntime")
+        assert (pool.size, pool.intra_op_threads, pool.inter_op_threads) == (3, 2, 1)
+    finally:
+        monkeypatch.delenv("TRAFFIC_VISION_POOL_SIZE")
+        monkeypatch.delenv("TRAFFIC_VISION_INTRA_OP_THREADS")
+        monkeypatch.delenv("TRAFFIC_VISION_INTER_OP_THREADS")
+        importlib.reload(session_pool)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils.stats import LEVELS, CongestionStats, Ema, LevelHysteresis, P2Quantile, RollingWindow
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.95])
+@pytest.mark.parametrize("dist", ["uniform", "normal", "exponential"])
+def test_p2_quantile_tracks_numpy(p, dist):
+    rng = np.random.default_rng(0)
+    data = {
+        "uniform":     lambda: rng.uniform(0, 100, 5000),
+        "normal":      lambda: rng.normal(50, 10, 5000),
+        "exponential": lambda: rng.exponential(20, 5000),
+    }[dist]()
+    est = P2Quantile(p)
+    for x in data:
+        est.update(float(x))
+    spread = np.percentile(data, 99) - np.percentile(data, 1)
+    assert est.value == pytest.approx(np.percentile(data, p * 100), abs=0.03 * spread)
+
+
+def test_p2_quantile_small_samples():
+    est = P2Quantile(0.5)
+    assert est.value is None
+    for x in (5.0, 1.0, 3.0):
+        est.update(x)
+    assert est.value == 3.0
+
+
+def test_rolling_window_drops_old_samples():
+    win = RollingWindow(10.0)
+    for t, x in [(0, 90), (5, 10), (12, 20)]:
+        win.update(t, x)
+    assert win.mean == pytest.approx(15.0)
+    assert win.max == 20
+
+
+def test_ema():
+    ema = Ema(0.5)
+    assert ema.update(10) == 10
+    assert ema.update(20) == 15
+
+
+def test_hysteresis_does_not_flicker_at_boundary():
+    hyst = LevelHysteresis(margin=5.0)
+    levels = [hyst.update(x) for x in (58, 61, 59, 62, 64, 66, 58, 56, 54)]
+    assert len(set(levels[:5])) == 1
+    assert levels[5] == LEVELS[3]            # 66 ≥ 60 + 5
+    assert levels[-1] == LEVELS[2]           # 54 < 60 − 5
+
+
+def test_congestion_stats_summary():
+    stats = CongestionStats(window_sec=10.0)
+    rows = [
+        {"time_sec": t, "total": t % 4, "congestion_index": float(ci),
+         "congestion_level": LEVELS[min(4, int(ci // 20))]}
+        for t, ci in enumerate([10, 30, 50, 70, 90, 10])
+    ]
+    for row in rows:
+        extra = stats.update(row)
+    assert set(extra) == {"congestion_smooth", "congestion_level_smooth"}
+    summary = stats.summary()
+    assert summary["samples"] == 6
+    assert summary["max_congestion"] == 90.0
+    assert summary["avg_congestion"] == pytest.approx(43.3, abs=0.1)
+    assert sum(summary["level_histogram"].values()) == 6
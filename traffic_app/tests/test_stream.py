@@ -0,0 +1,79 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils import stream
+from utils.stream import LatestFrameReader, iter_stream
+
+
+class FlakyCapture:
+    """Camera that delivers ``frames`` frames, then drops the connection."""
+
+    def __init__(self, frames: int, opened: bool = True):
+        self.frames, self.opened = frames, opened
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        return 0.0
+
+    def set(self, prop, value):
+        pass
+
+    def read(self):
+        if self.frames <= 0:
+            return False, None
+        self.frames -= 1
+        time.sleep(0.01)
+        return True, np.full((120, 160, 3), 114, np.uint8)
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    """``rtsp://cam`` that works, drops out for ~0.4 s (failed reopens), then recovers."""
+    captures = iter([FlakyCapture(3), FlakyCapture(0, opened=False), FlakyCapture(0, opened=False),
+                     FlakyCapture(3)] + [FlakyCapture(0, opened=False)] * 1000)
+    monkeypatch.setattr(stream, "open_source", lambda source: next(captures))
+    monkeypatch.setattr(stream, "RECONNECT_DELAY_SEC", 0.15)
+    monkeypatch.setattr(LatestFrameReader.read, "__defaults__", (0.05,))
+    return "rtsp://cam"
+
+
+def test_outage_is_reconnecting_not_ended(camera):
+    with LatestFrameReader(camera) as reader:
+        got = []
+        deadline = time.monotonic() + 3
+        saw_outage = False
+        while len(got) < 6 and time.monotonic() < deadline:
+            item = reader.read()
+            if item is None:
+                assert not reader.ended
+                saw_outage |= reader.reconnecting
+                continue
+            got.append(item[0])
+        assert saw_outage
+        assert got[-1] == 5
+
+
+def test_iter_stream_survives_outage(camera, fake_detector):
+    stop = threading.Event()
+    indices = []
+    for update in iter_stream(fake_detector, camera, max_seconds=3, stop_event=stop):
+        indices.append(update["frame_index"])
+        if update["frame_index"] == 5:
+            stop.set()
+    assert indices[-1] == 5
+
+
+def test_file_source_end_stops_iteration(tmp_path, fake_detector):
+    from bench import make_video
+
+    path = make_video(str(tmp_path / "v.mp4"), 160, 120, 10, fps=100)
+    updates = list(iter_stream(fake_detector, path, max_seconds=5))
+    assert 0 < len(updates) <= 10
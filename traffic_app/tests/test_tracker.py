@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from utils.analyzer import Detections
+from utils.tracker import VehicleTracker
+
+
+def cars(xs, y=200.0) -> Detections:
+    boxes = [[x - 30, y - 20, x + 30, y + 20] for x in xs]
+    return Detections.from_arrays(np.array(boxes).reshape(-1, 4), [0.9] * len(xs), [1] * len(xs))
+
+
+@pytest.mark.parametrize("gap", [0.2, 2.0, 4.8])
+def test_sparse_sampling_still_confirms_tracks(gap):
+    tracker = VehicleTracker()
+    for k in range(4):
+        tracker.update(cars([100 + 5 * k, 500 + 5 * k]), k * gap)
+    assert tracker.unique_counts["car"] == 2
+
+
+def test_track_survives_missed_samples_then_expires():
+    tracker = VehicleTracker(max_age_sec=1.0, max_missed=2)
+    for k in range(3):
+        tracker.update(cars([100]), k * 3.0)
+    first = tracker.update(cars([100]), 9.0)[0]
+    tracker.update(cars([]), 12.0)
+    tracker.update(cars([]), 15.0)
+    assert tracker.update(cars([100]), 18.0)[0] == first     # 2 sampel terlewat
+    for t in (21.0, 24.0, 27.0):
+        tracker.update(cars([]), t)
+    assert tracker.update(cars([100]), 30.0)[0] != first     # 3 terlewat → track baru
+    assert tracker.max_age == pytest.approx(7.5)
+
+
+def test_dense_sampling_keeps_max_age_sec():
+    tracker = VehicleTracker(max_age_sec=1.0)
+    first = tracker.update(cars([100]), 0.0)[0]
+    for k in range(1, 15):
+        tracker.update(cars([]), k * 0.1)
+    assert tracker.max_age == pytest.approx(1.0)
+    assert tracker.update(cars([100]), 1.5)[0] != first
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from bench import build_standin_onnx, make_video
+from utils.analyzer import VideoOptions, process_video_file
+
+MODES = [
+    {"pipelined": True},
+    {"batch_size": 4},
+    {"pipelined": True, "batch_size": 3},
+]
+
+
+class BlockDetector:
+    """One box per 16 px of the moving block's x position, so results differ per frame."""
+
+    def detect(self, images, conf=0.4, iou=0.5, profiler=None):
+        out = []
+        for img in images:
+            red = img[:, :, 2].astype(int) - img[:, :, 0]
+            x = int(np.argmax(red.max(axis=0)))
+            n = x // 16 % 4 + 1
+            boxes = np.array([[10 + 30 * i, 10, 35 + 30 * i, 30] for i in range(n)], np.float32)
+            out.append((boxes, np.full(n, 0.9, np.float32), np.ones(n, np.int64)))
+        return out
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    return make_video(str(tmp_path_factory.mktemp("v") / "v.mp4"), 320, 240, 60)
+
+
+def _stats(model, video, **kwargs):
+    return process_video_file(model, video, VideoOptions(sample_every=2, **kwargs), False)[1]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_pipelined_and_batched_match_sequential(video, mode):
+    model = BlockDetector()
+    expected = _stats(model, video)
+    assert [row["frame"] for row in expected] == list(range(0, 60, 2))
+    assert len({row["total"] for row in expected}) > 1
+    assert _stats(model, video, **mode) == expected
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_standin_onnx_matches_sequential(video, tmp_path, monkeypatch, mode):
+    pytest.importorskip("onnx")
+    from utils import onnx_backend
+    from utils.onnx_backend import OnnxDetector
+
+    monkeypatch.setattr(onnx_backend, "GRAPH_CACHE_DIR", str(tmp_path / "graphs"))
+    model = OnnxDetector(build_standin_onnx(str(tmp_path / "best.onnx"), 5, imgsz=320))
+    expected = _stats(model, video, max_frames=40)
+    assert len(expected) == 20
+    assert _stats(model, video, max_frames=40, **mode) == expected
+
+
+def test_pipelined_writer_keeps_every_frame(video):
+    import cv2
+
+    out_path, stats = process_video_file(
+        BlockDetector(), video, VideoOptions(sample_every=3, pipelined=True, batch_size=2),
+    )
+    cap = cv2.VideoCapture(out_path)
+    try:
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 60
+    finally:
+        cap.release()
+    assert [row["frame"] for row in stats] == list(range(0, 60, 3))
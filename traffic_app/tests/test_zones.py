@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.zones import Zone, ZoneLayout
+
+W, H = 200, 100
+# Lajur kiri & kanan di separuh bawah frame
+LANES = """
+# nama: titik x,y dalam persen
+Lajur 1: 0,50 50,50 50,100 0,100
+Lajur 2: 50,50 100,50 100,100 50,100
+"""
+
+
+def test_from_text_parses_percent_points():
+    layout = ZoneLayout.from_text(LANES)
+    assert layout.names == ["Lajur 1", "Lajur 2"]
+    assert layout.zones[0].polygon == [(0.0, 0.5), (0.5, 0.5), (0.5, 1.0), (0.0, 1.0)]
+    with pytest.raises(ValueError):
+        ZoneLayout.from_text("Rusak: 0,0 10,10")
+
+
+def test_from_json_matches_text(tmp_path):
+    path = tmp_path / "zones.json"
+    path.write_text(json.dumps([
+        {"name": z.name, "polygon": [list(p) for p in z.polygon]}
+        for z in ZoneLayout.from_text(LANES).zones
+    ]))
+    assert ZoneLayout.from_json(str(path)) == ZoneLayout.from_text(LANES)
+
+
+def test_assign_uses_bottom_centre_point():
+    layout = ZoneLayout.from_text(LANES)
+    boxes = np.array([
+        [10, 10, 50, 80],      # tengah bawah (30, 80) → lajur 1
+        [120, 0, 180, 70],     # badan di atas zona, tengah bawah (150, 70) → lajur 2
+        [90, 60, 190, 99],     # sebagian besar di lajur 2, tengah bawah (140, 99) → lajur 2
+        [10, 0, 60, 40],       # tengah bawah (35, 40) di luar zona
+    ], dtype=np.float32)
+    assert layout.assign(boxes, W, H).tolist() == [0, 1, 1, -1]
+    assert layout.assign(np.empty((0, 4)), W, H).shape == (0,)
+
+
+def test_geometry_is_per_frame_size():
+    layout = ZoneLayout([Zone("Tengah", [(0.25, 0.25), (0.75, 0.25), (0.75, 0.75), (0.25, 0.75)])])
+    assert layout.bounding_roi(W, H) == (50, 25, 151, 76)
+    assert layout.bounding_roi(2 * W, 2 * H) == (100, 50, 301, 151)
+    assert layout.areas(W, H)[0] == pytest.approx(0.25 * W * H, rel=0.05)
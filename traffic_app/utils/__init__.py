@@ -1,21 +1,32 @@
-from .analyzer import load_model, analyze_frame, process_video_file
-from .charts import (
-    vehicle_bar,
-    vehicle_pie,
-    large_vs_small_gauge,
-    congestion_gauge,
-    vehicle_timeline,
-    congestion_timeline,
-)
+"""
+Public helpers, re-exported lazily: importing one submodule (e.g.
+``utils.analyzer`` from the CLI) does not pull in the others (plotly).
+"""
 
-__all__ = [
-    "load_model",
-    "analyze_frame",
-    "process_video_file",
-    "vehicle_bar",
-    "vehicle_pie",
-    "large_vs_small_gauge",
-    "congestion_gauge",
-    "vehicle_timeline",
-    "congestion_timeline",
-]
+import importlib
+
+_EXPORTS = {
+    "load_model":           "analyzer",
+    "analyze_frame":        "analyzer",
+    "analyze_frames":       "analyzer",
+    "process_video_file":   "analyzer",
+    "iter_video_file":      "analyzer",
+    "VideoOptions":         "analyzer",
+    "vehicle_bar":          "charts",
+    "vehicle_pie":          "charts",
+    "large_vs_small_gauge": "charts",
+    "congestion_gauge":     "charts",
+    "vehicle_timeline":     "charts",
+    "congestion_timeline":  "charts",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -5,13 +5,23 @@ Handles vehicle detection and all traffic metrics computation.
 
 from __future__ import annotations
 
+import os
+import queue
 import tempfile
-from collections import defaultdict
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
-from PIL import Image
-from ultralytics import YOLO
+
+from .profiling import NULL_PROFILER
+from .sampling import FixedSampler
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
 
 # ─────────────────────────────────────────────
 CLASS_NAMES = ["bus", "car", "van"]
@@ -20,11 +30,170 @@ SMALL_VEHICLES = {"car"}
 CONGESTION_WEIGHTS = {"bus": 3.0, "van": 2.0, "car": 1.0}
 COLORS_BGR = {"bus": (34, 87, 255), "car": (243, 150, 33), "van": (80, 175, 76)}
 COLORS_HEX = {"bus": "#FF5722", "car": "#2196F3", "van": "#4CAF50"}
+BACKENDS = ("ultralytics", "onnxruntime")
+PIPELINE_QUEUE_SIZE = 8   # frame maksimum yang antre di antara dua stage
+WARMUP_SIZE = 640         # sisi frame dummy untuk warm-up model
+PANEL_RECT = ((8, 8), (340, 130))   # panel statistik overlay video (x1,y1)-(x2,y2)
+PANEL_ALPHA = 0.65                  # opasitas panel
+PANEL_SHADE = 15                    # warna panel (abu gelap)
 # ─────────────────────────────────────────────
 
+_EOS = object()  # penanda akhir stream antar stage pipeline
+_NAMES_LUT = np.array([*CLASS_NAMES, "unknown"])
+
+
+@dataclass
+class Detections:
+    """
+    Columnar detections of one frame: contiguous arrays with one row per box.
+    ``boxes`` is (N, 4) float32 ``xyxy``, ``scores`` (N,) float32 and
+    ``class_ids`` (N,) int64.
+    """
+
+    boxes: np.ndarray
+    scores: np.ndarray
+    class_ids: np.ndarray
 
-def load_model(model_path: str) -> YOLO:
-    return YOLO(model_path)
+    @classmethod
+    def from_arrays(cls, boxes, scores, class_ids) -> "Detections":
+        return cls(
+            boxes=np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4),
+            scores=np.ascontiguousarray(scores, dtype=np.float32).reshape(-1),
+            class_ids=np.ascontiguousarray(class_ids, dtype=np.int64).reshape(-1),
+        )
+
+    @classmethod
+    def from_results(cls, results) -> "Detections":
+        """Build from an ultralytics ``Results`` with one device→host transfer."""
+        if results.boxes is None or len(results.boxes) == 0:
+            return cls.from_arrays(np.empty((0, 4)), np.empty(0), np.empty(0))
+        data = results.boxes.data.cpu().numpy()   # (N, 6): xyxy, conf, cls
+        return cls.from_arrays(data[:, :4], data[:, 4], data[:, 5])
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    def counts(self) -> dict[str, int]:
+        """Per-class counts via ``np.bincount``; unknown ids go to ``"unknown"``."""
+        n = len(CLASS_NAMES)
+        bins = np.bincount(self.class_index(), minlength=n + 1)
+        counts = {name: int(bins[i]) for i, name in enumerate(CLASS_NAMES)}
+        if bins[n]:
+            counts["unknown"] = int(bins[n])
+        return counts
+
+    def class_names(self) -> list[str]:
+        return _NAMES_LUT[self.class_index()].tolist()
+
+    def class_index(self) -> np.ndarray:
+        """Class ids with out-of-range values mapped to ``len(CLASS_NAMES)``."""
+        n = len(CLASS_NAMES)
+        ids = self.class_ids
+        return np.where((ids >= 0) & (ids < n), ids, n)
+
+    def to_original(self, scale: tuple[float, float], offset: tuple[int, int]) -> "Detections":
+        """Map boxes from a resized / cropped input back to original pixels."""
+        (sx, sy), (ox, oy) = scale, offset
+        if (sx, sy, ox, oy) == (1.0, 1.0, 0, 0) or not len(self):
+            return self
+        factor = np.array([1 / sx, 1 / sy, 1 / sx, 1 / sy], dtype=np.float32)
+        shift = np.array([ox, oy, ox, oy], dtype=np.float32)
+        return Detections(self.boxes * factor + shift, self.scores, self.class_ids)
+
+    def subset(self, keep: np.ndarray) -> "Detections":
+        return Detections(self.boxes[keep], self.scores[keep], self.class_ids[keep])
+
+    def to_dicts(self) -> list[dict]:
+        """Row-wise dict view, only meant for UI tables."""
+        return [
+            {"class": name, "conf": float(score), "bbox": box}
+            for name, score, box in zip(self.class_names(), self.scores, self.boxes)
+        ]
+
+
+def load_model(
+    model_path: str,
+    backend: str = "ultralytics",
+    threads: int | None = None,
+    warmup_runs: int = 0,
+    warmup_size: int | tuple[int, int] = WARMUP_SIZE,
+    inter_op_threads: int | None = None,
+):
+    """
+    Load the detector. ``backend="ultralytics"`` wraps the file in
+    ``ultralytics.YOLO``; ``backend="onnxruntime"`` uses the lean
+    ``OnnxDetector`` that never imports torch and reuses a cached optimized
+    graph (see there).
+
+    ``threads`` caps the CPU threads used for inference (ONNX Runtime
+    intra-op threads, or torch's thread pool for ultralytics);
+    ``inter_op_threads`` sets the threads running independent graph nodes
+    in parallel (torch's inter-op pool is process-wide and can only be set
+    before its first use).
+
+    ``warmup_runs`` dummy frames of ``warmup_size`` (square side or (w, h))
+    go through ``analyze_frame`` before returning, so lazy initialization
+    does not land on the first real request. ``model.load_info`` reports
+    ``load_sec`` / ``warmup_sec`` and, for ONNX Runtime, the optimized graph
+    path and whether it came from the cache.
+    """
+    t0 = time.perf_counter()
+    if backend == "onnxruntime":
+        from .onnx_backend import OnnxDetector
+        model = OnnxDetector(
+            model_path, intra_op_threads=threads, inter_op_threads=inter_op_threads
+        )
+    elif backend == "ultralytics":
+        from ultralytics import YOLO
+        if threads or inter_op_threads:
+            import torch
+            if threads:
+                torch.set_num_threads(threads)
+            if inter_op_threads:
+                try:
+                    torch.set_num_interop_threads(inter_op_threads)
+                except RuntimeError:
+                    pass   # pool inter-op torch sudah berjalan
+        model = YOLO(model_path)
+    else:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    load_sec = time.perf_counter() - t0
+
+    model.load_info = {
+        "backend":             backend,
+        "load_sec":            round(load_sec, 3),
+        "warmup_sec":          round(warm_up(model, warmup_runs, warmup_size), 3),
+        "warmup_runs":         warmup_runs,
+        "optimized_graph":     getattr(model, "optimized_path", None),
+        "optimized_cache_hit": getattr(model, "optimized_cache_hit", False),
+    }
+    return model
+
+
+def warm_up(
+    model,
+    runs: int = 1,
+    size: int | tuple[int, int] = WARMUP_SIZE,
+) -> float:
+    """
+    Push ``runs`` blank frames of ``size`` through ``analyze_frame`` (with
+    annotation, so drawing code is warm too). Returns the elapsed seconds.
+    """
+    if runs <= 0:
+        return 0.0
+    w, h = (size, size) if isinstance(size, int) else size
+    dummy = np.full((h, w, 3), 114, np.uint8)
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        analyze_frame(model, dummy)
+    return time.perf_counter() - t0
+
+
+def backend_name(model) -> str:
+    """Backend of a loaded model, ``OnnxDetector`` or session pool."""
+    return getattr(model, "backend", None) or (
+        "onnxruntime" if hasattr(model, "detect") else "ultralytics"
+    )
 
 
 def analyze_frame(
@@ -32,27 +201,159 @@ def analyze_frame(
     image: np.ndarray,
     conf: float = 0.4,
     iou: float = 0.5,
+    annotate: bool = True,
+    roi: tuple[int, int, int, int] | None = None,
+    infer_size: int | None = None,
+    zones=None,
+    profiler=None,
 ) -> dict:
     """
     Run detection on a single BGR numpy frame.
-    Returns a dict with counts, density, ratio, congestion, and annotated image.
+    Returns a dict with counts, density, ratio, congestion, and annotated image
+    (``None`` when ``annotate=False``). See ``analyze_frames`` for ``roi`` /
+    ``infer_size`` / ``zones`` / ``profiler``.
     """
-    results = model.predict(source=image, conf=conf, iou=iou, verbose=False)[0]
+    return analyze_frames(
+        model, [image], conf, iou, annotate, roi, infer_size, zones, profiler
+    )[0]
+
+
+def analyze_frames(
+    model: YOLO,
+    images: list[np.ndarray],
+    conf: float = 0.4,
+    iou: float = 0.5,
+    annotate: bool = True,
+    roi: tuple[int, int, int, int] | None = None,
+    infer_size: int | None = None,
+    zones=None,
+    profiler=None,
+) -> list[dict]:
+    """
+    Run detection on a batch of BGR frames with a single ``model.predict``
+    call. Returns one ``analyze_frame``-style dict per image, in input order.
+
+    ``roi`` (x1, y1, x2, y2 in pixels) restricts inference to that crop and
+    ``infer_size`` downscales the (cropped) frame once so its longest side is
+    at most that many pixels. Boxes are always mapped back to the original
+    frame, annotation is drawn at full resolution and density is normalized
+    by the analyzed area.
+
+    ``zones`` (a ``utils.zones.ZoneLayout``) replaces ``roi`` with the
+    rectangle around all zones, drops detections outside every zone and
+    adds ``result["zones"]`` — counts, density, ratio and congestion per
+    zone, density normalized by each zone's own area — plus ``zone_ids``.
 
-    vehicle_counts: dict[str, int] = defaultdict(int)
-    detections: list[dict] = []
+    ``profiler`` (a ``utils.profiling.StageProfiler``) accumulates the
+    ``preprocess`` / ``inference`` / ``postprocess`` time of the call.
+
+    Batches larger than one need a model exported with a dynamic batch axis.
+    """
+    if not images:
+        return []
+    prof = profiler or NULL_PROFILER
+    with prof.stage("preprocess"):
+        inputs, views = zip(*(
+            _prepare_input(
+                image,
+                zones.bounding_roi(image.shape[1], image.shape[0]) if zones is not None else roi,
+                infer_size,
+            )
+            for image in images
+        ))
+    if hasattr(model, "detect"):   # OnnxDetector: memecah waktunya sendiri per stage
+        raw = model.detect(list(inputs), conf=conf, iou=iou, profiler=prof)
+        batch = [Detections.from_arrays(*arrays) for arrays in raw]
+    else:
+        t0 = time.perf_counter()
+        raw = model.predict(source=list(inputs), conf=conf, iou=iou, verbose=False)
+        _split_ultralytics_time(prof, raw, time.perf_counter() - t0)
+        batch = [Detections.from_results(results) for results in raw]
+    with prof.stage("postprocess"):
+        if zones is not None:
+            return [
+                _build_zone_result(dets.to_original(scale, offset), image, annotate, zones)
+                for dets, image, (scale, offset, _) in zip(batch, images, views)
+            ]
+        return [
+            build_result(dets.to_original(scale, offset), image, annotate, area=area)
+            for dets, image, (scale, offset, area) in zip(batch, images, views)
+        ]
+
+
+def _split_ultralytics_time(prof, results, seconds: float) -> None:
+    """Attribute one ``predict`` call using the per-image ``Results.speed`` (ms)."""
+    if not prof.enabled:
+        return
+    pre = sum(r.speed.get("preprocess") or 0.0 for r in results) / 1000
+    post = sum(r.speed.get("postprocess") or 0.0 for r in results) / 1000
+    prof.add_time("preprocess", pre, calls=0)
+    prof.add_time("postprocess", post, calls=0)
+    prof.add_time("inference", max(seconds - pre - post, 0.0))
+
+
+def _build_zone_result(detections: Detections, image: np.ndarray, annotate: bool, zones) -> dict:
+    h, w = image.shape[:2]
+    zone_ids = zones.assign(detections.boxes, w, h)
+    keep = zone_ids >= 0
+    detections, zone_ids = detections.subset(keep), zone_ids[keep]
+    areas = zones.areas(w, h)
+
+    result = build_result(detections, image, annotate, area=int(areas.sum()))
+    result["zone_ids"] = zone_ids
+    result["zones"] = {
+        name: _compute_analytics(detections.subset(zone_ids == i).counts(), int(areas[i]))
+        for i, name in enumerate(zones.names)
+    }
+    return result
 
-    if results.boxes is not None:
-        for i in range(len(results.boxes)):
-            cls_id   = int(results.boxes.cls[i].item())
-            conf_val = float(results.boxes.conf[i].item())
-            xyxy     = results.boxes.xyxy[i].cpu().numpy()
-            cls_name = CLASS_NAMES[cls_id] if cls_id < len(CLASS_NAMES) else "unknown"
-            vehicle_counts[cls_name] += 1
-            detections.append({"class": cls_name, "conf": conf_val, "bbox": xyxy})
 
-    analytics = _compute_analytics(vehicle_counts, image)
-    annotated = _draw_boxes(image.copy(), detections)
+def _prepare_input(
+    image: np.ndarray,
+    roi: tuple[int, int, int, int] | None,
+    infer_size: int | None,
+) -> tuple[np.ndarray, tuple[tuple[float, float], tuple[int, int], int]]:
+    """
+    Crop (a view, no copy) and downscale a frame for the model. Returns the
+    model input and (scale, offset, area) to map detections back.
+    """
+    h, w = image.shape[:2]
+    x1, y1, x2, y2 = (0, 0, w, h) if roi is None else clip_roi(roi, w, h)
+    crop = image[y1:y2, x1:x2]
+    cw, ch = x2 - x1, y2 - y1
+    scale = (1.0, 1.0)
+    if infer_size and max(cw, ch) > infer_size:
+        f = infer_size / max(cw, ch)
+        nw, nh = max(1, round(cw * f)), max(1, round(ch * f))
+        crop = cv2.resize(crop, (nw, nh), interpolation=cv2.INTER_AREA)
+        scale = (nw / cw, nh / ch)
+    return crop, (scale, (x1, y1), cw * ch)
+
+
+def clip_roi(roi: tuple[int, int, int, int], w: int, h: int) -> tuple[int, int, int, int]:
+    """Clamp an (x1, y1, x2, y2) rectangle to a w×h frame; never empty."""
+    x1, y1, x2, y2 = (int(round(v)) for v in roi)
+    x1, y1 = min(max(x1, 0), w - 1), min(max(y1, 0), h - 1)
+    x2, y2 = min(max(x2, x1 + 1), w), min(max(y2, y1 + 1), h)
+    return x1, y1, x2, y2
+
+
+def build_result(
+    detections: Detections,
+    image: np.ndarray,
+    annotate: bool = True,
+    area: int | None = None,
+) -> dict:
+    """
+    Analytics (and optionally the annotated image) for known detections.
+    ``annotated`` is a BGR copy of ``image``; the input is left untouched.
+    ``area`` is the analyzed pixel area for density (default: whole image).
+    """
+    vehicle_counts = detections.counts()
+    if area is None:
+        area = image.shape[0] * image.shape[1]
+    analytics = _compute_analytics(vehicle_counts, area)
+    annotated = _draw_boxes(image.copy(), detections) if annotate else None
 
     return {
         **analytics,
@@ -61,7 +362,7 @@ def analyze_frame(
     }
 
 
-def _compute_analytics(vehicle_counts: dict, image: np.ndarray) -> dict:
+def _compute_analytics(vehicle_counts: dict, img_area: int) -> dict:
     counts = {
         "bus":   vehicle_counts.get("bus", 0),
         "car":   vehicle_counts.get("car", 0),
@@ -69,8 +370,6 @@ def _compute_analytics(vehicle_counts: dict, image: np.ndarray) -> dict:
         "total": sum(vehicle_counts.values()),
     }
 
-    img_h, img_w = image.shape[:2]
-    img_area = img_h * img_w
     density_score = (counts["total"] / img_area) * 100_000 if img_area > 0 else 0
 
     if density_score < 0.5:
@@ -107,6 +406,20 @@ def _compute_analytics(vehicle_counts: dict, image: np.ndarray) -> dict:
     )
     ci = min(100.0, (weighted / 50) * 100)
 
+    return {
+        "vehicle_counts": counts,
+        "density": {
+            "score": round(density_score, 3),
+            "level": density_level,
+            "color": density_color,
+        },
+        "ratio": ratio,
+        "congestion": congestion_info(ci),
+    }
+
+
+def congestion_info(ci: float) -> dict:
+    """Congestion dict (index, level, emoji, description, color) for a 0–100 index."""
     if ci < 20:
         cl, ce, cd = "Lancar",       "🟢", "Lalu lintas lancar, tidak ada hambatan"
     elif ci < 40:
@@ -127,118 +440,453 @@ def _compute_analytics(vehicle_counts: dict, image: np.ndarray) -> dict:
     }
 
     return {
-        "vehicle_counts": counts,
-        "density": {
-            "score": round(density_score, 3),
-            "level": density_level,
-            "color": density_color,
-        },
-        "ratio": ratio,
-        "congestion": {
-            "index":       round(ci, 1),
-            "level":       cl,
-            "emoji":       ce,
-            "description": cd,
-            "color":       cong_color_map.get(cl, "#6b7280"),
-        },
+        "index":       round(ci, 1),
+        "level":       cl,
+        "emoji":       ce,
+        "description": cd,
+        "color":       cong_color_map.get(cl, "#6b7280"),
     }
 
 
-def _draw_boxes(image: np.ndarray, detections: list[dict]) -> np.ndarray:
-    """Draw bounding boxes on BGR image."""
-    img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    for det in detections:
-        cls_name = det["class"]
-        conf_val = det["conf"]
-        x1, y1, x2, y2 = [int(v) for v in det["bbox"]]
+def _draw_boxes(image: np.ndarray, detections: Detections) -> np.ndarray:
+    """Draw labelled bounding boxes on a BGR image, in place."""
+    boxes = detections.boxes.astype(np.int32)
+    for (x1, y1, x2, y2), cls_name, conf_val in zip(
+        boxes.tolist(), detections.class_names(), detections.scores.tolist()
+    ):
         color = COLORS_BGR.get(cls_name, (200, 200, 200))
-        cv2.rectangle(img_rgb, (x1, y1), (x2, y2), color, 2)
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
         label = f"{cls_name} {conf_val:.2f}"
         (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.55, 1)
-        cv2.rectangle(img_rgb, (x1, y1 - th - 6), (x1 + tw + 6, y1), color, -1)
+        cv2.rectangle(image, (x1, y1 - th - 6), (x1 + tw + 6, y1), color, -1)
         cv2.putText(
-            img_rgb, label, (x1 + 3, y1 - 3),
+            image, label, (x1 + 3, y1 - 3),
             cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 1,
         )
-    return img_rgb
+    return image
+
+
+@dataclass
+class VideoOptions:
+    """
+    Plain, picklable settings for one video run, shared by
+    ``process_video_file``, ``iter_video_file`` and
+    ``utils.parallel.process_video_parallel``.
+
+    ``start_frame`` seeks before decoding; frame indices stay absolute and
+    ``max_frames`` is then the (exclusive) absolute end frame. ``roi`` /
+    ``infer_size`` / ``zones`` are as in ``analyze_frames``. With
+    ``pipelined`` decode and encode run in their own threads behind queues
+    of ``queue_size`` frames; sampled frames go to the model ``batch_size``
+    at a time. Rows are identical in every mode.
+    """
+
+    conf: float = 0.4
+    iou: float = 0.5
+    sample_every: int = 3
+    max_frames: int | None = None
+    start_frame: int = 0
+    batch_size: int = 1
+    pipelined: bool = False
+    queue_size: int = PIPELINE_QUEUE_SIZE
+    roi: tuple[int, int, int, int] | None = None
+    infer_size: int | None = None
+    zones: object = None
 
 
 def process_video_file(
     model: YOLO,
     video_path: str,
-    conf: float = 0.4,
-    iou: float = 0.5,
-    sample_every: int = 3,
-    max_frames=None,
-) -> tuple[str, list[dict]]:
+    options: VideoOptions | None = None,
+    write_video: bool = True,
+    on_update=None,
+    **state,
+) -> tuple[str | None, list[dict]]:
     """
     Process a video file. Returns (output_path, frame_stats).
+
+    Blocking wrapper around ``iter_video_file``; ``state`` is passed through
+    (``tracker``, ``sampler``, ``counter``, ...) and ``on_update`` is called
+    with every update dict as it is produced.
     """
+    out_path = tempfile.mktemp(suffix=".mp4") if write_video else None
+    frame_stats: list[dict] = []
+    for update in iter_video_file(model, video_path, options, out_path=out_path, **state):
+        frame_stats.append(update["stat"])
+        if on_update is not None:
+            on_update(update)
+    return out_path, frame_stats
+
+
+def iter_video_file(
+    model: YOLO,
+    video_path: str,
+    options: VideoOptions | None = None,
+    out_path: str | None = None,
+    tracker=None,
+    sampler=None,
+    counter=None,
+    motion=None,
+    stats=None,
+    profiler=None,
+):
+    """
+    Generator form of the video processor: yields one update per analyzed
+    frame as soon as it is available::
+
+        {"stat": row, "result": result, "frame": bgr_frame,
+         "frame_index": fc, "total_frames": n}
+
+    The annotated video is written to ``out_path`` and is complete once the
+    generator is exhausted; ``out_path=None`` is the analytics-only fast
+    mode (unsampled frames are only grabbed, nothing is drawn or encoded).
+    The overlay is drawn into ``frame`` in place after the consumer resumes,
+    so copy it if it is kept past the current update.
+
+    The remaining arguments are caller-owned per-run state, updated as rows
+    are produced: a ``VehicleTracker``, a sampler replacing the fixed
+    ``sample_every`` stride, a ``LineCounter`` and ``MotionEstimator`` (both
+    need ``tracker``), ``CongestionStats`` smoothing and a ``StageProfiler``.
+    Each adds its columns to the rows and keeps its own run totals.
+    """
+    o = options or VideoOptions()
+    if (counter is not None or motion is not None) and tracker is None:
+        raise ValueError("Line counting and speed estimation need a tracker")
     cap = cv2.VideoCapture(video_path)
     fps   = int(cap.get(cv2.CAP_PROP_FPS)) or 25
     vid_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     vid_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if o.max_frames is not None:
+        total_frames = min(total_frames, o.max_frames) if total_frames > 0 else o.max_frames
+    if o.start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, o.start_frame)
+
+    prof = profiler or NULL_PROFILER
+    write_video = out_path is not None
+    writer, sink = None, None
+    if write_video:
+        writer = cv2.VideoWriter(
+            out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (vid_w, vid_h)
+        )
 
-    out_path = tempfile.mktemp(suffix=".mp4")
-    writer = cv2.VideoWriter(
-        out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (vid_w, vid_h)
-    )
+        def write(frame: np.ndarray, result: dict | None) -> None:
+            with prof.stage("overlay"):
+                frame = _render_video_frame(frame, result)
+            with prof.stage("encode"):
+                writer.write(frame)
 
-    frame_stats: list[dict] = []
-    fc          = 0       # ✅ satu counter saja
-    last_result = None
+        sink = _ThreadedWriter(write, o.queue_size, prof) if o.pipelined else write
+
+    try:
+        frames = _read_frames(
+            cap, sampler or FixedSampler(o.sample_every), o.max_frames,
+            sampled_only=not write_video, start_frame=o.start_frame, profiler=prof,
+        )
+        if o.pipelined:
+            frames = _prefetch(frames, o.queue_size, prof)
+        items = _infer_stage(
+            frames, model, o.conf, o.iou, fps, o.batch_size, tracker, o.roi, o.infer_size,
+            o.zones, counter, motion, stats, prof,
+        )
+        with closing(frames), closing(items):
+            for fc, frame, result, stat in items:
+                if stat is not None:
+                    yield {
+                        "stat":         stat,
+                        "result":       result,
+                        "frame":        frame,
+                        "frame_index":  fc,
+                        "total_frames": total_frames,
+                    }
+                if sink is not None:
+                    sink(frame, result)   # overlay digambar in-place setelah yield
+        if isinstance(sink, _ThreadedWriter):
+            sink.close()
+    finally:
+        if isinstance(sink, _ThreadedWriter):
+            sink.close()
+        cap.release()
+        if writer is not None:
+            writer.release()
+            if os.path.exists(out_path):
+                prof.incr("bytes_written", os.path.getsize(out_path))
+
+
+def render_video_preview(frame: np.ndarray, result: dict) -> np.ndarray:
+    """BGR copy of a frame with the video overlay, for live display."""
+    return _overlay_video_stats(frame.copy(), result)
+
+
+def _read_frames(
+    cap: cv2.VideoCapture,
+    sampler,
+    max_frames=None,
+    sampled_only: bool = False,
+    start_frame: int = 0,
+    profiler=NULL_PROFILER,
+):
+    """
+    Decode stage: yield (frame_index, frame, sampled) until EOF or
+    ``max_frames``; ``sampled`` is the sampler's verdict for that frame.
 
+    With ``sampled_only`` frames the sampler has no use for are only
+    ``grab()``-ed, never retrieved into a BGR array, and only sampled frames
+    are yielded.
+    """
+    prof = profiler
+    fc = start_frame
     while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
         if max_frames is not None and fc >= max_frames:
             break
+        if sampled_only and not sampler.needs_pixels(fc):
+            with prof.stage("decode"):
+                ok = cap.grab()
+            if not ok:
+                break
+            prof.incr("frames_skipped")
+            fc += 1
+            continue
+        with prof.stage("decode"):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        prof.incr("frames_decoded")
+        with prof.stage("sampling"):
+            sampled = sampler.should_sample(fc, frame)
+        if not sampled:
+            prof.incr("frames_skipped")
+        if sampled or not sampled_only:
+            yield fc, frame, sampled
+        fc += 1
+
 
-        if fc % sample_every == 0:
-            last_result = analyze_frame(model, frame, conf, iou)
-            frame_stats.append({
-                "frame":            fc,
-                "time_sec":         round(fc / fps, 2),
-                "total":            last_result["vehicle_counts"]["total"],
-                "bus":              last_result["vehicle_counts"]["bus"],
-                "car":              last_result["vehicle_counts"]["car"],
-                "van":              last_result["vehicle_counts"]["van"],
-                "congestion_index": last_result["congestion"]["index"],
-                "congestion_level": last_result["congestion"]["level"],
-            })
-
-        if last_result is not None:
-            out_frame = _overlay_video_stats(frame.copy(), last_result)
-            writer.write(cv2.cvtColor(out_frame, cv2.COLOR_RGB2BGR))
+def _infer_stage(
+    frames,
+    model: YOLO,
+    conf: float,
+    iou: float,
+    fps: int,
+    batch_size: int = 1,
+    tracker=None,
+    roi: tuple[int, int, int, int] | None = None,
+    infer_size: int | None = None,
+    zones=None,
+    counter=None,
+    motion=None,
+    stats=None,
+    profiler=NULL_PROFILER,
+):
+    """
+    Inference stage: analyze sampled frames in batches of ``batch_size`` and
+    yield (frame_index, frame, last_result, stat) in decode order, where
+    ``stat`` is the ``frame_stats`` row for sampled frames and ``None``
+    otherwise.
+
+    Frames that follow a sampled frame still waiting for its batch are held
+    back until that batch has run, so only the frames spanning one batch are
+    buffered.
+    """
+    batch_size = max(1, int(batch_size))
+    last_result = None
+    pending: list[tuple[int, np.ndarray, bool]] = []   # dimulai dari frame sampel
+    n_sampled = 0
+
+    def flush():
+        nonlocal last_result, n_sampled
+        sampled = [(fc, frame) for fc, frame, is_sampled in pending if is_sampled]
+        results = analyze_frames(
+            model, [frame for _, frame in sampled], conf, iou, annotate=False,
+            roi=roi, infer_size=infer_size, zones=zones, profiler=profiler,
+        )
+        profiler.incr("frames_inferred", len(sampled))
+        profiler.incr("batches")
+        t0 = time.perf_counter()
+        by_frame = {fc: res for (fc, _), res in zip(sampled, results)}
+        out = []
+        for fc, frame, _ in pending:
+            res, row = by_frame.get(fc), None
+            if res is not None:
+                last_result = res
+                row = _frame_stat(fc, fps, res)
+                if tracker is not None:
+                    res["track_ids"] = tracker.update(res["detections"], fc / fps)
+                    row.update(tracker.stat_row())
+                h, w = frame.shape[:2]
+                if counter is not None:
+                    res["crossings"] = counter.update(
+                        res["detections"], res["track_ids"], fc / fps, w, h
+                    )
+                    row.update(counter.stat_row())
+                if motion is not None:
+                    m = motion.update(tracker.active_tracks(), w, h, res["congestion"]["index"])
+                    res["motion"], res["congestion"] = m, m["congestion"]
+                    row.update(motion.stat_row(m))
+                    row["congestion_index"] = m["congestion"]["index"]
+                    row["congestion_level"] = m["congestion"]["level"]
+                if stats is not None:
+                    row.update(stats.update(row))
+            out.append((fc, frame, last_result, row))
+        profiler.add_time("tracking", time.perf_counter() - t0)
+        pending.clear()
+        n_sampled = 0
+        return out
+
+    for fc, frame, is_sampled in frames:
+        if is_sampled:
+            pending.append((fc, frame, True))
+            n_sampled += 1
+            if n_sampled >= batch_size:
+                yield from flush()
+        elif pending:
+            pending.append((fc, frame, False))
         else:
-            writer.write(frame)
+            yield fc, frame, last_result, None
+
+    if pending:
+        yield from flush()
+
+
+def _frame_stat(fc: int, fps: int, result: dict) -> dict:
+    row = {
+        "frame":            fc,
+        "time_sec":         round(fc / fps, 2),
+        "total":            result["vehicle_counts"]["total"],
+        "bus":              result["vehicle_counts"]["bus"],
+        "car":              result["vehicle_counts"]["car"],
+        "van":              result["vehicle_counts"]["van"],
+        "congestion_index": result["congestion"]["index"],
+        "congestion_level": result["congestion"]["level"],
+    }
+    for name, z in result.get("zones", {}).items():
+        row[f"zone_{name}_total"] = z["vehicle_counts"]["total"]
+        row[f"zone_{name}_congestion"] = z["congestion"]["index"]
+    return row
 
-        fc += 1
 
-    cap.release()
-    writer.release()
-    return out_path, frame_stats
+def _render_video_frame(frame: np.ndarray, result: dict | None) -> np.ndarray:
+    """Encode stage helper: overlays ``frame`` in place for ``VideoWriter.write``."""
+    if result is None:
+        return frame
+    return _overlay_video_stats(frame, result)
+
+
+# ── Pipeline helpers ──────────────────────────────────────────
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once ``stop`` is set."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _prefetch(iterable, maxsize: int, profiler=NULL_PROFILER):
+    """
+    Run ``iterable`` (the decoder) in a background thread and yield its
+    items through a bounded queue. Closing the generator stops the thread.
+    Time the consumer spends blocked is profiled as ``decode_wait``.
+    """
+    q: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def worker():
+        try:
+            for item in iterable:
+                if not _put(q, item, stop):
+                    return
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            _put(q, _EOS, stop)
+
+    thread = threading.Thread(target=worker, name="tv-decode", daemon=True)
+    thread.start()
+    try:
+        while True:
+            profiler.gauge("decode_queue", q.qsize())
+            with profiler.stage("decode_wait"):
+                item = q.get()
+            if item is _EOS:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+class _ThreadedWriter:
+    """
+    Encode stage in a background thread: ``sink(frame, result)`` enqueues
+    into a bounded queue, ``close()`` drains it and re-raises write errors.
+    Time the producer spends blocked is profiled as ``encode_wait``.
+    """
+
+    def __init__(self, write, maxsize: int, profiler=NULL_PROFILER):
+        self._write = write
+        self._profiler = profiler
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+        self._errors: list[BaseException] = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="tv-encode", daemon=True)
+        self._thread.start()
+
+    def __call__(self, frame: np.ndarray, result: dict | None) -> None:
+        if self._errors:
+            raise self._errors[0]
+        with self._profiler.stage("encode_wait"):
+            self._q.put((frame, result))
+        self._profiler.gauge("encode_queue", self._q.qsize())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(_EOS)
+        self._thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is _EOS:
+                return
+            if self._errors:
+                continue  # drain supaya producer tidak pernah blok
+            try:
+                self._write(*item)
+            except BaseException as exc:
+                self._errors.append(exc)
 
 
 def _overlay_video_stats(frame: np.ndarray, result: dict) -> np.ndarray:
-    img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    for det in result.get("detections", []):
-        cls_name = det["class"]
-        x1, y1, x2, y2 = [int(v) for v in det["bbox"]]
+    """Draw boxes and the stats panel onto a BGR ``frame`` in place."""
+    dets = result["detections"]
+    for (x1, y1, x2, y2), cls_name in zip(
+        dets.boxes.astype(np.int32).tolist(), dets.class_names()
+    ):
         color = COLORS_BGR.get(cls_name, (200, 200, 200))
-        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
 
-    ov = img.copy()
-    cv2.rectangle(ov, (8, 8), (340, 130), (15, 15, 15), -1)
-    img = cv2.addWeighted(ov, 0.65, img, 0.35, 0)
+    # Panel transparan: blend hanya di ROI panel, bukan seluruh frame
+    (px1, py1), (px2, py2) = PANEL_RECT
+    roi = frame[py1:py2 + 1, px1:px2 + 1]
+    roi[:] = cv2.convertScaleAbs(
+        roi, alpha=1.0 - PANEL_ALPHA, beta=PANEL_ALPHA * PANEL_SHADE
+    )
 
     c = result["vehicle_counts"]
     g = result["congestion"]
-    cv2.putText(img, f"Bus:{c['bus']}  Car:{c['car']}  Van:{c['van']}",
+    cv2.putText(frame, f"Bus:{c['bus']}  Car:{c['car']}  Van:{c['van']}",
                 (18, 38), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 255, 255), 2)
-    cv2.putText(img, f"Total Kendaraan: {c['total']}",
-                (18, 68), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (255, 230, 80), 2)
-    cv2.putText(img, f"Kemacetan: {g['level']} ({g['index']:.0f}/100)",
-                (18, 98), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (80, 255, 140), 2)
-    return img
+    cv2.putText(frame, f"Total Kendaraan: {c['total']}",
+                (18, 68), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (80, 230, 255), 2)
+    cv2.putText(frame, f"Kemacetan: {g['level']} ({g['index']:.0f}/100)",
+                (18, 98), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (140, 255, 80), 2)
+    return frame
@@ -0,0 +1,128 @@
+"""
+Dynamic micro-batching for concurrent inference requests.
+Requests that arrive within a small latency budget are merged into a single
+``analyze_frames`` call, so concurrent clients share one model invocation.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+import numpy as np
+
+from .analyzer import analyze_frames
+from .profiling import NULL_PROFILER
+
+# ─────────────────────────────────────────────
+MAX_BATCH = 8          # gambar maksimum per panggilan model
+MAX_WAIT_MS = 10.0     # batas tunggu untuk mengumpulkan batch
+# ─────────────────────────────────────────────
+
+
+class MicroBatcher:
+    """
+    Collects ``submit``-ted images in a background thread. A batch is run as
+    soon as ``max_batch`` images are waiting or ``max_wait_ms`` has passed
+    since the first one arrived. Requests with different (conf, iou) are
+    grouped into separate model calls.
+
+    ``profiler`` (a ``utils.profiling.StageProfiler``) receives the model's
+    stage times, the ``requests`` / ``batches`` counters and the
+    ``request_queue`` depth.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+        profiler=None,
+    ):
+        self.model = model
+        self.profiler = profiler or NULL_PROFILER
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self._thread = threading.Thread(target=self._run, name="tv-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image: np.ndarray, conf: float = 0.4, iou: float = 0.5) -> Future:
+        """Queue one BGR image; the future resolves to an ``analyze_frame`` dict."""
+        future: Future = Future()
+        with self._lock:
+            if self._stop.is_set():
+                raise RuntimeError("batcher closed")
+            self._q.put((image, float(conf), float(iou), future))
+        return future
+
+    def analyze(self, image: np.ndarray, conf: float = 0.4, iou: float = 0.5) -> dict:
+        return self.submit(image, conf, iou).result()
+
+    def close(self) -> None:
+        """
+        Stop the worker after its current batch; requests still queued fail
+        with ``RuntimeError("batcher closed")`` instead of hanging.
+        """
+        with self._lock:
+            self._stop.set()
+        self._thread.join()
+        while True:
+            try:
+                future = self._q.get_nowait()[3]
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("batcher closed"))
+
+    # ── Internals ──────────────────────────────────────────────
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.profiler.gauge("request_queue", self._q.qsize() + 1)
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch: list) -> None:
+        groups: dict[tuple[float, float], list] = defaultdict(list)
+        for item in batch:
+            groups[(item[1], item[2])].append(item)
+        for (conf, iou), items in groups.items():
+            # Setiap future harus ditandai RUNNING; yang sudah dibatalkan dibuang
+            live = [item for item in items if item[3].set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                results = analyze_frames(
+                    self.model, [item[0] for item in live], conf, iou, annotate=False,
+                    profiler=self.profiler,
+                )
+            except Exception as exc:
+                for item in live:
+                    item[3].set_exception(exc)
+                continue
+            for item, res in zip(live, results):
+                item[3].set_result(res)
+            self.batches += 1
+            self.requests += len(live)
+            self.profiler.incr("batches")
+            self.profiler.incr("requests", len(live))
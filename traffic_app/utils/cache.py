@@ -0,0 +1,188 @@
+"""
+Persistent on-disk result cache.
+Entries are keyed by (content hash, model hash, analysis parameters) and
+evicted least-recently-used once the cache grows past its size budget.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# ─────────────────────────────────────────────
+CACHE_DIR = os.environ.get(
+    "TRAFFIC_VISION_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "traffic_vision"),
+)
+MAX_BYTES = int(float(os.environ.get("TRAFFIC_VISION_CACHE_MB", "1024")) * 1024 * 1024)
+CHUNK = 1 << 20
+# ─────────────────────────────────────────────
+
+_file_hashes: dict[tuple[str, int, int], str] = {}
+_default_cache: "ResultCache | None" = None
+_default_lock = threading.Lock()
+
+
+def bytes_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, memoized per (path, size, mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK), b""):
+                h.update(chunk)
+        _file_hashes[memo_key] = h.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def make_key(content_hash: str, model_hash: str, **params) -> str:
+    """Cache key for one analysis; ``params`` must be JSON-serializable."""
+    payload = json.dumps([content_hash, model_hash, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of ``<key>.<ext>`` entries. Reads refresh the entry's mtime,
+    writes evict the least recently used entries beyond ``max_bytes``.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ── Detections (npz) ───────────────────────────────────────
+    def get_arrays(self, key: str) -> dict[str, np.ndarray] | None:
+        path = self._hit(key, ".npz")
+        if path is None:
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def put_arrays(self, key: str, **arrays: np.ndarray) -> None:
+        with self._writer(key, ".npz") as f:
+            np.savez_compressed(f, **arrays)
+
+    # ── frame_stats & metadata (gzip JSON, columnar rows) ──────
+    def get_json(self, key: str):
+        path = self._hit(key, ".json.gz")
+        if path is None:
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put_json(self, key: str, obj) -> None:
+        with self._writer(key, ".json.gz") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                gz.write(json.dumps(obj, separators=(",", ":"), default=_to_builtin).encode())
+
+    # ── Output files (annotated video) ─────────────────────────
+    def get_file(self, key: str, suffix: str) -> str | None:
+        return self._hit(key, suffix)
+
+    def put_file(self, key: str, src_path: str, suffix: str) -> str:
+        with self._writer(key, suffix) as f, open(src_path, "rb") as src:
+            shutil.copyfileobj(src, f, CHUNK)
+        return self._path(key, suffix)
+
+    # ── Internals ──────────────────────────────────────────────
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key + suffix)
+
+    def _hit(self, key: str, suffix: str) -> str | None:
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)          # tandai baru dipakai (LRU)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _writer(self, key: str, suffix: str):
+        return _AtomicWriter(self, self._path(key, suffix))
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(self.root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+def get_default_cache() -> ResultCache:
+    """Process-wide cache in ``CACHE_DIR`` (shared by all Streamlit sessions)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
+
+
+class _AtomicWriter:
+    """Write to a temp file in the cache dir, rename into place, then evict."""
+
+    def __init__(self, cache: ResultCache, path: str):
+        self._cache = cache
+        self._path = path
+
+    def __enter__(self):
+        fd, self._tmp = tempfile.mkstemp(dir=self._cache.root, suffix=".tmp")
+        self._f = os.fdopen(fd, "wb")
+        return self._f
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.close()
+        if exc_type is not None:
+            os.remove(self._tmp)
+            return False
+        os.replace(self._tmp, self._path)
+        self._cache.evict()
+        return False
+
+
+def frame_stats_to_columns(frame_stats: list[dict]) -> dict:
+    """Columnar form of ``frame_stats`` — keys stored once instead of per row."""
+    columns = list(frame_stats[0]) if frame_stats else []
+    return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in frame_stats]}
+
+
+def frame_stats_from_columns(data: dict) -> list[dict]:
+    columns = data["columns"]
+    return [dict(zip(columns, row)) for row in data["rows"]]
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
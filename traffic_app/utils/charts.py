@@ -5,7 +5,6 @@ Chart helpers — all Plotly, dark-themed, consistent styling.
 from __future__ import annotations
 
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 
 PALETTE = {"bus": "#FF5722", "car": "#2196F3", "van": "#4CAF50"}
@@ -169,17 +168,31 @@ def congestion_timeline(df: pd.DataFrame) -> go.Figure:
     fig.add_hrect(y0=60, y1=80, fillcolor="rgba(239,68,68,0.06)", line_width=0)
     fig.add_hrect(y0=80, y1=100, fillcolor="rgba(127,29,29,0.08)", line_width=0)
 
+    smooth = "congestion_smooth" in df.columns
     fig.add_trace(
         go.Scatter(
             x=df["time_sec"],
             y=df["congestion_index"],
             mode="lines",
-            line=dict(color="#f97316", width=2.5),
-            fill="tozeroy",
+            line=dict(color="#f97316", width=1 if smooth else 2.5),
+            opacity=0.35 if smooth else 1.0,
+            fill=None if smooth else "tozeroy",
             fillcolor="rgba(249,115,22,0.12)",
             name="Congestion Index",
         )
     )
+    if smooth:
+        fig.add_trace(
+            go.Scatter(
+                x=df["time_sec"],
+                y=df["congestion_smooth"],
+                mode="lines",
+                line=dict(color="#f97316", width=2.5),
+                fill="tozeroy",
+                fillcolor="rgba(249,115,22,0.12)",
+                name="Congestion Index (EMA)",
+            )
+        )
 
     fig.update_layout(
         **_base_layout,
@@ -0,0 +1,163 @@
+"""
+Speed and queue-length estimation from tracked vehicles.
+A user-supplied image→ground-plane homography turns each track's bottom
+centre and pixel velocity into metres and km/h; stationary vehicles close to
+each other form queue chains. Everything is NumPy over all active tracks of
+a frame.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from .analyzer import congestion_info
+
+# ─────────────────────────────────────────────
+STOPPED_KMH = 5.0      # di bawah ini kendaraan dianggap berhenti
+QUEUE_GAP_M = 10.0     # jarak maksimum antar kendaraan berhenti dalam satu antrean
+FREE_FLOW_KMH = 40.0   # kecepatan arus bebas (indeks kecepatan = 0)
+SPEED_WEIGHT = 0.5     # bobot indeks kecepatan pada indeks kemacetan gabungan
+VELOCITY_STEP_SEC = 0.25   # langkah linearisasi homografi untuk kecepatan
+# ─────────────────────────────────────────────
+
+
+class MotionEstimator:
+    """
+    ``image_points`` are normalized (0–1) frame coordinates of at least four
+    ground-plane reference points whose positions in metres are
+    ``world_points`` (e.g. lane-marking corners).
+
+    ``update(tracks, w, h, density_index)`` takes
+    ``VehicleTracker.active_tracks()`` and returns per-frame motion metrics
+    with a congestion index blended from the density-based index and the
+    measured mean speed.
+    """
+
+    def __init__(
+        self,
+        image_points: list[tuple[float, float]],
+        world_points: list[tuple[float, float]],
+        stopped_kmh: float = STOPPED_KMH,
+        queue_gap_m: float = QUEUE_GAP_M,
+        free_flow_kmh: float = FREE_FLOW_KMH,
+        speed_weight: float = SPEED_WEIGHT,
+    ):
+        if len(image_points) < 4 or len(image_points) != len(world_points):
+            raise ValueError("Homography needs at least 4 matching image/world points")
+        H, _ = cv2.findHomography(
+            np.asarray(image_points, dtype=np.float64),
+            np.asarray(world_points, dtype=np.float64),
+        )
+        if H is None:
+            raise ValueError("Reference points are degenerate (collinear?)")
+        self.H = H
+        self.stopped_kmh = stopped_kmh
+        self.queue_gap_m = queue_gap_m
+        self.free_flow_kmh = free_flow_kmh
+        self.speed_weight = speed_weight
+
+    def update(self, tracks: dict[str, np.ndarray], w: int, h: int, density_index: float) -> dict:
+        boxes, vel = tracks["boxes"], tracks["velocity"]
+        n = len(boxes)
+        if not n:
+            return self._summary(tracks["ids"], np.empty(0), np.empty((0, 2)), density_index)
+
+        # Titik kontak ke jalan (tengah bawah) dan kecepatannya dalam px/detik
+        foot = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+        foot_vel = np.stack([vel[:, 0], vel[:, 1] + vel[:, 3] / 2], axis=1)
+        scale = np.array([w, h], dtype=np.float64)
+        world = self.to_world(foot / scale)
+        ahead = self.to_world((foot + foot_vel * VELOCITY_STEP_SEC) / scale)
+        speed_kmh = np.linalg.norm(ahead - world, axis=1) / VELOCITY_STEP_SEC * 3.6
+        return self._summary(tracks["ids"], speed_kmh, world, density_index)
+
+    def to_world(self, points: np.ndarray) -> np.ndarray:
+        """Normalized image points (N, 2) → ground-plane metres (N, 2)."""
+        homo = np.concatenate([points, np.ones((len(points), 1))], axis=1) @ self.H.T
+        return homo[:, :2] / homo[:, 2:3]
+
+    @staticmethod
+    def stat_row(motion: dict) -> dict:
+        """Extra ``frame_stats`` columns for one ``update`` result."""
+        return {
+            "speed_kmh":          motion["mean_speed_kmh"],
+            "stopped":            motion["stopped"],
+            "queue_vehicles":     motion["queue_vehicles"],
+            "queue_m":            motion["queue_length_m"],
+            "density_congestion": motion["density_index"],
+        }
+
+    # ── Internals ──────────────────────────────────────────────
+    def _summary(self, ids, speed_kmh, world, density_index) -> dict:
+        stopped = speed_kmh < self.stopped_kmh
+        queue_n, queue_m = self._longest_queue(world[stopped])
+        if len(speed_kmh):
+            mean_speed = float(speed_kmh.mean())
+            speed_index = 100.0 * float(np.clip(1 - mean_speed / self.free_flow_kmh, 0, 1))
+            ci = (1 - self.speed_weight) * density_index + self.speed_weight * speed_index
+        else:
+            mean_speed, speed_index, ci = None, None, density_index
+        return {
+            "track_ids":        ids,
+            "speeds_kmh":       speed_kmh,
+            "mean_speed_kmh":   round(mean_speed, 1) if mean_speed is not None else None,
+            "median_speed_kmh": round(float(np.median(speed_kmh)), 1) if len(speed_kmh) else None,
+            "stopped":          int(stopped.sum()),
+            "queue_vehicles":   queue_n,
+            "queue_length_m":   round(queue_m, 1),
+            "speed_index":      round(speed_index, 1) if speed_index is not None else None,
+            "density_index":    density_index,
+            "congestion":       congestion_info(min(100.0, ci)),
+        }
+
+    def _longest_queue(self, pts: np.ndarray) -> tuple[int, float]:
+        """
+        Chains of stopped vehicles linked by gaps ≤ ``queue_gap_m``
+        (connected components by label propagation). Returns (vehicles,
+        span in metres) of the longest chain; one stopped vehicle is no queue.
+        """
+        k = len(pts)
+        if k < 2:
+            return 0, 0.0
+        dist = np.linalg.norm(pts[:, None] - pts[None], axis=2)
+        adj = dist <= self.queue_gap_m
+        labels = np.arange(k)
+        while True:
+            new = np.where(adj, labels[None, :], k).min(axis=1)
+            if np.array_equal(new, labels):
+                break
+            labels = new
+        best_n, best_m = 0, 0.0
+        for lab in np.unique(labels):
+            members = labels == lab
+            n = int(members.sum())
+            if n < 2:
+                continue
+            span = float(dist[np.ix_(members, members)].max())
+            if span > best_m or (span == best_m and n > best_n):
+                best_n, best_m = n, span
+        return best_n, best_m
+
+
+def parse_calibration(text: str) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+    """
+    One reference point per line, image position in percent and ground
+    position in metres: ``20,80 -> 0,0``.
+    """
+    image_pts, world_pts = [], []
+    for raw in text.splitlines():
+        raw = raw.strip()
+        if not raw or raw.startswith("#"):
+            continue
+        img, sep, world = raw.partition("->")
+        try:
+            x, y = (float(v) / 100 for v in img.split(","))
+            wx, wy = (float(v) for v in world.split(","))
+        except ValueError:
+            raise ValueError(f"Format titik: 'x,y -> X,Y': {raw!r}") from None
+        if not sep:
+            raise ValueError(f"Format titik: 'x,y -> X,Y': {raw!r}")
+        image_pts.append((x, y))
+        world_pts.append((wx, wy))
+    return image_pts, world_pts
@@ -0,0 +1,296 @@
+"""
+Lean ONNX Runtime backend.
+Runs the exported YOLO graph directly with NumPy letterbox preprocessing and
+vectorized NMS — no ultralytics / torch import on the hot path.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import time
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from .cache import CACHE_DIR, file_hash
+from .profiling import NULL_PROFILER
+
+# ─────────────────────────────────────────────
+DEFAULT_IMGSZ = 640
+LETTERBOX_COLOR = (114, 114, 114)
+MAX_NMS_CANDIDATES = 30_000   # kandidat maksimum sebelum NMS (sama dgn ultralytics)
+MAX_DETECTIONS = 300
+CLASS_OFFSET = 7680           # geser box per kelas supaya NMS tidak lintas kelas
+OPTIMIZED_SUFFIX = ".opt.onnx"  # graph hasil optimasi ORT, disimpan di samping model
+# Cadangan bila folder model read-only (di luar CACHE_DIR: eviction LRU hanya untuk file)
+GRAPH_CACHE_DIR = os.environ.get("TRAFFIC_VISION_GRAPH_DIR", CACHE_DIR + "-graphs")
+# ─────────────────────────────────────────────
+
+
+class OnnxDetector:
+    """
+    YOLO detector on top of ``onnxruntime.InferenceSession``.
+
+    ``detect`` takes BGR frames and returns, per frame, ``(boxes, scores,
+    class_ids)`` arrays with boxes as ``xyxy`` in original image pixels.
+
+    With ``cache_optimized`` the graph is optimized up to
+    ``ORT_ENABLE_EXTENDED`` on first load and serialized next to the model
+    (``best.<key>.opt.onnx``, keyed by model hash, ORT version and providers;
+    ``GRAPH_CACHE_DIR`` when the model's folder is read-only). Those
+    optimizations do not depend on the CPU, so the file is safe to share;
+    the hardware-specific layout transforms of ``ORT_ENABLE_ALL`` are
+    applied again every time the file is loaded. ``load_sec`` /
+    ``optimized_path`` / ``optimized_cache_hit`` describe how the session
+    was created.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        providers: list[str] | None = None,
+        intra_op_threads: int | None = None,
+        cache_optimized: bool = True,
+        inter_op_threads: int | None = None,
+    ):
+        self.model_path = model_path
+        providers = providers or ["CPUExecutionProvider"]
+        self.optimized_path: str | None = None
+        self.optimized_cache_hit = False
+
+        t0 = time.perf_counter()
+        self.session = None
+        if cache_optimized:
+            self.optimized_path = optimized_graph_path(model_path, providers)
+        if self.optimized_path is not None:
+            self.optimized_cache_hit = os.path.exists(self.optimized_path)
+            if not self.optimized_cache_hit:
+                _save_optimized(model_path, providers, self.optimized_path)
+            if os.path.exists(self.optimized_path):
+                try:
+                    self.session = self._create_session(
+                        self.optimized_path, providers, intra_op_threads, inter_op_threads,
+                    )
+                except Exception:
+                    _remove_quietly(self.optimized_path)   # file rusak → buat ulang
+                    self.optimized_cache_hit = False
+        if self.session is None:
+            self.session = self._create_session(
+                model_path, providers, intra_op_threads, inter_op_threads,
+            )
+        self.load_sec = time.perf_counter() - t0
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.output_name = self.session.get_outputs()[0].name
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        imgsz = _parse_imgsz(meta.get("imgsz"))
+        b, _, h, w = inp.shape
+        self.imgsz = (
+            h if isinstance(h, int) else imgsz[0],
+            w if isinstance(w, int) else imgsz[1],
+        )
+        # Export statis (batch=1) → jalankan per frame, dinamis → satu panggilan
+        self.max_batch = b if isinstance(b, int) else None
+
+    def detect(
+        self,
+        images: list[np.ndarray],
+        conf: float = 0.4,
+        iou: float = 0.5,
+        profiler=None,
+    ) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """``profiler`` splits the call into preprocess / inference / postprocess."""
+        if not images:
+            return []
+        prof = profiler or NULL_PROFILER
+        with prof.stage("preprocess"):
+            tensors, metas = zip(*(letterbox(img, self.imgsz) for img in images))
+            blob = np.stack(tensors)
+
+        step = self.max_batch or len(images)
+        with prof.stage("inference"):
+            preds = [
+                self.session.run([self.output_name], {self.input_name: blob[i:i + step]})[0]
+                for i in range(0, len(images), step)
+            ]
+            preds = np.concatenate(preds, axis=0)
+
+        out = []
+        with prof.stage("postprocess"):
+            for pred, (gain, pad), img in zip(preds, metas, images):
+                boxes, scores, class_ids = postprocess(pred, conf, iou)
+                boxes = scale_boxes(boxes, gain, pad, img.shape[:2])
+                out.append((boxes, scores, class_ids))
+        return out
+
+    @staticmethod
+    def _create_session(path, providers, intra_op_threads, inter_op_threads):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            if inter_op_threads > 1:   # cabang graph independen berjalan paralel
+                options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        return ort.InferenceSession(path, sess_options=options, providers=providers)
+
+
+def optimized_graph_path(model_path: str, providers: list[str]) -> str | None:
+    """
+    Cache path of the optimized graph for this model file, ORT build and
+    providers: an existing file next to the model or in ``GRAPH_CACHE_DIR``,
+    else the first of those folders that is writable. ``None`` when neither is.
+    """
+    key = hashlib.sha256(
+        f"{file_hash(model_path)}|{ort.__version__}|{','.join(providers)}".encode()
+    ).hexdigest()[:16]
+    stem = os.path.splitext(model_path)[0]
+    candidates = [
+        f"{stem}.{key}{OPTIMIZED_SUFFIX}",
+        os.path.join(GRAPH_CACHE_DIR, f"{os.path.basename(stem)}.{key}{OPTIMIZED_SUFFIX}"),
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    for path in candidates:
+        folder = os.path.dirname(path) or "."
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError:
+            continue
+        if os.access(folder, os.W_OK):
+            return path
+    return None
+
+
+def _save_optimized(model_path: str, providers: list[str], path: str) -> None:
+    """
+    Serialize ``model_path`` optimized up to ``ORT_ENABLE_EXTENDED`` (no
+    CPU-specific layout transforms) to ``path``. Written to a temp file and
+    renamed, so other processes never read a half-written graph; failures
+    leave no file and the caller loads the original model instead.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = tmp
+    try:
+        ort.InferenceSession(model_path, sess_options=options, providers=providers)
+        os.replace(tmp, path)
+    except Exception:
+        _remove_quietly(tmp)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _parse_imgsz(value: str | None) -> tuple[int, int]:
+    if not value:
+        return DEFAULT_IMGSZ, DEFAULT_IMGSZ
+    size = ast.literal_eval(value)
+    if isinstance(size, int):
+        return size, size
+    return int(size[0]), int(size[1])
+
+
+def letterbox(
+    image: np.ndarray,
+    imgsz: tuple[int, int],
+) -> tuple[np.ndarray, tuple[float, tuple[float, float]]]:
+    """
+    Resize a BGR frame keeping aspect ratio, pad to ``imgsz`` and return a
+    normalized RGB CHW float32 tensor plus (gain, (pad_w, pad_h)).
+    """
+    h0, w0 = image.shape[:2]
+    th, tw = imgsz
+    gain = min(th / h0, tw / w0)
+    nh, nw = int(round(h0 * gain)), int(round(w0 * gain))
+    pad_w, pad_h = (tw - nw) / 2, (th - nh) / 2
+
+    if (nh, nw) != (h0, w0):
+        image = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    image = cv2.copyMakeBorder(
+        image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR
+    )
+
+    tensor = image[:, :, ::-1].transpose(2, 0, 1)   # BGR HWC → RGB CHW
+    tensor = np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+    return tensor, (gain, (left, top))
+
+
+def postprocess(
+    pred: np.ndarray,
+    conf: float,
+    iou: float,
+    max_det: int = MAX_DETECTIONS,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode one raw YOLO output of shape (4 + nc, N) — or (N, 4 + nc) — into
+    ``xyxy`` boxes, scores and class ids in letterboxed pixel space.
+    """
+    if pred.shape[0] < pred.shape[1]:
+        pred = pred.T                                   # → (N, 4 + nc)
+    class_scores = pred[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(pred)), class_ids]
+
+    keep = scores >= conf
+    pred, scores, class_ids = pred[keep], scores[keep], class_ids[keep]
+    if len(scores) > MAX_NMS_CANDIDATES:
+        top = np.argpartition(-scores, MAX_NMS_CANDIDATES)[:MAX_NMS_CANDIDATES]
+        pred, scores, class_ids = pred[top], scores[top], class_ids[top]
+
+    cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    idx = nms(boxes + class_ids[:, None] * CLASS_OFFSET, scores, iou)[:max_det]
+    return (
+        boxes[idx].astype(np.float32),
+        scores[idx].astype(np.float32),
+        class_ids[idx].astype(np.int64),
+    )
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float) -> np.ndarray:
+    """Greedy NMS; IoU of the current best box against all remaining boxes is vectorized."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        iw = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        ih = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = iw * ih
+        overlap = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[overlap <= iou_thresh]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def scale_boxes(
+    boxes: np.ndarray,
+    gain: float,
+    pad: tuple[float, float],
+    shape: tuple[int, int],
+) -> np.ndarray:
+    """Map letterboxed ``xyxy`` boxes back to original (h, w) image pixels."""
+    if not len(boxes):
+        return boxes.reshape(0, 4)
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / gain).clip(0, shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / gain).clip(0, shape[0])
+    return boxes
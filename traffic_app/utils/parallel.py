@@ -0,0 +1,209 @@
+"""
+Multi-process video analysis.
+Splits a video into seek-aligned time segments, analyzes them in a process
+pool (one model session per worker) and merges the results back in order.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+import cv2
+
+from .analyzer import VideoOptions, load_model, process_video_file
+from .profiling import NULL_PROFILER, StageProfiler
+
+# Model per proses worker — dimuat sekali oleh initializer
+_worker_model = None
+
+
+def process_video_parallel(
+    model_path: str,
+    video_path: str,
+    options: VideoOptions | None = None,
+    workers: int | None = None,
+    backend: str = "onnxruntime",
+    threads_per_worker: int | None = None,
+    write_video: bool = True,
+    on_progress=None,
+    profiler=None,
+    model=None,
+) -> tuple[str | None, list[dict]]:
+    """
+    Parallel counterpart of ``process_video_file``. Returns
+    (output_path, frame_stats) with rows in frame order.
+
+    Segment boundaries are multiples of ``options.sample_every``, so the
+    sampled frames are exactly the ones the sequential run would analyze.
+    Each worker loads its own model with ``threads_per_worker`` inference
+    threads (default: cores / workers). ``on_progress(done, total)`` is
+    called in the caller's thread as segments finish. Each worker profiles
+    its segment and the reports are merged into ``profiler`` (stage time is
+    then summed over workers, so shares can exceed 100 %).
+
+    Segmenting needs an exact frame count. When the container reports none
+    or a wrong one (see ``reliable_frame_count``) the video is analyzed
+    sequentially with ``process_video_file`` instead, using ``model`` if
+    given, else a model loaded here.
+
+    Trackers and adaptive samplers keep per-run state and are not supported
+    here, since each segment starts from scratch.
+    """
+    o = options or VideoOptions()
+    cap = cv2.VideoCapture(video_path)
+    total = reliable_frame_count(cap)
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    if total is None:
+        if model is None:
+            model = load_model(model_path, backend, warmup_runs=1)
+        out_path, frame_stats = process_video_file(
+            model, video_path, replace(o, pipelined=True), write_video, profiler=profiler,
+        )
+        if on_progress is not None:
+            on_progress(1, 1)
+        return out_path, frame_stats
+    if o.max_frames is not None:
+        total = min(total, o.max_frames)
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, workers or cpus)
+    threads = threads_per_worker or max(1, cpus // workers)
+    segments = split_segments(total, workers, o.sample_every)
+    if not segments:
+        return None, []
+
+    ctx = mp.get_context("spawn")   # fork + thread pool OpenCV/ORT tidak aman
+    results: dict[int, tuple[list[dict], str | None, dict]] = {}
+    futures = {}
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(segments)),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model_path, backend, threads),
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _run_segment, video_path,
+                    replace(o, start_frame=start, max_frames=end, pipelined=True), write_video,
+                ): i
+                for i, (start, end) in enumerate(segments)
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if profiler is not None:
+                        profiler.merge(results[futures[future]][2])
+                    if on_progress is not None:
+                        on_progress(len(results), len(segments))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        frame_stats = [row for i in range(len(segments)) for row in results[i][0]]
+        frame_stats.sort(key=lambda row: row["frame"])
+
+        out_path = None
+        if write_video:
+            parts = [results[i][1] for i in range(len(segments))]
+            with (profiler or NULL_PROFILER).stage("concat"):
+                out_path = concat_videos(parts, fps, size)
+        return out_path, frame_stats
+    finally:
+        # Video segmen sementara dihapus juga bila ada worker yang gagal
+        for future in futures:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            part = future.result()[1]
+            if part and os.path.exists(part):
+                os.remove(part)
+
+
+def reliable_frame_count(cap: cv2.VideoCapture) -> int | None:
+    """
+    ``CAP_PROP_FRAME_COUNT`` if it can be trusted, else ``None``: many
+    containers and streams report 0 or an estimate. The count is accepted
+    only when its last frame can be read and no frame follows it.
+    """
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total <= 0:
+        return None
+    cap.set(cv2.CAP_PROP_POS_FRAMES, total - 1)
+    if not cap.grab():
+        return None
+    if cap.grab():   # masih ada frame setelah "frame terakhir"
+        return None
+    return total
+
+
+def split_segments(total: int, n: int, align: int = 1) -> list[tuple[int, int]]:
+    """Split ``[0, total)`` into up to ``n`` ranges whose starts are multiples of ``align``."""
+    if total <= 0:
+        return []
+    align = max(1, int(align))
+    step = -(-total // max(1, n))                 # ceil
+    step = -(-step // align) * align              # bulatkan ke kelipatan align
+    return [(start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def concat_videos(parts: list[str], fps: int, size: tuple[int, int]) -> str:
+    """
+    Join segment videos in order. Uses ffmpeg's concat demuxer (stream copy)
+    when available, otherwise re-encodes through OpenCV.
+    """
+    out_path = tempfile.mktemp(suffix=".mp4")
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.writelines(f"file '{os.path.abspath(p)}'\n" for p in parts)
+            list_path = f.name
+        try:
+            subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                 "-i", list_path, "-c", "copy", out_path],
+                check=True,
+            )
+            return out_path
+        except subprocess.CalledProcessError:
+            pass
+        finally:
+            os.remove(list_path)
+
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    try:
+        for part in parts:
+            cap = cv2.VideoCapture(part)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+            cap.release()
+    finally:
+        writer.release()
+    return out_path
+
+
+def _init_worker(model_path: str, backend: str, threads: int) -> None:
+    global _worker_model
+    cv2.setNumThreads(1)
+    _worker_model = load_model(model_path, backend, threads=threads, warmup_runs=1)
+
+
+def _run_segment(
+    video_path: str, options: VideoOptions, write_video: bool,
+) -> tuple[list[dict], str | None, dict]:
+    profiler = StageProfiler()
+    out_path, frame_stats = process_video_file(
+        _worker_model, video_path, options, write_video, profiler=profiler,
+    )
+    return frame_stats, out_path, profiler.report()
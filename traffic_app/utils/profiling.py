@@ -0,0 +1,172 @@
+"""
+Per-stage timers and counters for the analysis pipeline.
+Each measurement is two ``perf_counter`` calls and a dict update under a
+lock, cheap enough to stay on for every run. The same data is available as
+a structured report and as Prometheus text exposition.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# ─────────────────────────────────────────────
+STAGES = (
+    "decode", "sampling", "decode_wait", "queue_wait", "preprocess", "inference", "postprocess",
+    "tracking", "encode_wait", "overlay", "encode",
+)
+PROMETHEUS_PREFIX = "traffic_vision"
+# ─────────────────────────────────────────────
+
+
+class StageProfiler:
+    """
+    Thread-safe accumulator of stage durations, counters and gauges.
+
+    ``stage(name)`` times a ``with`` block; ``incr`` bumps a counter such as
+    ``frames_decoded``; ``gauge`` records the last and peak value of e.g. a
+    queue depth. In pipelined runs stages overlap in different threads, so
+    their shares of the wall time may add up to more than 100 %.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._end: float | None = None
+        self._time: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+        self._max: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, tuple[float, float]] = {}   # nama → (terakhir, puncak)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self._time[name] = self._time.get(name, 0.0) + seconds
+            self._calls[name] = self._calls.get(name, 0) + calls
+            if seconds / max(calls, 1) > self._max.get(name, 0.0):
+                self._max[name] = seconds / max(calls, 1)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            peak = self.gauges.get(name, (0, value))[1]
+            self.gauges[name] = (value, max(peak, value))
+
+    def stop(self) -> None:
+        """Freeze the wall clock used for stage shares (end of a run)."""
+        self._end = time.perf_counter()
+
+    def report(self) -> dict:
+        """
+        ``{"wall_sec", "stages": {name: {calls, total_ms, mean_ms, max_ms,
+        share}}, "counters", "gauges": {name: {last, max}}}``; stages in
+        pipeline order, unknown names last.
+        """
+        wall = (self._end or time.perf_counter()) - self._start
+        with self._lock:
+            names = [s for s in STAGES if s in self._time]
+            names += sorted(set(self._time) - set(STAGES))
+            stages = {
+                name: {
+                    "calls":    self._calls[name],
+                    "total_ms": round(self._time[name] * 1000, 3),
+                    "mean_ms":  round(self._time[name] * 1000 / max(self._calls[name], 1), 3),
+                    "max_ms":   round(self._max.get(name, 0.0) * 1000, 3),
+                    "share":    round(self._time[name] / wall, 4) if wall > 0 else 0.0,
+                }
+                for name in names
+            }
+            return {
+                "wall_sec": round(wall, 3),
+                "stages":   stages,
+                "counters": dict(self.counters),
+                "gauges":   {k: {"last": v[0], "max": v[1]} for k, v in self.gauges.items()},
+            }
+
+    def merge(self, report: dict) -> None:
+        """Add another profiler's ``report()``, e.g. from a worker process."""
+        with self._lock:
+            for name, s in report.get("stages", {}).items():
+                self._time[name] = self._time.get(name, 0.0) + s["total_ms"] / 1000
+                self._calls[name] = self._calls.get(name, 0) + s["calls"]
+                self._max[name] = max(self._max.get(name, 0.0), s["max_ms"] / 1000)
+            for name, n in report.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            for name, g in report.get("gauges", {}).items():
+                peak = max(self.gauges.get(name, (0, 0))[1], g["max"])
+                self.gauges[name] = (g["last"], peak)
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return to_prometheus(self.report(), prefix)
+
+    def write_prometheus(self, path: str, prefix: str = PROMETHEUS_PREFIX) -> None:
+        """Write the exposition to ``path``, e.g. for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp, path)   # atomik: collector tidak pernah membaca file setengah jadi
+
+
+class _NullProfiler:
+    """Drop-in for ``StageProfiler`` that records nothing."""
+
+    enabled = False
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        pass
+
+    def incr(self, name: str, n: int = 1) -> None:
+        pass
+
+    def gauge(self, name: str, value: float) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def to_prometheus(report: dict, prefix: str = PROMETHEUS_PREFIX) -> str:
+    """Render a ``StageProfiler.report()`` as Prometheus text."""
+    lines = [
+        f"# HELP {prefix}_stage_seconds_total Time spent per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds_total counter",
+    ]
+    for name, s in report["stages"].items():
+        lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {s["total_ms"] / 1000:.6f}')
+    lines += [
+        f"# HELP {prefix}_stage_calls_total Measurements per pipeline stage.",
+        f"# TYPE {prefix}_stage_calls_total counter",
+    ]
+    for name, s in report["stages"].items():
+        lines.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {s["calls"]}')
+    for name, n in sorted(report["counters"].items()):
+        lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {n}"]
+    for name, g in sorted(report["gauges"].items()):
+        lines += [
+            f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {g['last']}",
+            f"# TYPE {prefix}_{name}_max gauge", f"{prefix}_{name}_max {g['max']}",
+        ]
+    lines += [f"# TYPE {prefix}_uptime_seconds gauge", f"{prefix}_uptime_seconds {report['wall_sec']}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,82 @@
+"""
+Adaptive frame sampling for the video path.
+Decides in the decode loop which frames are worth a model call, using a
+cheap downscaled grayscale difference against the last analyzed frame.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+# ─────────────────────────────────────────────
+THUMB_SIZE = (64, 36)      # (w, h) thumbnail untuk sinyal perubahan scene
+THRESHOLD = 6.0            # rata-rata selisih abs (0–255) yang dianggap berubah
+MIN_GAP = 1                # jarak minimum antar frame yang dianalisis
+MAX_GAP = 30               # jarak maksimum — paksa analisis walau scene diam
+# ─────────────────────────────────────────────
+
+
+class FixedSampler:
+    """Analyze every ``sample_every``-th frame (the classic stride)."""
+
+    def __init__(self, sample_every: int = 3):
+        self.sample_every = max(1, int(sample_every))
+
+    def needs_pixels(self, fc: int) -> bool:
+        return fc % self.sample_every == 0
+
+    def should_sample(self, fc: int, frame: np.ndarray) -> bool:
+        return fc % self.sample_every == 0
+
+
+class SceneChangeSampler:
+    """
+    Analyze a frame when its thumbnail differs from the last analyzed one by
+    more than ``threshold``, never sooner than ``min_gap`` frames and never
+    later than ``max_gap`` frames after the previous analysis.
+    """
+
+    def __init__(
+        self,
+        threshold: float = THRESHOLD,
+        min_gap: int = MIN_GAP,
+        max_gap: int = MAX_GAP,
+        thumb_size: tuple[int, int] = THUMB_SIZE,
+    ):
+        self.threshold = threshold
+        self.min_gap = max(1, int(min_gap))
+        self.max_gap = max(self.min_gap, int(max_gap))
+        self.thumb_size = thumb_size
+        self._ref: np.ndarray | None = None
+        self._last_fc: int | None = None
+        self.frames_seen = 0
+        self.frames_sampled = 0
+
+    def needs_pixels(self, fc: int) -> bool:
+        """False while still inside ``min_gap`` — the frame can be skipped undecoded."""
+        return self._last_fc is None or fc - self._last_fc >= self.min_gap
+
+    def should_sample(self, fc: int, frame: np.ndarray) -> bool:
+        self.frames_seen += 1
+        if not self.needs_pixels(fc):
+            return False
+
+        thumb = self._thumbnail(frame)
+        if self._ref is not None and fc - self._last_fc < self.max_gap:
+            diff = float(cv2.absdiff(thumb, self._ref).mean())
+            if diff < self.threshold:
+                return False
+
+        self._ref = thumb
+        self._last_fc = fc
+        self.frames_sampled += 1
+        return True
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        # Subsample dulu (view tanpa salin) agar resize tidak membaca tiap piksel
+        step = max(1, min(frame.shape[0] // (self.thumb_size[1] * 4),
+                          frame.shape[1] // (self.thumb_size[0] * 4)))
+        small = cv2.resize(frame[::step, ::step], self.thumb_size,
+                           interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
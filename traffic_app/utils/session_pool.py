@@ -0,0 +1,176 @@
+"""
+Inference session pool for concurrent callers.
+Streamlit runs every browser session in its own thread; sharing one model
+either serializes them or lets each run oversubscribe the cores with its own
+intra-op threads. The pool holds ``size`` independent model instances, each
+with an explicit thread budget, and hands them out one caller at a time, so
+at most ``size`` inferences run at once and the rest wait in line.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from .analyzer import Detections, _split_ultralytics_time, load_model
+from .profiling import NULL_PROFILER
+
+# ─────────────────────────────────────────────
+# Pengaturan tingkat proses (dibaca sekali saat import), bukan per pengguna
+POOL_SIZE = int(os.environ.get("TRAFFIC_VISION_POOL_SIZE", "2"))   # sesi yang berjalan bersamaan
+INTRA_OP_THREADS = int(os.environ.get("TRAFFIC_VISION_INTRA_OP_THREADS", "0")) or None   # 0: core ÷ sesi
+INTER_OP_THREADS = int(os.environ.get("TRAFFIC_VISION_INTER_OP_THREADS", "1"))
+ACQUIRE_TIMEOUT_SEC = 120.0
+WAIT_SAMPLES = 512         # sampel waktu tunggu terakhir untuk persentil
+# ─────────────────────────────────────────────
+
+
+def default_threads(size: int) -> int:
+    """Intra-op threads per session so that ``size`` sessions fill the cores once."""
+    return max(1, (os.cpu_count() or 1) // max(1, size))
+
+
+class SessionPool:
+    """
+    ``size`` models loaded with ``load_model(model_path, backend, ...)``,
+    each with ``intra_op_threads`` (default: cores / size) and
+    ``inter_op_threads``. The idle-instance queue doubles as the bounded
+    concurrency semaphore: ``session()`` blocks until an instance is free
+    and raises ``TimeoutError`` after ``timeout`` seconds.
+
+    Only ``onnxruntime`` sessions carry their own thread pools. torch's
+    thread settings are process-wide, so for ``ultralytics`` the pool holds
+    a single model behind the same semaphore (``size`` is forced to 1) and
+    ``intra_op_threads`` / ``inter_op_threads`` apply to the whole process.
+
+    The pool has the ``OnnxDetector.detect`` interface, so it can be passed
+    as ``model`` to ``analyze_frame`` & co. Time spent waiting for a free
+    instance is recorded as the queue-wait metric (``stats()``) and, when a
+    ``profiler`` is given, as its ``queue_wait`` stage.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        backend: str = "onnxruntime",
+        size: int = POOL_SIZE,
+        intra_op_threads: int | None = INTRA_OP_THREADS,
+        inter_op_threads: int | None = INTER_OP_THREADS,
+        warmup_runs: int = 1,
+        timeout: float = ACQUIRE_TIMEOUT_SEC,
+        profiler=None,
+    ):
+        self.backend = backend
+        self.size = max(1, int(size)) if backend == "onnxruntime" else 1
+        self.intra_op_threads = intra_op_threads or default_threads(self.size)
+        self.inter_op_threads = inter_op_threads
+        self.timeout = timeout
+        self.profiler = profiler or NULL_PROFILER
+
+        self._models = [
+            load_model(
+                model_path, backend, threads=self.intra_op_threads,
+                inter_op_threads=inter_op_threads, warmup_runs=warmup_runs,
+            )
+            for _ in range(self.size)
+        ]
+        self._idle: queue.Queue = queue.Queue()
+        for model in self._models:
+            self._idle.put(model)
+
+        self._lock = threading.Lock()
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._calls = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waiting = 0
+        self._peak_waiting = 0
+
+        infos = [m.load_info for m in self._models]
+        self.load_info = {
+            **infos[0],
+            "load_sec":   round(sum(i["load_sec"] for i in infos), 3),
+            "warmup_sec": round(sum(i["warmup_sec"] for i in infos), 3),
+            "sessions":   self.size,
+        }
+
+    @contextmanager
+    def session(self, profiler=None):
+        """
+        Check out one model instance for the duration of the ``with`` block;
+        the wait is also added to ``profiler`` (e.g. a per-video profiler).
+        """
+        with self._lock:
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+        t0 = time.perf_counter()
+        try:
+            model = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No free inference session after {self.timeout:.0f}s ({self.size} in use)"
+            ) from None
+        finally:
+            wait = time.perf_counter() - t0
+            with self._lock:
+                self._waiting -= 1
+        self._record_wait(wait, profiler)
+        try:
+            yield model
+        finally:
+            self._idle.put(model)
+
+    def detect(
+        self,
+        images: list[np.ndarray],
+        conf: float = 0.4,
+        iou: float = 0.5,
+        profiler=None,
+    ) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        prof = profiler or NULL_PROFILER
+        with self.session(prof) as model:
+            if hasattr(model, "detect"):
+                return model.detect(images, conf=conf, iou=iou, profiler=prof)
+            t0 = time.perf_counter()
+            results = model.predict(source=images, conf=conf, iou=iou, verbose=False)
+            _split_ultralytics_time(prof, results, time.perf_counter() - t0)
+            dets = [Detections.from_results(r) for r in results]
+            return [(d.boxes, d.scores, d.class_ids) for d in dets]
+
+    @property
+    def in_use(self) -> int:
+        return self.size - self._idle.qsize()
+
+    def stats(self) -> dict:
+        """Pool occupancy and queue-wait metric (ms) over all checkouts."""
+        with self._lock:
+            waits = np.asarray(self._waits) * 1000 if self._waits else None
+            return {
+                "sessions":         self.size,
+                "intra_op_threads": self.intra_op_threads,
+                "inter_op_threads": self.inter_op_threads,
+                "in_use":           self.in_use,
+                "waiting":          self._waiting,
+                "peak_waiting":     self._peak_waiting,
+                "calls":            self._calls,
+                "mean_wait_ms":     round(self._wait_total * 1000 / self._calls, 2) if self._calls else 0.0,
+                "p95_wait_ms":      round(float(np.percentile(waits, 95)), 2) if waits is not None else 0.0,
+                "max_wait_ms":      round(self._wait_max * 1000, 2),
+            }
+
+    # ── Internals ──────────────────────────────────────────────
+    def _record_wait(self, wait: float, profiler=None) -> None:
+        with self._lock:
+            self._calls += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._waits.append(wait)
+        for prof in {id(p): p for p in (self.profiler, profiler) if p is not None}.values():
+            prof.add_time("queue_wait", wait)
+            prof.gauge("sessions_in_use", self.in_use)
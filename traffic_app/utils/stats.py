@@ -0,0 +1,210 @@
+"""
+Incremental statistics for congestion time series.
+Every estimator is updated in O(1) per sample and keeps O(1) state (the
+rolling window keeps only the samples inside its time span), so long or live
+runs never need the full history to smooth the timeline or build the summary.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+
+from .analyzer import congestion_info
+
+# ─────────────────────────────────────────────
+EMA_ALPHA = 0.3            # bobot sampel baru pada EMA indeks kemacetan
+HYSTERESIS_MARGIN = 5.0    # indeks harus melewati batas level sejauh ini
+LEVEL_BOUNDS = (20.0, 40.0, 60.0, 80.0)
+LEVELS = [congestion_info(v)["level"] for v in (0.0, *LEVEL_BOUNDS)]
+PERCENTILES = (0.5, 0.9, 0.95)
+# ─────────────────────────────────────────────
+
+
+class Ema:
+    def __init__(self, alpha: float = EMA_ALPHA):
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class RollingWindow:
+    """Mean and max over the last ``window_sec`` seconds (monotonic deque for max)."""
+
+    def __init__(self, window_sec: float):
+        self.window_sec = window_sec
+        self._items: deque[tuple[float, float]] = deque()
+        self._maxq: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+
+    def update(self, t: float, x: float) -> None:
+        self._items.append((t, x))
+        self._sum += x
+        while self._maxq and self._maxq[-1][1] <= x:
+            self._maxq.pop()
+        self._maxq.append((t, x))
+        horizon = t - self.window_sec
+        while self._items[0][0] < horizon:
+            self._sum -= self._items.popleft()[1]
+        while self._maxq[0][0] < horizon:
+            self._maxq.popleft()
+
+    @property
+    def mean(self) -> float | None:
+        return self._sum / len(self._items) if self._items else None
+
+    @property
+    def max(self) -> float | None:
+        return self._maxq[0][1] if self._maxq else None
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P² algorithm (Jain & Chlamtac,
+    1985): five markers, no stored samples. Exact for the first five.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self._q: list[float] = []
+        self._n = [1, 2, 3, 4, 5]
+        self._np = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._dn = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x: float) -> None:
+        q, n = self._q, self._n
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+        for i in (1, 2, 3):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = self._parabolic(i, d)
+                q[i] = qp if q[i - 1] < qp < q[i + 1] else self._linear(i, d)
+                n[i] += d
+
+    @property
+    def value(self) -> float | None:
+        q = self._q
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, max(0, math.ceil(self.p * len(q)) - 1))]
+        return q[2]
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+
+class LevelHysteresis:
+    """
+    Congestion level that only changes once the index is ``margin`` past a
+    level boundary, so values hovering at e.g. 60 do not flicker between
+    "Padat" and "Macet".
+    """
+
+    def __init__(self, margin: float = HYSTERESIS_MARGIN):
+        self.margin = margin
+        self._level: int | None = None
+
+    def update(self, x: float) -> str:
+        if self._level is None:
+            self._level = sum(x >= b for b in LEVEL_BOUNDS)
+        while self._level < len(LEVEL_BOUNDS) and x >= LEVEL_BOUNDS[self._level] + self.margin:
+            self._level += 1
+        while self._level > 0 and x < LEVEL_BOUNDS[self._level - 1] - self.margin:
+            self._level -= 1
+        return LEVELS[self._level]
+
+
+class CongestionStats:
+    """
+    Running summary of ``frame_stats`` rows.
+
+    ``update(row)`` returns the extra row columns ``congestion_smooth`` (EMA)
+    and ``congestion_level_smooth`` (hysteresis on the EMA); ``summary()``
+    gives mean/max/percentiles, the level histogram and rolling-window
+    values without looking at past rows.
+    """
+
+    def __init__(
+        self,
+        alpha: float = EMA_ALPHA,
+        window_sec: float = 60.0,
+        margin: float = HYSTERESIS_MARGIN,
+        percentiles: tuple[float, ...] = PERCENTILES,
+    ):
+        self.ema = Ema(alpha)
+        self.hysteresis = LevelHysteresis(margin)
+        self.window = RollingWindow(window_sec)
+        self.quantiles = {p: P2Quantile(p) for p in percentiles}
+        self.levels = {level: 0 for level in LEVELS}
+        self.samples = 0
+        self._sum_total = 0.0
+        self._sum_cong = 0.0
+        self._max_total = 0
+        self._max_cong = 0.0
+        self._last_level: str | None = None
+
+    def update(self, row: dict) -> dict:
+        ci, total = float(row["congestion_index"]), row["total"]
+        self.samples += 1
+        self._sum_total += total
+        self._sum_cong += ci
+        self._max_total = max(self._max_total, total)
+        self._max_cong = max(self._max_cong, ci)
+        self.levels[row["congestion_level"]] = self.levels.get(row["congestion_level"], 0) + 1
+        for est in self.quantiles.values():
+            est.update(ci)
+        self.window.update(row["time_sec"], ci)
+
+        smooth = self.ema.update(ci)
+        self._last_level = self.hysteresis.update(smooth)
+        return {
+            "congestion_smooth":       round(smooth, 1),
+            "congestion_level_smooth": self._last_level,
+        }
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"samples": 0}
+        n = self.samples
+        return {
+            "samples":           n,
+            "avg_total":         round(self._sum_total / n, 2),
+            "max_total":         self._max_total,
+            "avg_congestion":    round(self._sum_cong / n, 1),
+            "max_congestion":    round(self._max_cong, 1),
+            **{
+                f"p{round(p * 100)}_congestion": round(est.value, 1)
+                for p, est in self.quantiles.items()
+            },
+            "rolling_avg_congestion": round(self.window.mean, 1),
+            "rolling_max_congestion": round(self.window.max, 1),
+            "current_level":     self._last_level,
+            "dominant_level":    max(self.levels, key=self.levels.get),
+            "level_histogram":   dict(self.levels),
+        }
@@ -0,0 +1,283 @@
+"""
+Live stream ingestion.
+Reads any OpenCV source (RTSP/HTTP/MJPEG URL, device index or a looping
+file) in a background thread that keeps only the newest frame, so analysis
+latency stays bounded: frames that arrive while the model is busy are
+dropped instead of queued.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .analyzer import _frame_stat, analyze_frame
+from .profiling import NULL_PROFILER
+from .stats import RollingWindow
+
+# ─────────────────────────────────────────────
+RECONNECT_DELAY_SEC = 2.0   # jeda sebelum membuka ulang sumber yang putus
+READ_TIMEOUT_SEC = 5.0      # batas tunggu frame baru sebelum dianggap putus
+# ─────────────────────────────────────────────
+
+
+def open_source(source: str | int) -> cv2.VideoCapture:
+    """``VideoCapture`` for a URL/path, or a device index given as ``"0"``."""
+    if isinstance(source, str) and source.strip().isdigit():
+        source = int(source.strip())
+    cap = cv2.VideoCapture(source)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # jangan menumpuk frame di buffer driver
+    return cap
+
+
+def is_file_source(source: str | int) -> bool:
+    return isinstance(source, str) and "://" not in source and not source.strip().isdigit()
+
+
+class LatestFrameReader:
+    """
+    Background reader holding only the most recent frame.
+
+    ``read()`` blocks until a frame newer than the last one returned is
+    available and returns (frame_index, frame, arrival_time), the time
+    taken from ``time.perf_counter``; every frame overwritten before it was
+    read counts towards ``dropped``. File sources are paced at their native
+    fps so they behave like a camera, and restart from the beginning when
+    ``loop`` is set. Live sources are reopened after ``RECONNECT_DELAY_SEC``
+    when they stop delivering frames; ``reconnecting`` is set meanwhile.
+    ``read()`` returning ``None`` is only final once ``ended`` is set.
+    """
+
+    def __init__(self, source: str | int, loop: bool = False, reconnect: bool = True):
+        self.source = source
+        self.loop = loop
+        self.reconnect = reconnect
+        self.is_file = is_file_source(source)
+        self.fps = 0.0
+        self.frames_read = 0
+        self.dropped = 0
+        self._frame: np.ndarray | None = None
+        self._stamp = 0.0
+        self._index = -1
+        self._returned = -1
+        self._ended = False
+        self._reconnecting = False
+        self._error: str | None = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+
+        cap = open_source(source)
+        if not cap.isOpened():
+            raise IOError(f"Sumber video tidak bisa dibuka: {source}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self._thread = threading.Thread(
+            target=self._run, args=(cap,), name="tv-stream", daemon=True
+        )
+        self._thread.start()
+
+    def read(self, timeout: float = READ_TIMEOUT_SEC) -> tuple[int, np.ndarray, float] | None:
+        """
+        Newest unread frame, or None when the stream ended or no frame
+        arrived within ``timeout`` (e.g. while ``reconnecting``).
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._index > self._returned or self._ended, timeout=timeout
+            )
+            if self._index <= self._returned:
+                return None
+            self.dropped += self._index - self._returned - 1
+            self._returned = self._index
+            return self._index, self._frame, self._stamp
+
+    @property
+    def ended(self) -> bool:
+        return self._ended
+
+    @property
+    def reconnecting(self) -> bool:
+        return self._reconnecting
+
+    @property
+    def error(self) -> str | None:
+        return self._error
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "LatestFrameReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── Internals ──────────────────────────────────────────────
+    def _run(self, cap: cv2.VideoCapture) -> None:
+        interval = 1.0 / self.fps if self.is_file and self.fps > 0 else 0.0
+        next_due = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    cap.release()
+                    self._reconnecting = not self.is_file
+                    cap = self._reopen()
+                    if cap is None:
+                        break
+                    continue
+
+                if interval:
+                    next_due += interval
+                    delay = next_due - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        next_due = time.perf_counter()   # tertinggal: jangan mengejar
+                with self._cond:
+                    self._reconnecting = False
+                    self._frame = frame
+                    self._stamp = time.perf_counter()
+                    self._index += 1
+                    self.frames_read += 1
+                    self._cond.notify_all()
+        except Exception as exc:
+            self._error = f"{type(exc).__name__}: {exc}"
+        finally:
+            if cap is not None:   # None: ditutup saat menyambung ulang
+                cap.release()
+            with self._cond:
+                self._reconnecting = False
+                self._ended = True
+                self._cond.notify_all()
+
+    def _reopen(self) -> cv2.VideoCapture | None:
+        if self.is_file and not self.loop:
+            return None
+        if not self.is_file and not self.reconnect:
+            return None
+        while not self._stop.is_set():
+            if not self.is_file:
+                self._stop.wait(RECONNECT_DELAY_SEC)
+            cap = open_source(self.source)
+            if cap.isOpened():
+                return cap
+            cap.release()
+            if self.is_file:
+                self._error = f"Sumber video tidak bisa dibuka: {self.source}"
+                return None
+        return None
+
+
+class RollingMetrics:
+    """
+    Congestion summary over the last ``window_sec`` seconds of a stream,
+    maintained incrementally (running sums, monotonic max, level counts).
+    """
+
+    def __init__(self, window_sec: float = 60.0):
+        self.window_sec = float(window_sec)
+        self._times: deque[tuple[float, str]] = deque()
+        self._total = RollingWindow(self.window_sec)
+        self._cong = RollingWindow(self.window_sec)
+        self._levels: dict[str, int] = {}
+
+    def update(self, row: dict) -> dict:
+        t, level = row["time_sec"], row["congestion_level"]
+        self._times.append((t, level))
+        self._levels[level] = self._levels.get(level, 0) + 1
+        self._total.update(t, row["total"])
+        self._cong.update(t, row["congestion_index"])
+        horizon = t - self.window_sec
+        while self._times[0][0] < horizon:
+            old = self._times.popleft()[1]
+            self._levels[old] -= 1
+        return self.summary()
+
+    def summary(self) -> dict:
+        if not self._times:
+            return {"samples": 0}
+        n = len(self._times)
+        span = self._times[-1][0] - self._times[0][0]
+        return {
+            "samples":        n,
+            "window_sec":     self.window_sec,
+            "avg_total":      round(self._total.mean, 2),
+            "max_total":      self._total.max,
+            "avg_congestion": round(self._cong.mean, 1),
+            "max_congestion": self._cong.max,
+            "dominant_level": max(self._levels, key=self._levels.get),
+            "analyzed_fps":   round((n - 1) / span, 2) if span > 0 else 0.0,
+        }
+
+
+def iter_stream(
+    model,
+    source: str | int,
+    conf: float = 0.4,
+    iou: float = 0.5,
+    window_sec: float = 60.0,
+    max_seconds: float | None = None,
+    loop: bool = False,
+    tracker=None,
+    stop_event: threading.Event | None = None,
+    stats=None,
+    profiler=None,
+):
+    """
+    Analyze a live source continuously, always on the newest frame.
+
+    Yields dicts with ``stat`` (a ``process_video_file`` row, ``time_sec``
+    being wall-clock seconds since start), ``result``, ``frame`` (BGR),
+    ``frame_index`` (index in the source), ``rolling`` (``RollingMetrics``
+    summary), ``dropped`` and ``latency_ms`` (frame arrival to result).
+    Stops after ``max_seconds``, when ``stop_event`` is set, or when the
+    source ends; an outage of a live source (reconnect in progress) is
+    waited out. ``stats`` is an optional ``utils.stats.CongestionStats``
+    updated with every row; ``profiler`` an optional
+    ``utils.profiling.StageProfiler`` (model stages, tracking,
+    ``frames_inferred`` and the ``frames_dropped`` gauge).
+    """
+    prof = profiler or NULL_PROFILER
+    rolling = RollingMetrics(window_sec)
+    with LatestFrameReader(source, loop=loop) as reader:
+        t0 = time.perf_counter()
+        while stop_event is None or not stop_event.is_set():
+            elapsed = time.perf_counter() - t0
+            if max_seconds is not None and elapsed >= max_seconds:
+                break
+            item = reader.read()
+            if item is None:
+                if not reader.ended:
+                    continue   # sumber live sedang tersambung ulang / lambat
+                if reader.error:
+                    raise IOError(reader.error)
+                break
+            index, frame, arrived = item
+            t = max(0.0, arrived - t0)
+
+            result = analyze_frame(model, frame, conf, iou, annotate=False, profiler=prof)
+            prof.incr("frames_inferred")
+            prof.gauge("frames_dropped", reader.dropped)
+            stat = _frame_stat(index, 1, result)
+            stat["time_sec"] = round(t, 2)
+            with prof.stage("tracking"):
+                if tracker is not None:
+                    result["track_ids"] = tracker.update(result["detections"], t)
+                    stat.update(tracker.stat_row())
+                if stats is not None:
+                    stat.update(stats.update(stat))
+
+            yield {
+                "stat":        stat,
+                "result":      result,
+                "frame":       frame,
+                "frame_index": index,
+                "rolling":     rolling.update(stat),
+                "dropped":     reader.dropped,
+                "latency_ms":  round((time.perf_counter() - arrived) * 1000, 1),
+            }
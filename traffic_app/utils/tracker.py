@@ -0,0 +1,253 @@
+"""
+Lightweight multi-object tracker for unique vehicle counting.
+ByteTrack-style two-stage IoU association with an alpha-beta (steady-state
+Kalman) constant-velocity motion model. All per-frame work is NumPy over the
+(detections × tracks) matrix, so its cost stays far below inference.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+
+from .analyzer import CLASS_NAMES, Detections
+
+# ─────────────────────────────────────────────
+HIGH_THRESH = 0.5     # deteksi >= ini dipakai untuk asosiasi tahap 1 & track baru
+MATCH_IOU = 0.3       # IoU minimum antara deteksi dan prediksi track
+MAX_AGE_SEC = 1.0     # track dihapus bila tidak terlihat selama ini...
+MAX_MISSED = 2        # ...dan terlewat di lebih dari N frame sampel berturut-turut
+MIN_HITS = 2          # track dihitung sebagai kendaraan unik setelah N kecocokan
+WINDOW_SEC = 60.0     # lebar jendela waktu untuk hitungan unik
+ALPHA, BETA = 0.85, 0.3
+# ─────────────────────────────────────────────
+
+
+class VehicleTracker:
+    """
+    Assigns persistent track IDs across frames and counts each vehicle once.
+
+    Call ``update(detections, t)`` for every analyzed frame in time order.
+    ``unique_counts`` holds the per-class total of confirmed tracks and
+    ``windows()`` the same counts per ``window_sec`` time window (bucketed by
+    the time a vehicle was first seen).
+
+    Frames may be sampled sparsely (``sample_every`` at low fps, adaptive
+    sampling gaps of several seconds), so a track is only dropped once it is
+    older than ``max_age_sec`` *and* has missed more than ``max_missed``
+    samples at the recent mean sample interval; otherwise tracks would
+    expire between two samples and never reach ``min_hits``.
+    """
+
+    def __init__(
+        self,
+        high_thresh: float = HIGH_THRESH,
+        match_iou: float = MATCH_IOU,
+        max_age_sec: float = MAX_AGE_SEC,
+        min_hits: int = MIN_HITS,
+        window_sec: float = WINDOW_SEC,
+        max_missed: int = MAX_MISSED,
+    ):
+        self.high_thresh = high_thresh
+        self.match_iou = match_iou
+        self.max_age_sec = max_age_sec
+        self.min_hits = min_hits
+        self.window_sec = window_sec
+
+        n_cls = len(CLASS_NAMES) + 1                      # + kolom "unknown"
+        self._boxes = np.empty((0, 4), np.float32)        # cx, cy, w, h
+        self._vel = np.empty((0, 4), np.float32)
+        self._ids = np.empty(0, np.int64)
+        self._hits = np.empty(0, np.int32)
+        self._votes = np.empty((0, n_cls), np.int32)
+        self._first_seen = np.empty(0, np.float64)
+        self._last_seen = np.empty(0, np.float64)
+        self._counted = np.empty(0, bool)
+        self._next_id = 1
+        self._last_t: float | None = None
+        self.max_missed = max(0, max_missed)
+        self._gaps: deque[float] = deque(maxlen=self.max_missed + 1)
+        self._visible = 0
+
+        self.unique_counts = {name: 0 for name in CLASS_NAMES}
+        self._windows: dict[int, dict[str, int]] = {}
+
+    # ── Public API ─────────────────────────────────────────────
+    @property
+    def unique_total(self) -> int:
+        return sum(self.unique_counts.values())
+
+    def update(self, detections: Detections, t: float) -> np.ndarray:
+        """
+        Associate ``detections`` observed at time ``t`` (seconds) with the
+        current tracks. Returns the track id of every detection, in order.
+        """
+        dt = 0.0 if self._last_t is None else max(t - self._last_t, 0.0)
+        if self._last_t is not None:
+            self._gaps.append(dt)
+        self._last_t = t
+
+        pred = self._boxes + self._vel * dt
+        det_boxes = _xyxy_to_cxcywh(detections.boxes)
+        cls_idx = detections.class_index()
+        track_of_det = np.full(len(detections), -1, np.int64)
+        track_free = np.ones(len(self._ids), bool)
+
+        # Tahap 1: deteksi confidence tinggi, tahap 2: sisa deteksi rendah
+        high = detections.scores >= self.high_thresh
+        for stage in (np.flatnonzero(high), np.flatnonzero(~high)):
+            free = np.flatnonzero(track_free)
+            if not len(stage) or not len(free):
+                continue
+            iou = _iou_matrix(det_boxes[stage], pred[free])
+            for d, k in _greedy_match(iou, self.match_iou):
+                track_of_det[stage[d]] = free[k]
+                track_free[free[k]] = False
+
+        # Koreksi alpha-beta untuk track yang cocok, track lain hanya diprediksi
+        self._boxes = pred
+        m_det = np.flatnonzero(track_of_det >= 0)
+        m_trk = track_of_det[m_det]
+        if len(m_det):
+            residual = det_boxes[m_det] - pred[m_trk]
+            self._boxes[m_trk] = pred[m_trk] + ALPHA * residual
+            if dt > 0:
+                self._vel[m_trk] += BETA * residual / dt
+            self._hits[m_trk] += 1
+            self._last_seen[m_trk] = t
+            np.add.at(self._votes, (m_trk, cls_idx[m_det]), 1)
+
+        # Track baru dari deteksi confidence tinggi yang tidak cocok
+        new_det = np.flatnonzero((track_of_det < 0) & high)
+        if len(new_det):
+            track_of_det[new_det] = len(self._ids) + np.arange(len(new_det))
+            self._spawn(det_boxes[new_det], cls_idx[new_det], t)
+
+        ids = np.full(len(detections), -1, np.int64)
+        assigned = track_of_det >= 0
+        ids[assigned] = self._ids[track_of_det[assigned]]
+        self._confirm()
+        self._visible = int(np.count_nonzero(
+            (self._last_seen == t) & (self._hits >= self.min_hits)
+        ))
+        self._prune(t)
+        return ids
+
+    def stat_row(self) -> dict:
+        """Extra ``frame_stats`` columns for the current frame."""
+        return {"tracks": self._visible, "unique_total": self.unique_total}
+
+    def active_tracks(self) -> dict[str, np.ndarray]:
+        """
+        Confirmed tracks matched in the latest ``update``: ``ids``, ``boxes``
+        (N, 4) ``xyxy`` and ``velocity`` (N, 4) in ``cxcywh`` pixels/second.
+        """
+        live = (self._last_seen == self._last_t) & (self._hits >= self.min_hits)
+        cxcywh = self._boxes[live]
+        half = cxcywh[:, 2:] / 2
+        return {
+            "ids":      self._ids[live],
+            "boxes":    np.concatenate([cxcywh[:, :2] - half, cxcywh[:, :2] + half], axis=1),
+            "velocity": self._vel[live],
+        }
+
+    @property
+    def max_age(self) -> float:
+        """Effective track lifetime in seconds at the current sample spacing."""
+        if not self._gaps:
+            return self.max_age_sec
+        gap = sum(self._gaps) / len(self._gaps)
+        return max(self.max_age_sec, (self.max_missed + 0.5) * gap)
+
+    def windows(self) -> list[dict]:
+        """Unique vehicles per time window, ordered by time."""
+        rows = []
+        for idx in sorted(self._windows):
+            counts = self._windows[idx]
+            rows.append({
+                "window_start": round(idx * self.window_sec, 2),
+                "window_end":   round((idx + 1) * self.window_sec, 2),
+                **counts,
+                "total": sum(counts.values()),
+            })
+        return rows
+
+    # ── Internals ──────────────────────────────────────────────
+    def _spawn(self, boxes: np.ndarray, cls_idx: np.ndarray, t: float) -> None:
+        n = len(boxes)
+        votes = np.zeros((n, self._votes.shape[1]), np.int32)
+        votes[np.arange(n), cls_idx] = 1
+        self._boxes = np.concatenate([self._boxes, boxes])
+        self._vel = np.concatenate([self._vel, np.zeros((n, 4), np.float32)])
+        self._ids = np.concatenate([self._ids, self._next_id + np.arange(n)])
+        self._hits = np.concatenate([self._hits, np.ones(n, np.int32)])
+        self._votes = np.concatenate([self._votes, votes])
+        self._first_seen = np.concatenate([self._first_seen, np.full(n, t)])
+        self._last_seen = np.concatenate([self._last_seen, np.full(n, t)])
+        self._counted = np.concatenate([self._counted, np.zeros(n, bool)])
+        self._next_id += n
+
+    def _confirm(self) -> None:
+        newly = np.flatnonzero((self._hits >= self.min_hits) & ~self._counted)
+        if not len(newly):
+            return
+        self._counted[newly] = True
+        for cls, first_seen in zip(
+            self._votes[newly].argmax(axis=1).tolist(), self._first_seen[newly].tolist()
+        ):
+            if cls >= len(CLASS_NAMES):
+                continue
+            name = CLASS_NAMES[cls]
+            self.unique_counts[name] += 1
+            bucket = self._windows.setdefault(
+                int(first_seen // self.window_sec), {c: 0 for c in CLASS_NAMES}
+            )
+            bucket[name] += 1
+
+    def _prune(self, t: float) -> None:
+        alive = (t - self._last_seen) <= self.max_age
+        if alive.all():
+            return
+        self._boxes = self._boxes[alive]
+        self._vel = self._vel[alive]
+        self._ids = self._ids[alive]
+        self._hits = self._hits[alive]
+        self._votes = self._votes[alive]
+        self._first_seen = self._first_seen[alive]
+        self._last_seen = self._last_seen[alive]
+        self._counted = self._counted[alive]
+
+
+def _xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    out = np.empty_like(boxes, dtype=np.float32)
+    out[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+    out[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+    out[:, 2] = boxes[:, 2] - boxes[:, 0]
+    out[:, 3] = boxes[:, 3] - boxes[:, 1]
+    return out
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two sets of ``cxcywh`` boxes, shape (len(a), len(b))."""
+    a1, a2 = a[:, None, :2] - a[:, None, 2:] / 2, a[:, None, :2] + a[:, None, 2:] / 2
+    b1, b2 = b[None, :, :2] - b[None, :, 2:] / 2, b[None, :, :2] + b[None, :, 2:] / 2
+    wh = (np.minimum(a2, b2) - np.maximum(a1, b1)).clip(0)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] * a[:, 3])[:, None]
+    area_b = (b[:, 2] * b[:, 3])[None, :]
+    return inter / (area_a + area_b - inter + 1e-9)
+
+
+def _greedy_match(iou: np.ndarray, thresh: float) -> list[tuple[int, int]]:
+    """Match rows to columns by descending IoU, each used at most once."""
+    rows, cols = np.nonzero(iou >= thresh)
+    order = np.argsort(-iou[rows, cols], kind="stable")
+    used_r, used_c, pairs = set(), set(), []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_r or c in used_c:
+            continue
+        used_r.add(r)
+        used_c.add(c)
+        pairs.append((r, c))
+    return pairs
@@ -0,0 +1,126 @@
+"""
+Background import warm-up and cold-start measurement.
+The pages that need no model (Dashboard, Tentang Model) render without
+importing cv2 / numpy / plotly / the inference backend. ``start`` imports
+that stack in a daemon thread after the first render, so the detection
+pages find it already in ``sys.modules``.
+
+    python -m utils.warmup --backend onnxruntime   # waktu import dingin per modul
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# ─────────────────────────────────────────────
+HEAVY_MODULES = (
+    "numpy", "cv2", "pandas", "plotly.graph_objects", "utils.analyzer", "utils.charts",
+)
+BACKEND_MODULES = {
+    "ultralytics": ("torch", "ultralytics"),
+    "onnxruntime": ("onnxruntime", "utils.onnx_backend"),
+}
+# ─────────────────────────────────────────────
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_lock = threading.Lock()
+_threads: dict[str | None, threading.Thread] = {}
+timings: dict[str, float] = {}   # modul → detik import di thread warm-up
+errors: dict[str, str] = {}      # modul → error (mis. backend opsional tidak terpasang)
+
+
+def warm_modules(backend: str | None = None) -> tuple[str, ...]:
+    return HEAVY_MODULES + BACKEND_MODULES.get(backend, ())
+
+
+def start(backend: str | None = None) -> threading.Thread:
+    """
+    Import the heavy stack (plus ``backend``'s modules) in a daemon thread.
+    Once per process and backend; Streamlit reruns get the same thread back.
+    """
+    with _lock:
+        thread = _threads.get(backend)
+        if thread is None:
+            thread = threading.Thread(
+                target=_run, args=(warm_modules(backend),), name="tv-warmup", daemon=True
+            )
+            thread.start()
+            _threads[backend] = thread
+        return thread
+
+
+def done(backend: str | None = None) -> bool:
+    thread = _threads.get(backend)
+    return thread is not None and not thread.is_alive()
+
+
+def snapshot() -> tuple[dict[str, float], dict[str, str]]:
+    """Copies of ``timings`` and ``errors``, safe while the thread still runs."""
+    with _lock:
+        return dict(timings), dict(errors)
+
+
+def _run(modules: tuple[str, ...]) -> None:
+    for name in modules:
+        if name in sys.modules:
+            with _lock:
+                timings.setdefault(name, 0.0)
+            continue
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as exc:
+            with _lock:
+                errors[name] = f"{type(exc).__name__}: {exc}"
+            continue
+        with _lock:
+            timings[name] = time.perf_counter() - t0
+
+
+def measure_cold_imports(modules: tuple[str, ...]) -> dict[str, float | None]:
+    """
+    Import time of each module in a fresh interpreter, dependencies
+    included — what a cold container pays the first time it is needed.
+    ``None`` when the module cannot be imported.
+    """
+    code = (
+        "import importlib, sys, time; t = time.perf_counter(); "
+        "importlib.import_module(sys.argv[1]); print(time.perf_counter() - t)"
+    )
+    out: dict[str, float | None] = {}
+    for name in modules:
+        proc = subprocess.run(
+            [sys.executable, "-c", code, name], cwd=APP_DIR,
+            capture_output=True, text=True,
+        )
+        out[name] = float(proc.stdout.strip()) if proc.returncode == 0 else None
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Ukur waktu import dingin modul Traffic Vision.")
+    p.add_argument("--backend", choices=sorted(BACKEND_MODULES), default=None)
+    p.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+    args = p.parse_args(argv)
+
+    modules = ("streamlit", "pages.home", "pages.about", *warm_modules(args.backend),
+               "pages.image_detection", "pages.video_analysis")
+    result = measure_cold_imports(modules)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    for name, sec in result.items():
+        print(f"{name:<28} {'gagal' if sec is None else f'{sec * 1000:8.0f} ms'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
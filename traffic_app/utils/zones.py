@@ -0,0 +1,116 @@
+"""
+Region-of-interest polygons and lane zones.
+Polygons are given in normalized (0–1) frame coordinates so one layout works
+at any resolution. A label mask per frame size turns zone assignment into
+one array lookup per detection.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class Zone:
+    name: str
+    polygon: list[tuple[float, float]]   # titik (x, y) ternormalisasi 0–1
+
+
+@dataclass
+class ZoneLayout:
+    """
+    A set of (possibly overlapping — the later zone wins) zone polygons.
+
+    ``mask(w, h)`` is a uint8 label image (0 = outside every zone, ``i + 1``
+    = zone ``i``), built once per frame size and cached together with the
+    per-zone pixel areas and the bounding rectangle used as inference crop.
+    """
+
+    zones: list[Zone]
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.zones:
+            raise ValueError("ZoneLayout needs at least one zone")
+        if len(self.zones) > 254:
+            raise ValueError("At most 254 zones are supported")
+
+    @property
+    def names(self) -> list[str]:
+        return [z.name for z in self.zones]
+
+    def mask(self, w: int, h: int) -> np.ndarray:
+        return self._geometry(w, h)[0]
+
+    def areas(self, w: int, h: int) -> np.ndarray:
+        """Pixel area per zone (index ``i`` = zone ``i``)."""
+        return self._geometry(w, h)[1]
+
+    def bounding_roi(self, w: int, h: int) -> tuple[int, int, int, int]:
+        """(x1, y1, x2, y2) rectangle enclosing all zones — the inference crop."""
+        return self._geometry(w, h)[2]
+
+    def polygons_px(self, w: int, h: int) -> list[np.ndarray]:
+        scale = np.array([w, h], dtype=np.float32)
+        return [
+            np.round(np.asarray(z.polygon, dtype=np.float32) * scale).astype(np.int32)
+            for z in self.zones
+        ]
+
+    def assign(self, boxes: np.ndarray, w: int, h: int) -> np.ndarray:
+        """
+        Zone index per box (-1 = outside), using the bottom-centre point —
+        where a vehicle touches the road.
+        """
+        if not len(boxes):
+            return np.empty(0, dtype=np.int64)
+        xs = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int64), 0, w - 1)
+        ys = np.clip(boxes[:, 3].astype(np.int64), 0, h - 1)
+        return self.mask(w, h)[ys, xs].astype(np.int64) - 1
+
+    def _geometry(self, w: int, h: int):
+        key = (w, h)
+        if key not in self._cache:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            for i, poly in enumerate(self.polygons_px(w, h)):
+                cv2.fillPoly(mask, [poly], i + 1)
+            areas = np.bincount(mask.ravel(), minlength=len(self.zones) + 1)[1:]
+            ys, xs = np.nonzero(mask)
+            if len(xs):
+                roi = (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+            else:
+                roi = (0, 0, w, h)
+            self._cache[key] = (mask, areas, roi)
+        return self._cache[key]
+
+    # ── Konfigurasi ────────────────────────────────────────────
+    @classmethod
+    def from_text(cls, text: str) -> "ZoneLayout":
+        """
+        One zone per line, points in percent of the frame:
+        ``Lajur 1: 0,40 50,40 50,100 0,100``.
+        """
+        zones = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, _, points = line.rpartition(":")
+            pts = [tuple(float(v) / 100 for v in p.split(",")) for p in points.split()]
+            if len(pts) < 3 or any(len(p) != 2 for p in pts):
+                raise ValueError(f"Zona butuh minimal 3 titik x,y: {line!r}")
+            zones.append(Zone(name.strip() or f"Zona {len(zones) + 1}", pts))
+        return cls(zones)
+
+    @classmethod
+    def from_json(cls, path: str) -> "ZoneLayout":
+        """``[{"name": ..., "polygon": [[x, y], ...]}, ...]`` with 0–1 coordinates."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([
+            Zone(z["name"], [tuple(map(float, p)) for p in z["polygon"]]) for z in data
+        ])